@@ -0,0 +1,95 @@
+"""Profile image thumbnails for WorkPod members.
+
+An upload is downscaled and re-encoded once, at registration, into a few
+fixed-size JPEG thumbnails stored in the ``avatars`` table under the SHA-256
+of the original bytes. JPEG is what ``st.image`` serves without re-encoding,
+so OneDash hands the stored bytes straight to the browser. Because the key
+is the content hash, cached thumbnails can never go stale.
+"""
+import hashlib
+import io
+import threading
+from functools import lru_cache
+
+import db
+
+THUMBNAIL_SIZES = (96, 320)
+SIDEBAR_SIZE = 320
+JPEG_QUALITY = 82
+AVATAR_CACHE_SIZE = 512
+
+_backfill_lock = threading.Lock()
+_backfilled_paths = set()
+
+
+def make_thumbnails(image_bytes, sizes=THUMBNAIL_SIZES):
+    """Return ``{size: jpeg_bytes}`` with each thumbnail fitting in a size x size box."""
+    # Only registration and the legacy backfill need Pillow
+    from PIL import Image, ImageOps
+
+    image = Image.open(io.BytesIO(image_bytes))
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ("RGBA", "LA", "P"):
+        # Flatten transparency onto white rather than black
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    else:
+        image = image.convert("RGB")
+
+    thumbnails = {}
+    for size in sizes:
+        thumbnail = image.copy()
+        thumbnail.thumbnail((size, size), Image.LANCZOS)
+        buffer = io.BytesIO()
+        thumbnail.save(buffer, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+        thumbnails[size] = buffer.getvalue()
+    return thumbnails
+
+
+def save_avatar(image_bytes):
+    """Thumbnail and store an upload, returning its content hash.
+
+    Raises ``ValueError`` if the bytes are not a readable image.
+    """
+    digest = hashlib.sha256(image_bytes).hexdigest()
+    if not db.has_avatar(digest):
+        from PIL import Image
+
+        try:
+            thumbnails = make_thumbnails(image_bytes)
+        except (OSError, Image.DecompressionBombError) as exc:
+            raise ValueError(f"Not a readable image: {exc}") from exc
+        db.store_avatar(digest, thumbnails)
+    return digest
+
+
+@lru_cache(maxsize=AVATAR_CACHE_SIZE)
+def load_avatar(digest, size=SIDEBAR_SIZE):
+    """Thumbnail bytes for ``digest``, kept in memory across reruns and sessions."""
+    return db.get_avatar(digest, size)
+
+
+def backfill_legacy_images():
+    """Move full-size images stored before thumbnails existed into the avatar store.
+
+    Runs once per process and database. Rows whose bytes are not a readable
+    image are left untouched. Once anything has moved, the database is
+    vacuumed so the freed pages are given back.
+    """
+    with _backfill_lock:
+        path = db.get_pool().path
+        if path in _backfilled_paths:
+            return
+        moved = 0
+        for user_id, image in db.get_legacy_user_images():
+            try:
+                digest = save_avatar(image)
+            except ValueError:
+                continue
+            db.set_user_avatar(user_id, digest)
+            moved += 1
+        if moved:
+            db.vacuum()
+        _backfilled_paths.add(path)
@@ -0,0 +1,118 @@
+"""Offline load test of the whole app against the local mock LLM provider.
+
+Copies the app into a temporary directory with a synthetic
+``musicdata.csv``, prepares the music catalogue and selects the ``mock``
+provider. Then ``--sessions``
+concurrent Streamlit sessions (``AppTest``, one process each, since
+``AppTest`` is not thread-safe) run
+``--turns`` rounds each: send a project idea on the Arctic page, where the
+answer streams and its tasks are saved, then click a mood on Oasis. The
+mock's time to first token, tokens per second and injected failure rate
+come from the arguments. Reports throughput and tail latency per page, and
+how many script runs ended in an error message.
+
+    python benchmarks/bench_app_load.py [--sessions 8] [--turns 5] [--ttft 0.3] [--error-rate 0.05]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+MOODS = ("but1", "but2", "but3", "but4", "but5", "but6")
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(0, int(len(ordered) * fraction) - 1)]
+
+
+def session(app, index, turns):
+    from streamlit.testing.v1 import AppTest
+
+    # Each process has its own mock; distinct seeds give each its own failure sequence
+    os.environ["WORKPOD_MOCK_SEED"] = str(index)
+    at = AppTest.from_file(os.path.join(app, "run.py"), default_timeout=120)
+    at.run()
+    at.session_state["project_id"] = f"load-{index}"
+    at.session_state["username"] = f"user{index}"
+    results = {"arctic": [], "oasis": [], "failed": 0}
+    for turn in range(turns):
+        at.sidebar.radio[0].set_value("Arctic").run()
+        start = time.perf_counter()
+        at.chat_input[0].set_value(f"Session {index} project {turn}: a booking app for climbing gyms").run()
+        arctic = time.perf_counter() - start
+        arctic_failed = bool(at.error) or bool(at.exception)
+
+        at.sidebar.radio[0].set_value("Oasis").run()
+        start = time.perf_counter()
+        at.button(key=MOODS[(index + turn) % len(MOODS)]).click().run()
+        oasis = time.perf_counter() - start
+        oasis_failed = bool(at.exception)
+        results["arctic"].append(arctic)
+        results["oasis"].append(oasis)
+        results["failed"] += arctic_failed + oasis_failed
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--tracks", type=int, default=20_000)
+    parser.add_argument("--ttft", type=float, default=0.3)
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    os.environ.update({
+        "WORKPOD_MOCK_PROVIDER": "1",
+        "WORKPOD_DEFAULT_PROVIDER": "mock",
+        "WORKPOD_MOCK_TTFT": str(args.ttft),
+        "WORKPOD_MOCK_TOKENS_PER_SECOND": str(args.tokens_per_second),
+        "WORKPOD_MOCK_ERROR_RATE": str(args.error_rate),
+    })
+    from bench_music import write_catalogue
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = os.path.join(tmp, "app")
+        shutil.copytree(ROOT, app, ignore=shutil.ignore_patterns(".git", "__pycache__", ".workpod_cache", "*.db*"))
+        write_catalogue(os.path.join(app, "musicdata.csv"), args.tracks)
+        os.chdir(app)
+        sys.path.insert(0, app)
+        # Prepared up front, as a deployment would with ``python music_catalog.py``
+        subprocess.run([sys.executable, "music_catalog.py"], check=True, stdout=subprocess.DEVNULL)
+
+        results = {"arctic": [], "oasis": [], "failed": 0}
+        start = time.perf_counter()
+        with ProcessPoolExecutor(args.sessions) as pool:
+            for outcome in pool.map(session, [app] * args.sessions, range(args.sessions), [args.turns] * args.sessions):
+                for name, value in outcome.items():
+                    results[name] += value
+        elapsed = time.perf_counter() - start
+        os.chdir(ROOT)
+
+    runs = len(results["arctic"]) + len(results["oasis"])
+    print(
+        f"{args.sessions} sessions x {args.turns} turns, mock TTFT {args.ttft * 1000:.0f} ms, "
+        f"{args.tokens_per_second:.0f} tokens/s, error rate {args.error_rate:.0%}"
+    )
+    print(f"{runs} page runs in {elapsed:.1f} s ({runs / elapsed:.1f} runs/s), {results['failed']} ended in an error")
+    print(f"{'page':<7} | {'p50 ms':>7} | {'p95 ms':>7} | {'p99 ms':>7}")
+    for page in ("arctic", "oasis"):
+        times = results[page]
+        print(
+            f"{page:<7} | {statistics.median(times) * 1000:>7.0f} | {percentile(times, 0.95) * 1000:>7.0f} | "
+            f"{percentile(times, 0.99) * 1000:>7.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Concurrent completions and cancellation with the asyncio providers.
+
+Runs against a local mock of the OpenAI-compatible API (``mock_openai.py``)
+that streams ``--tokens`` tokens at ``--tokens-per-second``.
+
+- The first two rows compare wall time for ``--completions`` requests.
+  One sends them one after another through the blocking
+  ``sync_groq_client.GroqClient``. The other runs them all at once through
+  ``llm_async.submit``.
+- The cancellation rows read one token and then stop reading.
+  "abandoned" leaves the blocking stream open, as an interrupted rerun
+  used to. "cancelled" closes an ``llm_async.iter_sync`` stream, as the
+  app now does. The tokens column counts what the server still produced
+  for nobody.
+
+    python benchmarks/bench_async_llm.py [--completions 8] [--tokens 100]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sync_groq_client import GroqClient  # noqa: E402
+from llm_async import AsyncGroqProvider, collect, iter_sync, submit  # noqa: E402
+from mock_openai import MockOpenAIServer  # noqa: E402
+
+MESSAGES = [{"role": "user", "content": "I am feeling excited!"}]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--completions", type=int, default=8)
+    parser.add_argument("--tokens", type=int, default=100)
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--ttft", type=float, default=0.1)
+    args = parser.parse_args()
+
+    server = MockOpenAIServer(ttft=args.ttft, tokens=args.tokens, tokens_per_second=args.tokens_per_second).start()
+    client = GroqClient(url=server.url)
+    provider = AsyncGroqProvider(url=server.url)
+
+    start = time.perf_counter()
+    for _ in range(args.completions):
+        "".join(client.stream_chat(MESSAGES, "key", "mock"))
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    futures = [submit(collect(provider.stream_chat(MESSAGES, "key", "mock"))) for _ in range(args.completions)]
+    for future in futures:
+        future.result()
+    concurrent = time.perf_counter() - start
+
+    print(f"{args.completions} completions of {args.tokens} tokens at {args.tokens_per_second:.0f} tokens/s")
+    print(f"{'mode':<24} | {'wall s':>7}")
+    print(f"{'sequential (blocking)':<24} | {sequential:>7.2f}")
+    print(f"{'concurrent (asyncio)':<24} | {concurrent:>7.2f}")
+
+    wait = args.ttft + args.tokens / args.tokens_per_second + 0.5
+    rows = []
+    for name in ("abandoned", "cancelled"):
+        before = server.tokens_sent
+        if name == "abandoned":
+            stream = client.stream_chat(MESSAGES, "key", "mock")
+            next(stream)
+            leaked = stream  # noqa: F841 - still referenced, never closed
+        else:
+            stream = iter_sync(provider.stream_chat(MESSAGES, "key", "mock"))
+            next(stream)
+            stream.close()
+        time.sleep(wait)
+        rows.append((name, server.tokens_sent - before - 1))
+    print(f"{'after the first token':<24} | {'tokens streamed to nobody':>25}")
+    for name, wasted in rows:
+        print(f"{name:<24} | {wasted:>25}")
+
+    client.close()
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Sidebar avatar cost and database size for a 50-member project.
+
+The legacy column stores each upload in ``users.image``, then on every
+render decodes it and re-encodes it the way ``st.image`` does for a PIL
+image. The thumbnail column stores uploads through ``avatars.save_avatar``
+and renders from ``avatars.load_avatar``, which hands cached JPEG bytes to
+the browser unchanged.
+
+    python benchmarks/bench_avatars.py [--members 50] [--renders 20]
+"""
+import argparse
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np  # noqa: E402
+from PIL import Image  # noqa: E402
+
+import avatars  # noqa: E402
+import db  # noqa: E402
+
+
+def photo(rng, width=2400, height=1800):
+    """A phone-camera-sized JPEG with enough texture that it does not compress away."""
+    gradient = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+    noise = rng.normal(0, 40, (height, width, 3)).astype(np.float32)
+    pixels = np.clip(gradient + noise, 0, 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, "JPEG", quality=92)
+    return buffer.getvalue()
+
+
+def legacy_render(path, project_id):
+    conn = sqlite3.connect(path)
+    rows = conn.execute("SELECT * FROM users WHERE project_id = ?", (project_id,)).fetchall()
+    conn.close()
+    for row in rows:
+        image = Image.open(io.BytesIO(row[4]))
+        buffer = io.BytesIO()
+        image.convert("RGB").save(buffer, "JPEG", quality=90)
+
+
+def thumbnail_render(project_id):
+    for user in db.get_users_by_project_id(project_id):
+        avatars.load_avatar(user[4])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--members", type=int, default=50)
+    parser.add_argument("--renders", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    uploads = [photo(rng) for _ in range(args.members)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.db")
+        conn = sqlite3.connect(legacy_path)
+        conn.execute(db.CREATE_USERS_SQL)
+        conn.executemany(
+            "INSERT INTO users (username, email, project_id, image) VALUES (?, ?, ?, ?)",
+            ((f"user{i}", f"user{i}@example.com", "project", upload) for i, upload in enumerate(uploads)),
+        )
+        conn.commit()
+        conn.close()
+
+        thumbnail_path = os.path.join(tmp, "thumbnails.db")
+        pool = db.configure(thumbnail_path)
+        db.create_database()
+        for i, upload in enumerate(uploads):
+            db.insert_user_data(f"user{i}", f"user{i}@example.com", "project", avatars.save_avatar(upload))
+        with pool.connection() as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+        start = time.perf_counter()
+        for _ in range(args.renders):
+            legacy_render(legacy_path, "project")
+        legacy_ms = (time.perf_counter() - start) / args.renders * 1000
+
+        start = time.perf_counter()
+        for _ in range(args.renders):
+            thumbnail_render("project")
+        thumbnail_ms = (time.perf_counter() - start) / args.renders * 1000
+
+        legacy_mb = os.path.getsize(legacy_path) / 1e6
+        thumbnail_mb = os.path.getsize(thumbnail_path) / 1e6
+        print(f"{args.members} members, uploads average {sum(map(len, uploads)) / len(uploads) / 1e6:.2f} MB")
+        print(f"{'':<12} | {'sidebar ms':>10} | {'db MB':>8}")
+        print(f"{'legacy':<12} | {legacy_ms:>10.1f} | {legacy_mb:>8.2f}")
+        print(f"{'thumbnails':<12} | {thumbnail_ms:>10.1f} | {thumbnail_mb:>8.2f}")
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Per-rerun cost of the OneDash contribution chart: rebuilt, light, and cached figures.
+
+For pies of each ``--slices`` size, times what one rerun spends on the chart:
+
+- express builds the figure with pandas and plotly.express every rerun, as
+  run.py used to;
+- light builds it every rerun with ``plotly.graph_objects`` alone;
+- cached is ``charts.contribution_figure`` with unchanged counts, which
+  hashes the counts and reuses the project's figure.
+
+The build column is the figure alone. The render column adds
+``st.plotly_chart``, which Streamlit spends serialising the figure (run
+outside a server, so nothing is sent). The first-chart table starts a fresh
+process after ``import streamlit`` and times the first figure of each kind,
+including the imports it needs.
+
+    python benchmarks/bench_charts.py [--slices 5 50] [--loops 200]
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import charts  # noqa: E402
+
+FIRST_CHART = """
+import json, sys, time
+import streamlit
+import charts
+start = time.perf_counter()
+getattr(charts, sys.argv[1])([(f"user{i}", i + 1) for i in range(5)])
+print(json.dumps(time.perf_counter() - start))
+"""
+
+
+def per_call(function, loops):
+    function()
+    samples = []
+    for _ in range(loops):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def first_chart(builder, samples):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    times = []
+    for _ in range(samples):
+        result = subprocess.run(
+            [sys.executable, "-c", FIRST_CHART, builder], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+        )
+        times.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--slices", type=int, nargs="+", default=[5, 50])
+    parser.add_argument("--loops", type=int, default=200)
+    parser.add_argument("--samples", type=int, default=5)
+    args = parser.parse_args()
+
+    import streamlit as st
+
+    # Outside a server every element call warns about the missing script run context
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").disabled = True
+
+    print(f"One rerun's chart, p50 of {args.loops}")
+    print(f"{'slices':>6} | {'figure':<8} | {'build ms':>8} | {'render ms':>9}")
+    for slices in args.slices:
+        contributions = [(f"user{i}", i + 1) for i in range(slices)]
+        cache = charts.FigureCache()
+        modes = {
+            "express": lambda: charts.express_figure(contributions),
+            "light": lambda: charts.light_figure(contributions),
+            "cached": lambda: cache.figure("bench", contributions),
+        }
+        for name, build in modes.items():
+            built = per_call(build, args.loops)
+            rendered = per_call(lambda: st.plotly_chart(build()), args.loops)
+            print(f"{slices:>6} | {name:<8} | {built * 1000:>8.2f} | {rendered * 1000:>9.2f}")
+
+    print(f"\nFirst chart in a fresh process, including imports, p50 of {args.samples}")
+    for builder in ("express_figure", "light_figure"):
+        print(f"{builder:<15} {first_chart(builder, args.samples) * 1000:>7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Prompt payload size and build time over a 100-turn planning conversation.
+
+Each turn appends a project idea and a numbered task breakdown. The full
+rows send the system prompt plus the whole history and run
+``estimate_num_tokens`` over the entire concatenated prompt, as the old
+Groq and Replicate paths did. The window rows send
+``Conversation.window`` under the model's context budget. Every turn
+checks that the window, summary included, stays within the budget.
+
+    python benchmarks/bench_conversation.py [--turns 100] [--budget 4096]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from conversation import Conversation, estimate_num_tokens, message_tokens  # noqa: E402
+
+SYSTEM = {"role": "system", "content": "Purpose: Convert a project idea into dashboard-ready tasks for WorkPod."}
+
+
+def turn(i):
+    user = {
+        "role": "user",
+        "content": f"Project {i}: build a booking app for climbing gyms with waitlists and payments. "
+        "Break this project into WorkPod dashboard tasks. Return only the numbered task list in the required format.",
+    }
+    assistant = {
+        "role": "assistant",
+        "content": "\n".join(f"{n}. Task {n} for project {i} with enough detail to matter - expected time: {n} days" for n in range(1, 8)),
+    }
+    return user, assistant
+
+
+def timed(fn, repeats=20):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeats
+
+
+def full_payload(messages):
+    payload = [SYSTEM] + list(messages)
+    estimate_num_tokens("\n".join(message["content"] for message in payload))
+    return payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--budget", type=int, default=4096)
+    args = parser.parse_args()
+
+    conversation = Conversation([{"role": "assistant", "content": "Hi! I'm WorkPod AI."}])
+    checkpoints = sorted({1, 10, 25, 50, 75, args.turns})
+    print(f"{'turn':>4} | {'full KB':>8} | {'window KB':>9} | {'full tokens':>11} | {'window tokens':>13} | {'full µs':>8} | {'window µs':>9}")
+    for i in range(1, args.turns + 1):
+        user, assistant = turn(i)
+        conversation.append(user)
+        window_size = sum(message_tokens(m) for m in conversation.window(args.budget, system=SYSTEM))
+        assert window_size <= args.budget, f"turn {i}: window of {window_size} tokens over a {args.budget} budget"
+        if i in checkpoints:
+            full, full_time = timed(lambda: full_payload(conversation))
+            window, window_time = timed(lambda: conversation.window(args.budget, system=SYSTEM))
+            full_tokens = sum(estimate_num_tokens(m["content"]) for m in full)
+            window_tokens = sum(estimate_num_tokens(m["content"]) for m in window)
+            print(
+                f"{i:>4} | {len(json.dumps(full)) / 1024:>8.1f} | {len(json.dumps(window)) / 1024:>9.1f} | "
+                f"{full_tokens:>11} | {window_tokens:>13} | {full_time * 1e6:>8.0f} | {window_time * 1e6:>9.0f}"
+            )
+        conversation.append(assistant)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Time to first token with and without connection reuse.
+
+Streams chat completions from a local mock of the OpenAI-compatible API
+(``mock_openai.py``). The cold rows open a fresh connection per message,
+as the old bare ``requests.post`` did. The pooled rows reuse
+``sync_groq_client.GroqClient``'s keep-alive session. ``--handshake`` adds a
+per-connection delay on the server to stand in for the TCP+TLS setup to
+api.groq.com. The retry row sends every message into one 429 with
+``Retry-After: 0`` first.
+
+    python benchmarks/bench_groq_client.py [--messages 50] [--handshake 0.05]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import requests  # noqa: E402
+
+from llm_async import chat_payload  # noqa: E402
+from sync_groq_client import GroqClient, iter_chat_chunks  # noqa: E402
+from mock_openai import MockOpenAIServer  # noqa: E402
+
+MESSAGES = [{"role": "user", "content": "Break this project into tasks."}]
+
+
+def cold_stream(url):
+    response = requests.post(url, json=chat_payload(MESSAGES, "mock"), stream=True, timeout=(10, 180))
+    response.raise_for_status()
+    try:
+        yield from iter_chat_chunks(response)
+    finally:
+        response.close()
+
+
+def time_to_first_token(stream):
+    start = time.perf_counter()
+    ttft = None
+    for _ in stream:
+        if ttft is None:
+            ttft = time.perf_counter() - start
+    return ttft, time.perf_counter() - start
+
+
+def run(server, messages, make_stream):
+    ttfts, totals = [], []
+    for _ in range(messages):
+        ttft, total = time_to_first_token(make_stream())
+        ttfts.append(ttft)
+        totals.append(total)
+    ttfts.sort()
+    return statistics.median(ttfts), ttfts[int(len(ttfts) * 0.95) - 1], statistics.median(totals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--handshake", type=float, default=0.05)
+    parser.add_argument("--ttft", type=float, default=0.02)
+    parser.add_argument("--tokens", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{args.messages} messages, mock TTFT {args.ttft * 1000:.0f} ms, handshake {args.handshake * 1000:.0f} ms")
+    print(f"{'client':<16} | {'TTFT p50 ms':>11} | {'TTFT p95 ms':>11} | {'total p50 ms':>12} | {'connections':>11} | {'retries':>7}")
+    cases = ("cold", "pooled", "pooled + 429")
+    for name in cases:
+        server = MockOpenAIServer(ttft=args.ttft, tokens=args.tokens, handshake=args.handshake).start()
+        client = GroqClient(url=server.url, backoff_base=0.01)
+        if name == "cold":
+            def make_stream():
+                return cold_stream(server.url)
+        elif name == "pooled":
+            def make_stream():
+                return client.stream_chat(MESSAGES, "key", "mock")
+        else:
+            def make_stream():
+                server.fail_first = server.requests + 1
+                return client.stream_chat(MESSAGES, "key", "mock")
+        p50, p95, total = run(server, args.messages, make_stream)
+        print(
+            f"{name:<16} | {p50 * 1000:>11.2f} | {p95 * 1000:>11.2f} | {total * 1000:>12.2f} | "
+            f"{server.connections:>11} | {client.retries:>7}"
+        )
+        client.close()
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
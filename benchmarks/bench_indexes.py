@@ -0,0 +1,101 @@
+"""Per-query latency with and without the migrations' secondary indexes.
+
+Seeds 100k tasks across 5k projects, drops every secondary index the
+migrations created (as in a pre-migration user_data.db), and times each
+OneDash/Login query. It then recreates the indexes in place and times the
+same queries again.
+
+    python benchmarks/bench_indexes.py [--tasks 100000] [--projects 5000]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import db  # noqa: E402
+
+QUERIES = {
+    "get_tasks_by_project_id": lambda p, u: db.get_tasks_by_project_id(p),
+    "get_completed_and_total_tasks": lambda p, u: db.get_completed_and_total_tasks(p),
+    "get_user_contributions": lambda p, u: db.get_user_contributions(p),
+    "get_user_by_project_id_and_username": lambda p, u: db.get_user_by_project_id_and_username(p, u),
+    "get_users_by_project_id": lambda p, u: db.get_users_by_project_id(p),
+}
+
+
+def seed(conn, tasks, projects, rng):
+    conn.execute("BEGIN")
+    conn.executemany(
+        "INSERT INTO users (username, email, project_id) VALUES (?, ?, ?)",
+        ((f"user{p % 7}", f"user{p}@example.com", f"project-{p}") for p in range(projects)),
+    )
+    conn.executemany(
+        "INSERT INTO tasks (project_id, task_description, completed, completed_by) VALUES (?, ?, ?, ?)",
+        (
+            (f"project-{rng.randrange(projects)}", f"{t}. Task {t} - expected time: 2 days", done, f"user{t % 7}" if done else None)
+            for t in range(tasks)
+            for done in (rng.random() < 0.4,)
+        ),
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+
+
+def time_queries(samples):
+    results = {}
+    for name, query in QUERIES.items():
+        timings = []
+        for project_id, username in samples:
+            start = time.perf_counter()
+            query(project_id, username)
+            timings.append(time.perf_counter() - start)
+        results[name] = statistics.median(timings) * 1e6
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--projects", type=int, default=5_000)
+    parser.add_argument("--samples", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = db.configure(os.path.join(tmp, "bench.db"))
+        db.create_database()
+        with pool.connection() as conn:
+            indexes = conn.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+            ).fetchall()
+            for name, _ in indexes:
+                conn.execute(f"DROP INDEX {name}")
+            seed(conn, args.tasks, args.projects, rng)
+        samples = [
+            (f"project-{p}", f"user{p % 7}")
+            for p in (rng.randrange(args.projects) for _ in range(args.samples))
+        ]
+
+        before = time_queries(samples)
+        with pool.connection() as conn:
+            start = time.perf_counter()
+            for _, sql in indexes:
+                conn.execute(sql)
+            conn.execute("ANALYZE")
+            migrate_seconds = time.perf_counter() - start
+        after = time_queries(samples)
+
+        print(f"{args.tasks} tasks / {args.projects} projects, building {len(indexes)} indexes took {migrate_seconds:.2f}s")
+        print(f"{'query':<38} | {'before µs':>10} | {'after µs':>10} | speedup")
+        for name in QUERIES:
+            print(f"{name:<38} | {before[name]:>10.1f} | {after[name]:>10.1f} | {before[name] / after[name]:>6.1f}x")
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Response time for repeated prompts with the persistent LLM response cache.
+
+Replays a workload of ``--requests`` prompts drawn from the six fixed Oasis
+mood prompts plus ``--ideas`` distinct project ideas. The prompts go to a
+local mock of the OpenAI-compatible API (``mock_openai.py``) that has a
+realistic time to first token. Each prompt is sent once with the cache
+bypassed and once through it. The hit/miss counters come from
+``llm_cache.stats``.
+
+    python benchmarks/bench_llm_cache.py [--requests 200] [--ideas 20]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import db  # noqa: E402
+import llm_cache  # noqa: E402
+from llm_async import AsyncGroqProvider, iter_sync  # noqa: E402
+from mock_openai import MockOpenAIServer  # noqa: E402
+
+MOODS = ("frustrated", "motivated", "excited", "satisfied", "tired", "gloomy")
+
+
+def timed(stream):
+    start = time.perf_counter()
+    ttft = None
+    for _ in stream:
+        if ttft is None:
+            ttft = time.perf_counter() - start
+    return ttft, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--ideas", type=int, default=20)
+    parser.add_argument("--ttft", type=float, default=0.15)
+    parser.add_argument("--tokens-per-second", type=float, default=800.0)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    prompts = [f"I am feeling {mood}." for mood in MOODS] + [f"Project idea {i}" for i in range(args.ideas)]
+    workload = [[{"role": "user", "content": rng.choice(prompts)}] for _ in range(args.requests)]
+
+    server = MockOpenAIServer(ttft=args.ttft, tokens=60, tokens_per_second=args.tokens_per_second).start()
+    provider = AsyncGroqProvider(url=server.url)
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = db.configure(os.path.join(tmp, "bench.db"))
+        db.create_database()
+        results = {}
+        for name, enabled in (("no cache", False), ("cache", True)):
+            llm_cache.stats.reset()
+            ttfts, totals = [], []
+            for messages in workload:
+                stream = llm_cache.cached_stream(
+                    lambda: provider.stream_chat(messages, "key", "mock", 0.5), "groq", "mock", 0.5, messages, enabled
+                )
+                ttft, total = timed(iter_sync(stream))
+                ttfts.append(ttft)
+                totals.append(total)
+            ttfts.sort()
+            results[name] = (statistics.median(ttfts), ttfts[int(len(ttfts) * 0.95) - 1], sum(totals), llm_cache.stats.snapshot())
+        pool.close()
+    server.stop()
+
+    print(f"{args.requests} requests over {len(prompts)} distinct prompts, mock TTFT {args.ttft * 1000:.0f} ms")
+    print(f"{'':<9} | {'TTFT p50 ms':>11} | {'TTFT p95 ms':>11} | {'total s':>7} | {'hits':>5} | {'misses':>6}")
+    for name, (p50, p95, total, counts) in results.items():
+        print(
+            f"{name:<9} | {p50 * 1000:>11.2f} | {p95 * 1000:>11.2f} | {total:>7.2f} | "
+            f"{counts['hits']:>5} | {counts['misses']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
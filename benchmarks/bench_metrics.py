@@ -0,0 +1,94 @@
+"""Cost of the metrics layer, disabled and enabled, on a OneDash-style render.
+
+Each render runs the four OneDash queries through ``db`` (members, tasks,
+completed/total, contributions) inside a ``metrics.script_run`` with a page
+mark and two spans, like ``run.py`` does. The off column is the default:
+plain ``sqlite3`` connections and a shared no-op span. The on column opens
+``metrics.TimedConnection`` objects and records every statement, span and
+run. A separate loop prices one ``span`` on its own.
+
+    python benchmarks/bench_metrics.py [--renders 2000]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import db  # noqa: E402
+import metrics  # noqa: E402
+
+TASKS = 40
+MEMBERS = 5
+SPAN_LOOPS = 200_000
+
+
+def seed(path):
+    db.configure(path)
+    db.create_database()
+    for m in range(MEMBERS):
+        db.insert_user_data(f"user{m}", f"user{m}@example.com", "bench")
+    for t in range(TASKS):
+        db.insert_task("bench", f"{t + 1}. Task {t} - expected time: 2 days")
+
+
+def render():
+    with metrics.script_run():
+        metrics.enter_page("OneDash")
+        with metrics.span("onedash.members"):
+            db.get_users_by_project_id("bench")
+            db.get_tasks_by_project_id("bench")
+        with metrics.span("onedash.counts"):
+            db.get_completed_and_total_tasks("bench")
+            db.get_user_contributions("bench")
+
+
+def time_renders(path, enabled, renders):
+    metrics.ENABLED = enabled
+    # Connections pick their class when opened, so start from a fresh pool
+    db.configure(path)
+    render()
+    samples = []
+    for _ in range(renders):
+        start = time.perf_counter()
+        render()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def span_cost(enabled):
+    metrics.ENABLED = enabled
+    start = time.perf_counter()
+    for _ in range(SPAN_LOOPS):
+        with metrics.span("bench"):
+            pass
+    return (time.perf_counter() - start) / SPAN_LOOPS
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--renders", type=int, default=2000)
+    args = parser.parse_args()
+    metrics.JSONL_PATH = metrics.PROM_PATH = None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        seed(path)
+        off = time_renders(path, False, args.renders)
+        on = time_renders(path, True, args.renders)
+        db.get_pool().close()
+
+    print(f"{args.renders} OneDash renders, {MEMBERS} members, {TASKS} tasks")
+    print(f"{'metrics':<7} | {'p50 µs':>7} | {'p95 µs':>7}")
+    for name, samples in (("off", off), ("on", on)):
+        p95 = sorted(samples)[int(len(samples) * 0.95) - 1]
+        print(f"{name:<7} | {statistics.median(samples) * 1e6:>7.1f} | {p95 * 1e6:>7.1f}")
+    print(f"overhead per render: {(statistics.median(on) - statistics.median(off)) * 1e6:.1f} µs")
+    print(f"one span: {span_cost(False) * 1e9:.0f} ns off, {span_cost(True) * 1e9:.0f} ns on")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Per-click latency with precomputed mood pools against the full scan.
+
+Builds the pools for every mood in ``MOOD_AUDIO_RANGES`` over a synthetic
+catalogue (uniform features by default, or clustered around the mood boxes
+with ``--clustered``). It then times top-10 clicks both ways: re-ranking
+the mood's pool the way ``music_catalog.nearest`` does, and
+``music_catalog.top_k`` over every track. The last column counts clicks
+whose pool answer differs from the scan, which should be 0.
+
+    python benchmarks/bench_mood_pools.py [--tracks 100000] [--clustered] [--depth 12]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np  # noqa: E402
+
+import mood_pools  # noqa: E402
+import music_catalog  # noqa: E402
+from music_catalog import MOOD_AUDIO_RANGES, MUSIC_FEATURES, MUSIC_WEIGHTS  # noqa: E402
+
+
+def synthetic_features(rng, tracks, clustered):
+    if not clustered:
+        return rng.random((tracks, len(MUSIC_FEATURES)), dtype=np.float32)
+    centres = np.array(
+        [[(low + high) / 2 for low, high in ranges.values()] for ranges in MOOD_AUDIO_RANGES.values()],
+        dtype=np.float32,
+    )
+    picks = rng.integers(0, len(centres), tracks)
+    return np.clip(centres[picks] + rng.normal(0, 0.15, (tracks, len(MUSIC_FEATURES))), 0, 1).astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=100_000)
+    parser.add_argument("--clicks", type=int, default=200)
+    parser.add_argument("--depth", type=int, default=mood_pools.POOL_MAX_DEPTH)
+    parser.add_argument("--clustered", action="store_true")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(13)
+    features = synthetic_features(rng, args.tracks, args.clustered)
+    weights = music_catalog._profile_vector(MUSIC_WEIGHTS, np.float64)
+
+    print(f"{args.tracks} tracks, pool depth {args.depth}")
+    print(f"{'mood':<10} | {'pool':>6} | {'build s':>7} | {'scan p50 ms':>11} | {'pool p50 ms':>11} | {'mismatches':>10}")
+    for mood, (lo, hi) in music_catalog.mood_boxes().items():
+        start = time.perf_counter()
+        pool = mood_pools.reachable_tracks(features, lo, hi, weights, max_depth=args.depth)
+        pool_features = np.ascontiguousarray(features[pool])
+        build_seconds = time.perf_counter() - start
+
+        scan_times, pool_times, mismatches = [], [], 0
+        for _ in range(args.clicks):
+            profile = {feature: rng.uniform(low, high) for feature, (low, high) in MOOD_AUDIO_RANGES[mood].items()}
+            start = time.perf_counter()
+            expected = music_catalog.top_k(features, profile, 10)
+            scan_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            rows = pool[music_catalog.top_k(pool_features, profile, 10)]
+            pool_times.append(time.perf_counter() - start)
+            mismatches += not np.array_equal(expected, rows)
+        print(
+            f"{mood:<10} | {len(pool):>6} | {build_seconds:>7.2f} | {statistics.median(scan_times) * 1000:>11.3f} | "
+            f"{statistics.median(pool_times) * 1000:>11.3f} | {mismatches:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Oasis catalogue cost: per-rerun CSV parsing versus the prepared catalogue.
+
+Generates a synthetic ``musicdata.csv`` and reports:
+
+* legacy   - ``prepare_music_dataset(pd.read_csv(...))``, as every Oasis rerun used to do
+* build    - first ever load, which parses the CSV and writes the binary cache
+* cold     - a new process loading the existing binary cache
+* warm     - a request served from the process-wide catalogue
+
+    python benchmarks/bench_music.py [--tracks 200000]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import music_catalog  # noqa: E402
+
+
+def write_catalogue(path, tracks, seed=0):
+    """Write a musicdata.csv-shaped file with ``tracks`` random rows."""
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        "Song": [f"Song {i}" for i in range(tracks)],
+        "Performer": [f"Artist {i % 5000}" for i in range(tracks)],
+        "spotify_track_id": [f"https://open.spotify.com/track/{i:022d}" for i in range(tracks)],
+        "danceability": rng.random(tracks).round(3),
+        "energy": rng.random(tracks).round(3),
+        "speechiness": (rng.random(tracks) * 0.4).round(3),
+        "acousticness": rng.random(tracks).round(3),
+        "valence": rng.random(tracks).round(3),
+        "tempo": rng.uniform(60, 200, tracks).round(1),
+    })
+    frame.to_csv(path, index=False)
+
+
+def timed(fn, repeat=1):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=200_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "musicdata.csv")
+        cache_dir = os.path.join(tmp, "cache")
+        write_catalogue(csv_path, args.tracks)
+
+        legacy = timed(lambda: music_catalog.prepare_music_dataset(pd.read_csv(csv_path)), repeat=3)
+        build = timed(lambda: music_catalog.get_catalog(csv_path, cache_dir))
+        music_catalog._catalogs.clear()
+        cold = timed(lambda: music_catalog.get_catalog(csv_path, cache_dir))
+        warm = timed(lambda: music_catalog.get_catalog(csv_path, cache_dir), repeat=100)
+
+        print(f"{args.tracks} tracks")
+        for name, value in (("legacy per rerun", legacy), ("build", build), ("cold", cold), ("warm", warm)):
+            print(f"{name:<17} {value:>10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Recall and latency of the KD-tree index against the exact linear scan.
+
+Builds ``music_index.KDTree`` over a synthetic catalogue (uniform features by
+default, or clustered around the mood boxes with ``--clustered``). Top-10
+queries are sampled from ``MOOD_AUDIO_RANGES``. The exact row is
+``music_catalog.top_k``. The other rows cap how many leaves a query may scan
+(``all`` is the exact tree search). Recall is the fraction of the exact top
+10 that each setting returns.
+
+    python benchmarks/bench_music_index.py [--tracks 1000000] [--clustered]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np  # noqa: E402
+
+import music_catalog  # noqa: E402
+import music_index  # noqa: E402
+from music_catalog import MOOD_AUDIO_RANGES, MUSIC_FEATURES, MUSIC_WEIGHTS  # noqa: E402
+
+
+def synthetic_features(rng, tracks, clustered):
+    if not clustered:
+        return rng.random((tracks, len(MUSIC_FEATURES)), dtype=np.float32)
+    centres = np.array(
+        [[(low + high) / 2 for low, high in ranges.values()] for ranges in MOOD_AUDIO_RANGES.values()],
+        dtype=np.float32,
+    )
+    picks = rng.integers(0, len(centres), tracks)
+    return np.clip(centres[picks] + rng.normal(0, 0.15, (tracks, len(MUSIC_FEATURES))), 0, 1).astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=60)
+    parser.add_argument("--clustered", action="store_true")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(11)
+    features = synthetic_features(rng, args.tracks, args.clustered)
+    weights = music_catalog._profile_vector(MUSIC_WEIGHTS, np.float32)
+    moods = list(MOOD_AUDIO_RANGES)
+    profiles = [
+        {feature: rng.uniform(low, high) for feature, (low, high) in MOOD_AUDIO_RANGES[moods[q % len(moods)]].items()}
+        for q in range(args.queries)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        tree = music_index.load_or_build(features, weights, tmp)
+        build_seconds = time.perf_counter() - start
+
+        exact, exact_times = [], []
+        for profile in profiles:
+            start = time.perf_counter()
+            exact.append(set(music_catalog.top_k(features, profile, 10).tolist()))
+            exact_times.append(time.perf_counter() - start)
+
+        print(f"{args.tracks} tracks, tree built and saved in {build_seconds:.2f}s")
+        print(f"{'max leaves':>10} | {'p50 ms':>8} | {'recall@10':>9}")
+        print(f"{'scan':>10} | {statistics.median(exact_times) * 1000:>8.3f} | {1.0:>9.3f}")
+        for max_leaves in (1, 2, 4, 8, 16, 32, 64, None):
+            times, hits = [], 0
+            for profile, truth in zip(profiles, exact):
+                start = time.perf_counter()
+                target = music_catalog._profile_vector(profile, np.float32)
+                candidates = tree.query(target, 10 + music_catalog.TOP_K_MARGIN, max_leaves=max_leaves)
+                rows = music_catalog.rerank(features, candidates, profile, 10)
+                times.append(time.perf_counter() - start)
+                hits += len(truth & set(rows.tolist()))
+            label = "all" if max_leaves is None else str(max_leaves)
+            print(f"{label:>10} | {statistics.median(times) * 1000:>8.3f} | {hits / (10 * len(profiles)):>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Oasis page-complete latency, blocking on the mood summary vs fetching it in the background.
+
+Replays ``--clicks`` random mood clicks against a synthetic catalogue. The
+summaries come from a local mock of the OpenAI-compatible API
+(``mock_openai.py``). In blocking mode the page submits the summary,
+computes the recommendations and then waits for ``summary.result()``, as
+the Oasis page used to. In background mode the page computes the
+recommendations and takes the summary future from
+``llm_cache.ResultCache``, like the Oasis page does now. The summary is
+then shown by a polling fragment. Both modes run with the response cache
+on and with it bypassed (the "Fresh response" checkbox). The summary
+column is the time until the mood vector is available in either mode.
+
+    python benchmarks/bench_oasis.py [--clicks 60] [--ttft 0.3] [--tracks 100000]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import db  # noqa: E402
+import llm_cache  # noqa: E402
+import music_catalog  # noqa: E402
+from bench_music import write_catalogue  # noqa: E402
+from llm_async import AsyncGroqProvider, collect, submit  # noqa: E402
+from mock_openai import MockOpenAIServer  # noqa: E402
+
+MOODS = tuple(music_catalog.MOOD_AUDIO_RANGES)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(0, int(len(ordered) * fraction) - 1)]
+
+
+def summary_factory(provider, mood, use_cache):
+    messages = [{"role": "user", "content": f"I am feeling {mood}. List six normalised audio features."}]
+    return lambda: submit(collect(llm_cache.cached_stream(
+        lambda: provider.stream_chat(messages, "key", "mock", 0.5), "groq", "mock", 0.5, messages, use_cache
+    )))
+
+
+def blocking_click(catalog, provider, mood, use_cache, summaries):
+    start = time.perf_counter()
+    summary = summary_factory(provider, mood, use_cache)()
+    music_catalog.recommend(catalog, music_catalog.sample_mood_audio_profile(mood), 10, mood=mood)
+    summary.result()
+    page = time.perf_counter() - start
+    return page, page
+
+
+def background_click(catalog, provider, mood, use_cache, summaries):
+    start = time.perf_counter()
+    music_catalog.recommend(catalog, music_catalog.sample_mood_audio_profile(mood), 10, mood=mood)
+    summary = summaries.get_or_submit(("groq", "mock", mood), summary_factory(provider, mood, use_cache), refresh=not use_cache)
+    page = time.perf_counter() - start
+    summary.result()
+    return page, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clicks", type=int, default=60)
+    parser.add_argument("--tracks", type=int, default=100_000)
+    parser.add_argument("--ttft", type=float, default=0.3)
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    clicks = [rng.choice(MOODS) for _ in range(args.clicks)]
+    server = MockOpenAIServer(ttft=args.ttft, tokens=60, tokens_per_second=args.tokens_per_second).start()
+    provider = AsyncGroqProvider(url=server.url)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "musicdata.csv")
+        write_catalogue(csv_path, args.tracks)
+        catalog = music_catalog.get_catalog(csv_path, os.path.join(tmp, "cache"))
+        for mood in MOODS:
+            catalog.mood_pool(mood)
+        for use_cache in (True, False):
+            for name, click in (("blocking", blocking_click), ("background", background_click)):
+                pool = db.configure(os.path.join(tmp, f"{name}-{use_cache}.db"))
+                db.create_database()
+                summaries = llm_cache.ResultCache()
+                pages, ready = [], []
+                for mood in clicks:
+                    page, summary = click(catalog, provider, mood, use_cache, summaries)
+                    pages.append(page)
+                    ready.append(summary)
+                results[(name, "on" if use_cache else "bypassed")] = (pages, ready)
+                pool.close()
+    server.stop()
+
+    print(f"{args.clicks} clicks over {len(MOODS)} moods, {args.tracks} tracks, mock TTFT {args.ttft * 1000:.0f} ms")
+    print(f"{'page':<10} | {'cache':<8} | {'page p50 ms':>11} | {'page p95 ms':>11} | {'summary p50 ms':>14} | {'summary p95 ms':>14}")
+    for (name, cache), (pages, ready) in results.items():
+        print(
+            f"{name:<10} | {cache:<8} | {statistics.median(pages) * 1000:>11.1f} | {percentile(pages, 0.95) * 1000:>11.1f} | "
+            f"{statistics.median(ready) * 1000:>14.1f} | {percentile(ready, 0.95) * 1000:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
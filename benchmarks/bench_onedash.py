@@ -0,0 +1,147 @@
+"""OneDash query latency at 1, 10 and 50 concurrent sessions.
+
+Each simulated session repeatedly runs the four queries a OneDash render
+issues (members, tasks, completed/total, contributions) and ticks a task now
+and then. The legacy column opens a fresh ``sqlite3.connect`` per query, as
+run.py used to; the pooled column goes through ``db``. Both run against the
+same WAL-mode file, so the gap is connection reuse and pragmas alone. The
+snapshot column renders from ``db.get_project_snapshot``, which serves
+unchanged projects from its cache.
+
+    python benchmarks/bench_onedash.py [--renders 40]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import db  # noqa: E402
+
+PROJECTS = 50
+TASKS_PER_PROJECT = 40
+MEMBERS_PER_PROJECT = 5
+WRITE_EVERY = 10
+# Progress and chart queries as run.py issued them
+TASK_COUNTS_SQL = '''SELECT SUM(completed), COUNT(*) FROM tasks WHERE project_id = ?'''
+CONTRIBUTIONS_SQL = '''SELECT completed_by, COUNT(*) FROM tasks WHERE project_id = ? AND completed = 1 GROUP BY completed_by'''
+
+
+def seed(path):
+    db.configure(path)
+    db.create_database()
+    for p in range(PROJECTS):
+        project_id = f"project-{p}"
+        for m in range(MEMBERS_PER_PROJECT):
+            db.insert_user_data(f"user{m}", f"user{m}@example.com", project_id)
+        for t in range(TASKS_PER_PROJECT):
+            db.insert_task(project_id, f"{t + 1}. Task {t} - expected time: 2 days")
+
+
+def legacy_query(path, sql, params, write=False):
+    conn = sqlite3.connect(path)
+    c = conn.cursor()
+    c.execute(sql, params)
+    rows = None if write else c.fetchall()
+    if write:
+        conn.commit()
+    conn.close()
+    return rows
+
+
+def legacy_render(path, project_id):
+    legacy_query(path, "SELECT * FROM users WHERE project_id = ?", (project_id,))
+    legacy_query(path, "SELECT * FROM tasks WHERE project_id = ?", (project_id,))
+    legacy_query(path, TASK_COUNTS_SQL, (project_id,))
+    legacy_query(path, CONTRIBUTIONS_SQL, (project_id,))
+
+
+def legacy_tick(path, task_id):
+    legacy_query(path, db.COMPLETE_TASK_SQL, ("bench", task_id), write=True)
+
+
+def pooled_render(path, project_id):
+    db.get_users_by_project_id(project_id)
+    db.get_tasks_by_project_id(project_id)
+    db.get_completed_and_total_tasks(project_id)
+    db.get_user_contributions(project_id)
+
+
+def snapshot_render(path, project_id):
+    db.get_project_snapshot(project_id)
+
+
+def pooled_tick(path, task_id):
+    db.mark_task_as_completed(task_id, "bench")
+
+
+def run(path, sessions, renders, render, tick):
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    total_tasks = PROJECTS * TASKS_PER_PROJECT
+
+    def session(seed_value):
+        rng = random.Random(seed_value)
+        local = []
+        for i in range(renders):
+            start = time.perf_counter()
+            try:
+                render(path, f"project-{rng.randrange(PROJECTS)}")
+                if i % WRITE_EVERY == 0:
+                    tick(path, rng.randrange(1, total_tasks + 1))
+            except sqlite3.OperationalError as exc:
+                errors.append(str(exc))
+                continue
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=session, args=(s,)) for s in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors
+
+
+def summarise(latencies):
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies) * 1000
+    p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+    return p50, p95
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--renders", type=int, default=40, help="renders per session")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        seed(path)
+        modes = {
+            "legacy": (legacy_render, legacy_tick),
+            "pooled": (pooled_render, pooled_tick),
+            "snapshot": (snapshot_render, pooled_tick),
+        }
+        print(f"{'sessions':>8} | " + " | ".join(f"{mode + ' p50/p95 ms':>22}" for mode in modes) + " | errors")
+        for sessions in (1, 10, 50):
+            cells = []
+            errors = []
+            for render, tick in modes.values():
+                latencies, mode_errors = run(path, sessions, args.renders, render, tick)
+                cells.append(f"{'%.2f / %.2f' % summarise(latencies):>22}")
+                errors.append(str(len(mode_errors)))
+            print(f"{sessions:>8} | " + " | ".join(cells) + " | " + "/".join(errors))
+        db.get_pool().close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Rerun time for ticking one task on a large OneDash project.
+
+Seeds a project with ``--tasks`` tasks and five members, then ticks
+``--ticks`` tasks one at a time in a Streamlit ``AppTest`` session and
+times each rerun. There are three columns:
+
+- legacy renders the OneDash page as run.py used to. Every tick reruns the
+  whole script, including the member list, the pie chart and a checkbox and
+  button for every task.
+- page is a full rerun of the current run.py OneDash page, which renders
+  one page of tasks.
+- fragment reruns only ``run.task_board``, which is what a tick costs in
+  the browser. ``AppTest`` always reruns the whole script, so this column
+  runs a script holding nothing but the fragment.
+
+    python benchmarks/bench_onedash_board.py [--tasks 2000] [--ticks 10]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, ROOT)
+
+import db  # noqa: E402
+
+PROJECT = "bench"
+MEMBERS = 5
+
+LEGACY = f"""
+import sys
+sys.path.insert(0, {ROOT!r})
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+from db import delete_task, get_project_snapshot, mark_task_as_completed
+
+project_id, username = st.session_state.project_id, st.session_state.username
+snapshot = get_project_snapshot(project_id)
+for user in snapshot.members:
+    st.sidebar.markdown(f"Username: {{user.username}}")
+    st.sidebar.markdown(f"Email: {{user.email}}")
+completed, total = snapshot.completed, snapshot.total
+st.subheader("Progress Report")
+st.write(f"Completed Tasks: {{completed}} / {{total}}")
+st.progress(int((completed / total) * 100), "Progress of Project Completion")
+df = pd.DataFrame(snapshot.contributions, columns=["User", "Completed Tasks"])
+fig = px.pie(df, names="User", values="Completed Tasks", title="User Contributions")
+fig.update_traces(textposition='inside', textinfo='percent+label', textfont_color='white')
+st.plotly_chart(fig)
+st.subheader("Tasks from WorkPod AI as To-Dos:")
+for task_id, _, task_description, completed, completed_by in snapshot.tasks:
+    st.write(f":blue[{{task_description.strip()}}]")
+    if not completed:
+        if st.checkbox("Completed", key=f"completed_{{task_id}}"):
+            mark_task_as_completed(task_id, username)
+    else:
+        st.markdown(f":green[Task completed by:] {{completed_by}}")
+    if st.button("Delete", key=f"delete_{{task_id}}"):
+        delete_task(task_id)
+"""
+
+FRAGMENT = f"""
+import sys
+sys.path.insert(0, {ROOT!r})
+import streamlit as st
+import run
+
+run.task_board(st.session_state.project_id, st.session_state.username)
+"""
+
+
+def seed(path, tasks):
+    # The app scripts run in this process and share the configured pool
+    db.configure(path)
+    db.create_database()
+    for m in range(MEMBERS):
+        db.insert_user_data(f"user{m}", f"user{m}@example.com", PROJECT)
+    db.insert_tasks(PROJECT, [f"{t + 1}. Task {t} - expected time: 2 days" for t in range(tasks)])
+    db.get_pool().close()
+
+
+def tick_times(at, ticks):
+    at.session_state["project_id"] = PROJECT
+    at.session_state["username"] = "user0"
+    at.run()
+    times = []
+    for _ in range(ticks):
+        box = next(box for box in at.checkbox if box.key and box.key.startswith("completed_") and not box.value)
+        box.check()
+        start = time.perf_counter()
+        at.run()
+        times.append(time.perf_counter() - start)
+        assert not at.exception, at.exception
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--ticks", type=int, default=10)
+    args = parser.parse_args()
+
+    from streamlit.testing.v1 import AppTest
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(ROOT)
+        for name in ("legacy", "page", "fragment"):
+            seed(os.path.join(tmp, f"{name}.db"), args.tasks)
+            if name == "legacy":
+                at = AppTest.from_string(LEGACY, default_timeout=300)
+            elif name == "page":
+                at = AppTest.from_file(os.path.join(ROOT, "run.py"), default_timeout=300)
+                at.run()
+                at.sidebar.radio[0].set_value("OneDash")
+            else:
+                at = AppTest.from_string(FRAGMENT, default_timeout=300)
+            results[name] = tick_times(at, args.ticks)
+            db.get_pool().close()
+
+    print(f"One tick on a {args.tasks}-task project, {args.ticks} ticks")
+    print(f"{'rerun':<8} | {'p50 ms':>7} | {'max ms':>7}")
+    for name, times in results.items():
+        print(f"{name:<8} | {statistics.median(times) * 1000:>7.1f} | {max(times) * 1000:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Dashboard counters from project_stats vs aggregating the tasks table, and what the triggers cost.
+
+Seeds ``--projects`` projects with ``--tasks`` tasks each, about 40%
+completed by five members. The read table times, per call:
+
+- the old SUM/COUNT and GROUP BY queries over the project's task rows;
+- ``get_completed_and_total_tasks`` and ``get_user_contributions``, which now
+  read one row of ``project_stats`` and the project's contributor rows;
+- ``get_burndown`` per day, which sums the project's rows in the hourly
+  activity rollup.
+
+The write table times the same writes on two databases: one with the
+migration 8 triggers that keep the counters, activity log and rollup
+current, and one with the task triggers dropped.
+
+    python benchmarks/bench_project_stats.py [--tasks 10000] [--projects 20]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import db  # noqa: E402
+
+PROJECT = "project-0"
+MEMBERS = 5
+TRIGGERS = ("tasks_activity_insert", "tasks_activity_update", "tasks_activity_delete")
+# Aggregates OneDash ran over the tasks table before migration 8 added the counter tables
+TASK_COUNTS_SQL = '''SELECT SUM(completed), COUNT(*) FROM tasks WHERE project_id = ?'''
+CONTRIBUTIONS_SQL = '''SELECT completed_by, COUNT(*) FROM tasks WHERE project_id = ? AND completed = 1 GROUP BY completed_by'''
+
+
+def seed(path, tasks, projects, rng, triggers=True):
+    pool = db.configure(path)
+    db.create_database()
+    if not triggers:
+        with pool.connection() as conn:
+            for name in TRIGGERS:
+                conn.execute(f"DROP TRIGGER {name}")
+    for p in range(projects):
+        project_id = f"project-{p}"
+        db.insert_tasks(project_id, [f"{t + 1}. Task {t} - expected time: 2 days" for t in range(tasks)])
+        ids = [task.id for task in db.get_tasks_by_project_id(project_id, ("id",))]
+        with pool.transaction(write=True) as conn:
+            conn.executemany(
+                db.COMPLETE_TASK_SQL, ((f"user{rng.randrange(MEMBERS)}", i) for i in ids if rng.random() < 0.4)
+            )
+    return pool
+
+
+def per_call(function, loops):
+    function()
+    samples = []
+    for _ in range(loops):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def legacy(pool, sql):
+    with pool.connection() as conn:
+        return conn.execute(sql, (PROJECT,)).fetchall()
+
+
+def write_costs(path, args, triggers):
+    pool = seed(path, args.tasks, args.projects, random.Random(1), triggers)
+    descriptions = [f"{t + 1}. New task {t}" for t in range(args.batch)]
+    start = time.perf_counter()
+    db.insert_tasks("bulk", descriptions)
+    bulk = time.perf_counter() - start
+    ids = iter([task.id for task in db.get_tasks_by_project_id(PROJECT, ("id", "completed")) if not task.completed])
+    complete = per_call(lambda: db.mark_task_as_completed(next(ids), "user0"), args.loops)
+    insert = per_call(lambda: db.insert_task(PROJECT, "One more task"), args.loops)
+    pool.close()
+    return bulk, complete, insert
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=10_000)
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--loops", type=int, default=500)
+    parser.add_argument("--batch", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = seed(os.path.join(tmp, "reads.db"), args.tasks, args.projects, random.Random(1))
+        reads = {
+            "SUM/COUNT over tasks": per_call(lambda: legacy(pool, TASK_COUNTS_SQL), args.loops),
+            "project_stats": per_call(lambda: db.get_completed_and_total_tasks(PROJECT), args.loops),
+            "GROUP BY completed_by": per_call(lambda: legacy(pool, CONTRIBUTIONS_SQL), args.loops),
+            "project_contributions": per_call(lambda: db.get_user_contributions(PROJECT), args.loops),
+            "get_burndown, per day": per_call(lambda: db.get_burndown(PROJECT), args.loops),
+        }
+        pool.close()
+        with_triggers = write_costs(os.path.join(tmp, "triggers.db"), args, True)
+        without = write_costs(os.path.join(tmp, "plain.db"), args, False)
+
+    print(f"Reads on a {args.tasks}-task project, {args.projects} projects in the database")
+    print(f"{'read':<24} | {'p50 µs':>8}")
+    for name, seconds in reads.items():
+        print(f"{name:<24} | {seconds * 1e6:>8.1f}")
+    print(f"\n{'write':<28} | {'triggers':>9} | {'none':>9}")
+    labels = (f"insert_tasks, {args.batch} rows ms", "mark_task_as_completed µs", "insert_task µs")
+    scales = (1e3, 1e6, 1e6)
+    for label, scale, on, off in zip(labels, scales, with_triggers, without):
+        print(f"{label:<28} | {on * scale:>9.1f} | {off * scale:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
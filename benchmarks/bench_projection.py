@@ -0,0 +1,84 @@
+"""Peak Python memory per request with and without column projection.
+
+Members are seeded with full-size legacy ``users.image`` BLOBs, as in a
+database that has not been backfilled yet, so ``SELECT *`` drags them in.
+Each row reports the tracemalloc peak for one Login/Registration
+existence check and for one member listing.
+
+    python benchmarks/bench_projection.py [--members 50] [--image-kb 2048]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import db  # noqa: E402
+
+
+def legacy(path, sql, params):
+    conn = sqlite3.connect(path)
+    rows = conn.execute(sql, params).fetchall()
+    conn.close()
+    return rows
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--members", type=int, default=50)
+    parser.add_argument("--image-kb", type=int, default=2048)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        pool = db.configure(path)
+        db.create_database()
+        with pool.transaction(write=True) as conn:
+            conn.executemany(
+                "INSERT INTO users (username, email, project_id, image) VALUES (?, ?, ?, ?)",
+                (
+                    (f"user{i}", f"user{i}@example.com", "project", os.urandom(args.image_kb * 1024))
+                    for i in range(args.members)
+                ),
+            )
+        # Warm the pool so connection setup is not counted
+        db.get_users_by_project_id("project")
+
+        cases = {
+            "login check": (
+                lambda: legacy(path, "SELECT * FROM users WHERE project_id = ? AND username = ?", ("project", "user7")),
+                lambda: db.get_user_by_project_id_and_username("project", "user7", columns=("id",)),
+            ),
+            "member list": (
+                lambda: legacy(path, "SELECT * FROM users WHERE project_id = ?", ("project",)),
+                lambda: db.get_users_by_project_id("project"),
+            ),
+        }
+        print(f"{args.members} members with {args.image_kb} KB legacy images")
+        print(f"{'request':<14} | {'SELECT * peak KB':>16} | {'projected peak KB':>17} | {'SELECT * ms':>11} | {'projected ms':>12}")
+        for name, (old, new) in cases.items():
+            old_peak, old_time = measure(old)
+            new_peak, new_time = measure(new)
+            print(
+                f"{name:<14} | {old_peak / 1024:>16.1f} | {new_peak / 1024:>17.1f} | "
+                f"{old_time * 1000:>11.2f} | {new_time * 1000:>12.2f}"
+            )
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""A burst of Arctic chats and Oasis summaries on one shared Groq key, with and without the limiter.
+
+``--sessions`` sessions each send ``--chats`` Arctic chat requests and
+``--summaries`` Oasis summaries at the same moment. They go to a local
+mock of the OpenAI-compatible API (``mock_openai.py``) that enforces a
+quota of ``--rpm`` requests per minute with a burst of ``--burst``. Without
+the limiter, every request goes straight out. Requests that get a 429 use
+the client's retry policy, and a request fails once its retries are used
+up. With the limiter, requests take a ``rate_limit.Ticket`` and queue for
+``--headroom`` of the same quota instead; the margin absorbs the gap
+between when the limiter grants a request and when it reaches the API. Latencies are from the burst to the last token.
+
+    python benchmarks/bench_rate_limit.py [--sessions 20] [--rpm 600] [--burst 10]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx  # noqa: E402
+
+from llm_async import AsyncGroqProvider, submit  # noqa: E402
+from mock_openai import MockOpenAIServer  # noqa: E402
+from rate_limit import PRIORITY_CHAT, PRIORITY_SUMMARY, QueueFull, get_limiter  # noqa: E402
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(0, int(len(ordered) * fraction) - 1)] if ordered else float("nan")
+
+
+async def one_request(provider, api_key, session, priority, limited, start):
+    ticket = get_limiter(api_key).ticket(session, priority) if limited else None
+    messages = [{"role": "user", "content": f"Request from {session}"}]
+    try:
+        async for _ in provider.stream_chat(messages, api_key, "mock", 0.5, ticket=ticket):
+            pass
+    except (httpx.HTTPError, QueueFull):
+        return priority, None
+    return priority, time.perf_counter() - start
+
+
+async def burst(provider, api_key, args, limited):
+    start = time.perf_counter()
+    jobs = []
+    for session in range(args.sessions):
+        jobs += [one_request(provider, api_key, f"s{session}", PRIORITY_CHAT, limited, start) for _ in range(args.chats)]
+        jobs += [one_request(provider, api_key, f"s{session}", PRIORITY_SUMMARY, limited, start) for _ in range(args.summaries)]
+    return await asyncio.gather(*jobs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--chats", type=int, default=1)
+    parser.add_argument("--summaries", type=int, default=2)
+    parser.add_argument("--rpm", type=float, default=600.0)
+    parser.add_argument("--burst", type=float, default=10.0)
+    parser.add_argument("--headroom", type=float, default=0.9, help="share of the quota the limiter hands out")
+    args = parser.parse_args()
+
+    total = args.sessions * (args.chats + args.summaries)
+    print(f"{total} requests from {args.sessions} sessions, quota {args.rpm:.0f}/min with a burst of {args.burst:.0f}")
+    print(f"{'limiter':<7} | {'ok':>4} | {'failed':>6} | {'429s':>5} | {'chat p50 s':>10} | {'chat p95 s':>10} | {'summary p50 s':>13} | {'summary p95 s':>13}")
+    for limited in (False, True):
+        server = MockOpenAIServer(ttft=0.05, tokens=20, tokens_per_second=400, rpm=args.rpm, burst=args.burst).start()
+        provider = AsyncGroqProvider(url=server.url)
+        api_key = f"bench-{limited}"
+        limiter = get_limiter(api_key, rpm=args.rpm * args.headroom, tpm=1e9, burst=args.burst / args.rpm)
+        results = submit(burst(provider, api_key, args, limited)).result()
+        submit(provider.aclose()).result()
+        server.stop()
+
+        chats = [latency for priority, latency in results if priority == PRIORITY_CHAT and latency is not None]
+        summaries = [latency for priority, latency in results if priority == PRIORITY_SUMMARY and latency is not None]
+        failed = sum(latency is None for _, latency in results)
+        print(
+            f"{'on' if limited else 'off':<7} | {len(results) - failed:>4} | {failed:>6} | {server.throttled:>5} | "
+            f"{statistics.median(chats) if chats else float('nan'):>10.2f} | {percentile(chats, 0.95):>10.2f} | "
+            f"{statistics.median(summaries) if summaries else float('nan'):>13.2f} | {percentile(summaries, 0.95):>13.2f}"
+        )
+        if limited:
+            counts = limiter.snapshot()
+            print(
+                f"limiter: {counts['granted']} granted, {counts['rejected']} rejected, {counts['throttled']} throttled, "
+                f"queue wait p50 {counts['wait_p50']:.2f} s, p95 {counts['wait_p95']:.2f} s, max {counts['wait_max']:.2f} s"
+            )
+
+
+if __name__ == "__main__":
+    main()
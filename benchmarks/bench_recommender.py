@@ -0,0 +1,83 @@
+"""Top-10 recommendation latency: pandas full sort versus the NumPy top-k path.
+
+For each catalogue size the legacy column runs the old DataFrame recommender
+(weighted ``.abs()``, ``.sum(axis=1)``, ``sort_values``, ``make_clickable`` on
+every row). It sorts stably so that ties resolve by row, as in ``top_k``.
+The top-k column runs ``music_catalog.top_k`` plus formatting of the
+returned rows. Every query checks that both return the same tracks in the
+same order. Legacy runs are skipped above ``--legacy-max`` tracks.
+
+    python benchmarks/bench_recommender.py [--sizes 10000 100000 1000000 5000000]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import music_catalog  # noqa: E402
+from music_catalog import MOOD_AUDIO_RANGES, MUSIC_FEATURES, MUSIC_WEIGHTS  # noqa: E402
+
+
+def legacy_recommendations(df, profile, amount):
+    target = pd.Series(profile, dtype=float)
+    weights = pd.Series(MUSIC_WEIGHTS)
+    distances = ((df[MUSIC_FEATURES] - target[MUSIC_FEATURES]).abs() * weights[MUSIC_FEATURES]).sum(axis=1)
+    res = df.assign(distance=distances).sort_values("distance", kind="stable")
+    res["spotify_track_id"] = res["spotify_track_id"].apply(music_catalog.make_clickable)
+    return res[["Song", "Performer", "spotify_track_id"]][:amount]
+
+
+def topk_recommendations(features, track_ids, profile, amount):
+    rows = music_catalog.top_k(features, profile, amount)
+    return rows, [music_catalog.make_clickable(track_ids[row]) for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000, 5_000_000])
+    parser.add_argument("--queries", type=int, default=10)
+    parser.add_argument("--legacy-max", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(3)
+    moods = list(MOOD_AUDIO_RANGES)
+    print(f"{'tracks':>10} | {'legacy ms':>10} | {'top-k ms':>9} | {'speedup':>7} | same ranking")
+    for size in args.sizes:
+        features = rng.random((size, len(MUSIC_FEATURES)), dtype=np.float32)
+        track_ids = [f"track-{i}" for i in range(size)]
+        df = None
+        if size <= args.legacy_max:
+            df = pd.DataFrame(features.astype(np.float64), columns=MUSIC_FEATURES)
+            df["Song"] = track_ids
+            df["Performer"] = track_ids
+            df["spotify_track_id"] = track_ids
+
+        legacy_times, topk_times, same = [], [], True
+        for q in range(args.queries):
+            mood = moods[q % len(moods)]
+            profile = {feature: rng.uniform(low, high) for feature, (low, high) in MOOD_AUDIO_RANGES[mood].items()}
+            start = time.perf_counter()
+            rows, _ = topk_recommendations(features, track_ids, profile, 10)
+            topk_times.append(time.perf_counter() - start)
+            if df is not None:
+                start = time.perf_counter()
+                legacy = legacy_recommendations(df, profile, 10)
+                legacy_times.append(time.perf_counter() - start)
+                same = same and list(legacy.index) == list(rows)
+
+        topk_ms = statistics.median(topk_times) * 1000
+        if legacy_times:
+            legacy_ms = statistics.median(legacy_times) * 1000
+            print(f"{size:>10} | {legacy_ms:>10.2f} | {topk_ms:>9.2f} | {legacy_ms / topk_ms:>6.1f}x | {same}")
+        else:
+            print(f"{size:>10} | {'skipped':>10} | {topk_ms:>9.2f} | {'':>7} | n/a")
+
+
+if __name__ == "__main__":
+    main()
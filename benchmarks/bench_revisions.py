@@ -0,0 +1,170 @@
+"""Cost of checking OneDash data for changes: full re-reads vs revision polling.
+
+Part one times single calls on a project with ``--tasks`` tasks:
+
+- a full snapshot read, which is what every rerun cost when the cache could
+  not be trusted;
+- ``get_project_snapshot`` on an unchanged project, where the revision check
+  lets the cached snapshot be reused;
+- ``get_project_revision``, which is what an auto-refresh poll costs.
+
+Part two runs collaborators. A separate process completes one task every
+``--write-interval`` seconds. Meanwhile ``--sessions`` threads here poll
+every ``--poll`` seconds, the way OneDash auto-refresh does. The naive
+column re-reads the whole project on every poll. The revision column polls
+the revision and re-reads when it moves; sessions share the re-read
+through the snapshot cache. Full reads count trips to the tasks table.
+The writer stamps ``completed_by`` with its commit time, so a reader can
+report how long a completion took to show up.
+
+    python benchmarks/bench_revisions.py [--tasks 2000] [--sessions 8] [--seconds 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import db  # noqa: E402
+
+PROJECT = "bench"
+MEMBERS = 5
+
+WRITER = """
+import sys, time
+sys.path.insert(0, sys.argv[1])
+import db
+db.configure(sys.argv[2])
+interval, count = float(sys.argv[3]), int(sys.argv[4])
+ids = [task.id for task in db.get_tasks_by_project_id(sys.argv[5], ("id",))]
+for task_id in ids[:count]:
+    time.sleep(interval)
+    db.mark_task_as_completed(task_id, repr(time.time()))
+"""
+
+
+def seed(path, tasks):
+    db.configure(path)
+    db.create_database()
+    for m in range(MEMBERS):
+        db.insert_user_data(f"user{m}", f"user{m}@example.com", PROJECT)
+    db.insert_tasks(PROJECT, [f"{t + 1}. Task {t} - expected time: 2 days" for t in range(tasks)])
+
+
+def full_read():
+    db._snapshots.clear()
+    return db.get_project_snapshot(PROJECT)
+
+
+def per_call(function, loops):
+    function()
+    start = time.perf_counter()
+    for _ in range(loops):
+        function()
+    return (time.perf_counter() - start) / loops
+
+
+def latest_completion(snapshot):
+    return max((float(task.completed_by) for task in snapshot.tasks if task.completed_by), default=None)
+
+
+def collaborate(path, args, naive):
+    seed(path, args.tasks)
+    stop = threading.Event()
+    stats = {"polls": 0, "reads": 0, "poll_seconds": 0.0, "lags": []}
+    lock = threading.Lock()
+    put = db._snapshots.put
+
+    def counting_put(project_id, snapshot):
+        # Called once per snapshot actually read from the database
+        with lock:
+            stats["reads"] += 1
+        put(project_id, snapshot)
+
+    db._snapshots.put = counting_put
+
+    def session():
+        seen_revision = None
+        seen_completion = None
+        while not stop.is_set():
+            start = time.perf_counter()
+            if naive:
+                snapshot = full_read()
+            else:
+                revision = db.get_project_revision(PROJECT)
+                snapshot = None
+                if revision != seen_revision:
+                    snapshot = db.get_project_snapshot(PROJECT)
+                    seen_revision = snapshot.revision
+            elapsed = time.perf_counter() - start
+            lag = None
+            if snapshot is not None:
+                completion = latest_completion(snapshot)
+                if completion is not None and completion != seen_completion:
+                    seen_completion = completion
+                    lag = time.time() - completion
+            with lock:
+                stats["polls"] += 1
+                stats["poll_seconds"] += elapsed
+                if lag is not None:
+                    stats["lags"].append(lag)
+            stop.wait(args.poll)
+
+    threads = [threading.Thread(target=session) for _ in range(args.sessions)]
+    for thread in threads:
+        thread.start()
+    count = int(args.seconds / args.write_interval)
+    subprocess.run(
+        [sys.executable, "-c", WRITER, ROOT, path, str(args.write_interval), str(count), PROJECT], check=True
+    )
+    stop.set()
+    for thread in threads:
+        thread.join()
+    db._snapshots.put = put
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--loops", type=int, default=2000)
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--poll", type=float, default=0.05)
+    parser.add_argument("--write-interval", type=float, default=0.25)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        seed(os.path.join(tmp, "calls.db"), args.tasks)
+        full = per_call(full_read, max(1, args.loops // 20))
+        cached = per_call(lambda: db.get_project_snapshot(PROJECT), args.loops)
+        poll = per_call(lambda: db.get_project_revision(PROJECT), args.loops)
+        print(f"One call on a {args.tasks}-task project")
+        print(f"  full snapshot read      {full * 1e6:>9.1f} µs")
+        print(f"  unchanged, cached       {cached * 1e6:>9.1f} µs")
+        print(f"  revision poll           {poll * 1e6:>9.1f} µs")
+
+        print(
+            f"\n{args.sessions} sessions polling every {args.poll * 1000:.0f} ms for {args.seconds:.0f} s, "
+            f"another process completing a task every {args.write_interval * 1000:.0f} ms"
+        )
+        print(f"{'polling':<8} | {'polls':>6} | {'full reads':>10} | {'ms/poll':>7} | {'lag p50 ms':>10} | {'lag max ms':>10}")
+        for name, naive in (("naive", True), ("revision", False)):
+            stats = collaborate(os.path.join(tmp, f"{name}.db"), args, naive)
+            lags = stats["lags"] or [0.0]
+            print(
+                f"{name:<8} | {stats['polls']:>6} | {stats['reads']:>10} | "
+                f"{stats['poll_seconds'] / stats['polls'] * 1000:>7.2f} | {statistics.median(lags) * 1000:>10.0f} | "
+                f"{max(lags) * 1000:>10.0f}"
+            )
+        db.get_pool().close()
+
+
+if __name__ == "__main__":
+    main()
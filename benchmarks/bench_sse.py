@@ -0,0 +1,139 @@
+"""CPU time per 1k streamed tokens: line-by-line JSON parsing vs the byte-level SSE decoder.
+
+Replays Groq-shaped chat-completion streams built from the recorded task
+breakdowns in ``bench_task_stream.py``. Each event carries the id,
+model, system_fingerprint, logprobs, finish_reason and x_groq fields Groq
+sends. An ``httpx.MockTransport`` serves the body the way a socket hands
+it over: one event per read (``--coalesce 1``) or several events per
+read. The legacy column reads the response with ``aiter_lines()`` and
+parses every line with ``json.loads``, as the stream loop used to. The
+decoder column runs ``llm_async.AsyncGroqProvider.stream_chat`` itself,
+so it includes the provider's request setup as well as its decode loop.
+Both must yield the same text.
+
+    python benchmarks/bench_sse.py [--repeats 200] [--coalesce 1 8]
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx  # noqa: E402
+
+from bench_task_stream import RECORDED  # noqa: E402
+from llm_async import AsyncGroqProvider, chat_payload  # noqa: E402
+
+MESSAGES = [{"role": "user", "content": "Break this project into tasks."}]
+MODEL = "llama-3.1-8b-instant"
+
+
+class PacketStream(httpx.AsyncByteStream):
+    """Response body yielding one network read's worth of bytes per iteration."""
+
+    def __init__(self, packets):
+        self.packets = packets
+
+    async def __aiter__(self):
+        for packet in self.packets:
+            yield packet
+
+
+def groq_events(text):
+    tokens = re.findall(r"\s*\S+|\s+", text)
+    common = {"id": "chatcmpl-6f1c2a94-1b7e-4f0e-9a35-2c8d1f0b7e11", "object": "chat.completion.chunk", "created": 1721000000,
+              "model": "llama-3.1-8b-instant", "system_fingerprint": "fp_9cb648b966"}
+    deltas = [{"role": "assistant", "content": ""}] + [{"content": token} for token in tokens] + [{}]
+    events = []
+    for i, delta in enumerate(deltas):
+        event = dict(common, choices=[{"index": 0, "delta": delta, "logprobs": None, "finish_reason": "stop" if i == len(deltas) - 1 else None}])
+        event["x_groq"] = {"id": "req_01j3k4m5n6p7q8r9s0t1v2w3x4"}
+        events.append(b"data: " + json.dumps(event, separators=(",", ":")).encode("utf-8") + b"\n\n")
+    events.append(b"data: [DONE]\n\n")
+    return events, len(tokens)
+
+
+def replay_client(events, coalesce):
+    packets = [b"".join(events[i:i + coalesce]) for i in range(0, len(events), coalesce)]
+
+    def handler(request):
+        return httpx.Response(200, headers={"Content-Type": "text/event-stream"}, stream=PacketStream(packets))
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+async def legacy_chunks(client):
+    payload = chat_payload(MESSAGES, MODEL)
+    async with client.stream("POST", "https://groq.invalid/chat", json=payload) as response:
+        async for line in response.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            data = line.removeprefix("data: ").strip()
+            if data == "[DONE]":
+                return
+            try:
+                event = json.loads(data)
+            except json.JSONDecodeError:
+                continue
+            chunk = event.get("choices", [{}])[0].get("delta", {}).get("content", "") or ""
+            if chunk:
+                yield chunk
+
+
+def decoder_chunks(client):
+    provider = AsyncGroqProvider(url="https://groq.invalid/chat", max_retries=0)
+    provider._client = client
+    return provider.stream_chat(MESSAGES, "key", MODEL)
+
+
+async def collect(chunks):
+    return "".join([chunk async for chunk in chunks])
+
+
+async def cpu_time(streams, coalesce, chunks, repeats):
+    clients = [replay_client(events, coalesce) for events, _ in streams]
+    start = time.process_time()
+    for _ in range(repeats):
+        for client in clients:
+            await collect(chunks(client))
+    elapsed = time.process_time() - start
+    for client in clients:
+        await client.aclose()
+    return elapsed
+
+
+async def run(args):
+    streams = [groq_events(text) for text in RECORDED]
+    tokens = sum(count for _, count in streams) * args.repeats
+    for (events, _), text in zip(streams, RECORDED):
+        for coalesce in args.coalesce:
+            for chunks in (legacy_chunks, decoder_chunks):
+                async with replay_client(events, coalesce) as client:
+                    assert await collect(chunks(client)) == text
+
+    print(f"{len(streams)} recorded streams x {args.repeats}, {tokens} tokens")
+    print(f"{'events/read':>11} | {'legacy µs/1k tok':>16} | {'decoder µs/1k tok':>17} | {'speedup':>7}")
+    for coalesce in args.coalesce:
+        legacy = await cpu_time(streams, coalesce, legacy_chunks, args.repeats)
+        decoder = await cpu_time(streams, coalesce, decoder_chunks, args.repeats)
+        print(
+            f"{coalesce:>11} | {legacy / tokens * 1e9:>16.0f} | {decoder / tokens * 1e9:>17.0f} | "
+            f"{legacy / decoder:>6.1f}x"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--coalesce", type=int, nargs="+", default=[1, 8])
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Cold-start cost of run.py: import time per module and Login time to first paint.
+
+The profile runs ``python -X importtime`` on ``import run`` after
+``import streamlit`` (the server has that loaded already). It lists the
+modules run.py pulls in, with their cumulative import time. The eager
+column also imports the dependencies run.py used to load at the top for
+every page: pandas, plotly.express, numpy, PIL, httpx, replicate,
+streamlit_extras and the LLM and music modules.
+
+Time to first paint starts a fresh process per sample, as a server that has
+just started would be. It times a new session from its first script run to
+the rendered Login page (Registration, then Login), against a throwaway
+database. The eager column imports the same list at the start of the
+session, which is what the old top-of-file imports cost.
+
+    python benchmarks/bench_startup.py [--samples 5] [--top 15]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+EAGER = (
+    "pandas", "plotly.express", "numpy", "PIL.Image", "httpx", "replicate",
+    "streamlit_extras.stylable_container", "music_catalog", "llm_async", "llm_providers", "llm_cache",
+)
+
+FIRST_PAINT = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+for name in sys.argv[1:]:
+    __import__(name)
+at = AppTest.from_file("run.py", default_timeout=120)
+at.run()
+at.sidebar.radio[0].set_value("Login").run()
+assert not at.exception and at.title[0].value == "Login"
+print(json.dumps(time.perf_counter() - start))
+"""
+
+_IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_profile(modules):
+    """``[(module, cumulative seconds)]`` for the top-level imports done by ``import <modules>; import run``."""
+    # The marker splits streamlit's own imports from the ones measured
+    code = "import streamlit, sys\nprint('MARK', file=sys.stderr, flush=True)\n"
+    code += "".join(f"import {name}\n" for name in modules) + "import run\n"
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    after = result.stderr.split("MARK\n", 1)[1]
+    profile = []
+    for line in after.splitlines():
+        match = _IMPORTTIME.match(line)
+        # Indent 1 is a module imported directly by the measured statements
+        if match and len(match.group(3)) == 1:
+            profile.append((match.group(4), int(match.group(2)) / 1e6))
+    return profile
+
+
+def first_paint(modules, samples, db_dir):
+    times = []
+    for i in range(samples):
+        env = dict(os.environ, PYTHONPATH=ROOT, WORKPOD_DB_PATH=os.path.join(db_dir, f"paint-{i}.db"))
+        env.pop("WORKPOD_METRICS", None)
+        result = subprocess.run(
+            [sys.executable, "-c", FIRST_PAINT, *modules], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+        )
+        times.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    lazy = import_profile(())
+    eager = import_profile(EAGER)
+    print(f"Modules imported by run.py after streamlit (top {args.top}, cumulative ms)")
+    print(f"{'module':<38} | {'lazy':>7} | {'eager':>7}")
+    lazy_times = dict(lazy)
+    for name, seconds in sorted(eager, key=lambda item: -item[1])[:args.top]:
+        current = f"{lazy_times[name] * 1000:>7.1f}" if name in lazy_times else f"{'-':>7}"
+        print(f"{name:<38} | {current} | {seconds * 1000:>7.1f}")
+    print(f"{'total':<38} | {sum(lazy_times.values()) * 1000:>7.1f} | {sum(s for _, s in eager) * 1000:>7.1f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        lazy_paint = first_paint((), args.samples, tmp)
+        eager_paint = first_paint(EAGER, args.samples, tmp)
+    print(f"\nLogin time to first paint in a fresh process, {args.samples} samples")
+    print(f"{'imports':<7} | {'p50 ms':>7} | {'max ms':>7}")
+    for name, times in (("eager", eager_paint), ("lazy", lazy_paint)):
+        print(f"{name:<7} | {statistics.median(times) * 1000:>7.0f} | {max(times) * 1000:>7.0f}")
+
+
+if __name__ == "__main__":
+    main()
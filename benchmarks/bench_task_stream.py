@@ -0,0 +1,114 @@
+"""Time to first saved task, streaming vs parse-after-stream.
+
+Replays recorded Arctic/Groq project breakdowns at ``--tokens-per-second``.
+In batch mode the whole response is collected, then ``parse_task_lines``
+runs and ``insert_tasks`` saves everything, as the Arctic page used to. In
+streaming mode ``TaskStreamParser`` sees each token and every completed
+task is inserted straight away. Times are measured from the first token
+and compared with when the last token arrived.
+
+    python benchmarks/bench_task_stream.py [--tokens-per-second 100]
+"""
+import argparse
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import db  # noqa: E402
+from task_parser import TaskStreamParser, parse_task_lines  # noqa: E402
+
+RECORDED = [
+    "1. Define the product scope and user stories - expected time: 2 days\n"
+    "2. Design the database schema for users and orders - expected time: 1 day\n"
+    "3. Build the REST API for catalogue and checkout - expected time: 4 days\n"
+    "4. Implement the React storefront - expected time: 5 days\n"
+    "5. Integrate Stripe payments - expected time: 2 days\n"
+    "6. Write end-to-end tests - expected time: 2 days\n"
+    "7. Deploy to the cloud with CI/CD - expected time: 1 day\n",
+    "Here is the breakdown:\n"
+    "1) Research existing fitness tracking apps - expected time: 1 day\n"
+    "2) Sketch wireframes for the workout logger - expected time: 2 days\n"
+    "3) Set up the mobile project and navigation - expected time: 1 day\n"
+    "4) Implement workout logging and history - expected time: 4 days\n"
+    "5) Add charts for weekly progress - expected time: 2 days\n"
+    "6) Beta test with ten users - expected time: 3 days\n",
+    "- Collect and clean the sensor dataset - expected time: 3 days\n"
+    "- Explore features and baselines - expected time: 2 days\n"
+    "- Train the anomaly detection model - expected time: 4 days\n"
+    "- Build the alerting dashboard - expected time: 3 days\n"
+    "- Document the pipeline - expected time: 1 day",
+]
+
+
+def tokens(text):
+    return re.findall(r"\s*\S+|\s+", text)
+
+
+def replay(text, rate):
+    for i, token in enumerate(tokens(text)):
+        if i:
+            time.sleep(1 / rate)
+        yield token
+
+
+def run_batch(text, rate, project_id):
+    start = time.perf_counter()
+    full_response = "".join(replay(text, rate))
+    last_token = time.perf_counter() - start
+    db.insert_tasks(project_id, parse_task_lines(full_response), batch_key=project_id)
+    return time.perf_counter() - start, last_token
+
+
+def run_streaming(text, rate, project_id):
+    parser = TaskStreamParser()
+    first_task = None
+    start = time.perf_counter()
+
+    def save(tasks):
+        nonlocal first_task
+        if tasks:
+            db.insert_tasks(project_id, tasks, batch_key=project_id, start=len(parser.tasks) - len(tasks))
+            if first_task is None:
+                first_task = time.perf_counter() - start
+
+    for token in replay(text, rate):
+        last_token = time.perf_counter() - start
+        save(parser.feed(token))
+    save(parser.close())
+    return first_task, last_token
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens-per-second", type=float, default=100.0)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = db.configure(os.path.join(tmp, "bench.db"))
+        db.create_database()
+        results = {"batch": ([], []), "streaming": ([], [])}
+        for repeat in range(args.repeats):
+            for i, text in enumerate(RECORDED):
+                streamed = run_streaming(text, args.tokens_per_second, f"stream-{repeat}-{i}")
+                batched = run_batch(text, args.tokens_per_second, f"batch-{repeat}-{i}")
+                assert db.get_tasks_by_project_id(f"stream-{repeat}-{i}", ("task_description",)) == \
+                    db.get_tasks_by_project_id(f"batch-{repeat}-{i}", ("task_description",))
+                for name, (first, last) in (("streaming", streamed), ("batch", batched)):
+                    results[name][0].append(first)
+                    results[name][1].append(last)
+        pool.close()
+
+    print(f"{len(RECORDED)} recorded responses x {args.repeats} at {args.tokens_per_second:.0f} tokens/s")
+    print(f"{'mode':<10} | {'first task ms':>13} | {'last token ms':>13}")
+    for name, (first, last) in results.items():
+        print(f"{name:<10} | {statistics.median(first) * 1000:>13.1f} | {statistics.median(last) * 1000:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Local mock of an OpenAI-compatible streaming chat completions endpoint.
+
+Used by the LLM client benchmarks. Serves HTTP/1.1 with keep-alive. Each
+POST streams ``tokens`` server-sent events, sending the first after ``ttft``
+seconds and one every ``1 / tokens_per_second`` seconds after that. The
+stream ends with ``data: [DONE]``. ``handshake`` seconds are added once per
+new connection, to stand in for the TCP+TLS setup a real API costs. The
+first ``fail_first`` requests get a 429 with ``Retry-After: 0``. With
+``rpm`` set, requests beyond a quota of ``rpm`` per minute (a token bucket
+holding ``burst`` requests) get a 429 with the seconds until the next free
+slot, like Groq's own limit; these are counted in ``throttled``. Streams the
+client hangs up on are counted in ``aborted``, and ``tokens_sent`` counts
+every event written.
+
+    python benchmarks/mock_openai.py [--port 8765] [--ttft 0.05] [--rpm 30]
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(
+        self, address=("127.0.0.1", 0), ttft=0.0, tokens=20, tokens_per_second=0.0, handshake=0.0, fail_first=0,
+        rpm=None, burst=None,
+    ):
+        super().__init__(address, _Handler)
+        self.ttft = ttft
+        self.tokens = tokens
+        self.tokens_per_second = tokens_per_second
+        self.handshake = handshake
+        self.fail_first = fail_first
+        self.requests = 0
+        self.connections = 0
+        self.tokens_sent = 0
+        self.aborted = 0
+        self.throttled = 0
+        self.rpm = rpm
+        self.burst = burst if burst is not None else rpm
+        self._quota = self.burst
+        self._quota_updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1/chat/completions"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def _retry_after(self):
+        """0 if a request fits the quota now (and take it), else seconds until one does."""
+        if not self.rpm:
+            return 0
+        now = time.monotonic()
+        rate = self.rpm / 60.0
+        self._quota = min(self.burst, self._quota + (now - self._quota_updated) * rate)
+        self._quota_updated = now
+        if self._quota >= 1:
+            self._quota -= 1
+            return 0
+        return (1 - self._quota) / rate
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server._lock:
+            self.server.connections += 1
+        if self.server.handshake:
+            time.sleep(self.server.handshake)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with self.server._lock:
+            self.server.requests += 1
+            failing = self.server.requests <= self.server.fail_first
+            retry_after = 0 if failing else self.server._retry_after()
+            if retry_after:
+                self.server.throttled += 1
+        if failing or retry_after:
+            message = b'{"error": {"message": "rate limited"}}'
+            self.send_response(429)
+            self.send_header("Retry-After", f"{retry_after:.3f}")
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(message)))
+            self.end_headers()
+            self.wfile.write(message)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        server = self.server
+        try:
+            if server.ttft:
+                time.sleep(server.ttft)
+            for i in range(server.tokens):
+                if i and server.tokens_per_second:
+                    time.sleep(1 / server.tokens_per_second)
+                event = {"model": body.get("model"), "choices": [{"index": 0, "delta": {"content": f"tok{i} "}}]}
+                self._chunk(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                with server._lock:
+                    server.tokens_sent += 1
+            self._chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            with server._lock:
+                server.aborted += 1
+            self.close_connection = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ttft", type=float, default=0.05)
+    parser.add_argument("--tokens", type=int, default=50)
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--handshake", type=float, default=0.0)
+    parser.add_argument("--rpm", type=float, default=None)
+    args = parser.parse_args()
+    server = MockOpenAIServer(
+        ("127.0.0.1", args.port), args.ttft, args.tokens, args.tokens_per_second, args.handshake, rpm=args.rpm
+    )
+    print(f"Serving {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Blocking Groq client the app used before the asyncio providers, kept as a benchmark baseline.
+
+One ``requests.Session`` keeps connections alive between messages. It
+retries with the same policy as ``llm_async.AsyncGroqProvider``, only
+before the first byte of the stream arrives. The app itself streams
+through ``llm_async``; only the benchmarks import this module.
+"""
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from llm_async import (
+    BACKOFF_BASE,
+    BACKOFF_MAX,
+    GROQ_CHAT_URL,
+    MAX_RETRIES,
+    POOL_MAXSIZE,
+    RETRY_STATUSES,
+    TIMEOUT,
+    backoff_delay,
+    chat_payload,
+    retry_after_seconds,
+)
+from sse import EventStreamDecoder, chat_delta
+
+# Hosts kept in the session's pool
+POOL_CONNECTIONS = 4
+
+
+class GroqClient:
+    """Pooled, retrying client for streamed chat completions."""
+
+    def __init__(
+        self,
+        url=GROQ_CHAT_URL,
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=MAX_RETRIES,
+        backoff_base=BACKOFF_BASE,
+        backoff_max=BACKOFF_MAX,
+        timeout=TIMEOUT,
+        sleep=time.sleep,
+    ):
+        self.url = url
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self._sleep = sleep
+        self.retries = 0
+        self.session = requests.Session()
+        # Retries are handled here so that Retry-After and jitter apply; the adapter never retries
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def backoff(self, attempt, retry_after=None):
+        return backoff_delay(attempt, retry_after, self.backoff_base, self.backoff_max)
+
+    def post_chat(self, payload, api_key):
+        """POST ``payload`` with ``stream=True``, retrying transient failures.
+
+        Returns the open response. Raises ``requests.HTTPError`` for a final
+        error status and ``requests.RequestException`` for a final transport
+        failure.
+        """
+        headers = {"Authorization": f"Bearer {api_key}"}
+        attempt = 0
+        while True:
+            try:
+                response = self.session.post(self.url, headers=headers, json=payload, stream=True, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.backoff(attempt)
+            else:
+                if response.status_code < 400:
+                    return response
+                # Read the (short) error body, which also returns the connection to the pool
+                response.content
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    response.raise_for_status()
+                delay = self.backoff(attempt, retry_after_seconds(response.headers.get("Retry-After")))
+            attempt += 1
+            self.retries += 1
+            self._sleep(delay)
+
+    def stream_chat(self, messages, api_key, model, temperature=0.6, top_p=0.9):
+        """Yield content deltas of a streamed chat completion."""
+        response = self.post_chat(chat_payload(messages, model, temperature, top_p), api_key)
+        try:
+            yield from iter_chat_chunks(response)
+        finally:
+            response.close()
+
+    def close(self):
+        self.session.close()
+
+
+def iter_chat_chunks(response):
+    """Content deltas from an OpenAI-style server-sent event stream.
+
+    The body is read in whatever chunks arrive rather than line by line.
+    It is read to the end after ``[DONE]``, so the connection goes back to
+    the pool instead of being discarded.
+    """
+    decoder = EventStreamDecoder()
+    chunks = response.iter_content(chunk_size=None)
+    for data in chunks:
+        for payload in decoder.feed(data):
+            chunk = chat_delta(payload)
+            if chunk is None:
+                for _ in chunks:
+                    pass
+                return
+            if chunk:
+                yield chunk
+    for payload in decoder.close():
+        chunk = chat_delta(payload)
+        if chunk:
+            yield chunk
@@ -0,0 +1,116 @@
+"""Plotly figures for the OneDash contribution chart, built once per set of counts.
+
+Building the pie is most of what the chart costs on a rerun: ``px.pie``
+goes through pandas and plotly.express for a handful of slices. Figures are
+cached per project and keyed by a digest of the contribution counts. A
+rerun with unchanged counts reuses the cached figure, and new counts
+replace the project's entry. ``st.plotly_chart`` serialises whatever
+figure it is given, so the cache holds the figure object itself: handing
+Streamlit a dict or JSON spec makes it rebuild and validate a figure
+first, which costs more than building a new one.
+
+Pies with at most ``LIGHT_CHART_MAX_SLICES`` slices are built directly with
+``plotly.graph_objects``, which gives the same trace and layout as
+plotly.express without importing pandas or plotly.express.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# Pies with more slices than this go through plotly.express; 0 always does
+LIGHT_CHART_MAX_SLICES = int(os.getenv("WORKPOD_LIGHT_CHART_MAX_SLICES", "20"))
+FIGURE_CACHE_SIZE = 256
+
+TITLE = "User Contributions"
+NAMES, VALUES = "User", "Completed Tasks"
+
+
+def data_digest(contributions):
+    """Stable hash of ``[(username, completed), ...]`` rows."""
+    payload = json.dumps([list(row) for row in contributions], separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def express_figure(contributions):
+    """The pie as run.py has always drawn it, through pandas and plotly.express."""
+    import pandas as pd
+    import plotly.express as px
+
+    df = pd.DataFrame(list(contributions), columns=[NAMES, VALUES])
+    fig = px.pie(df, names=NAMES, values=VALUES, title=TITLE)
+    fig.update_traces(textposition='inside', textinfo='percent+label', textfont_color='white')
+    return fig
+
+
+def light_figure(contributions):
+    """Same pie as ``express_figure``, built from ``plotly.graph_objects`` alone."""
+    import plotly.graph_objects as go
+
+    pie = go.Pie(
+        labels=[name for name, _ in contributions],
+        values=[count for _, count in contributions],
+        domain={"x": [0.0, 1.0], "y": [0.0, 1.0]},
+        hovertemplate=f"{NAMES}=%{{label}}<br>{VALUES}=%{{value}}<extra></extra>",
+        legendgroup="",
+        name="",
+        showlegend=True,
+        textposition="inside",
+        textinfo="percent+label",
+        textfont_color="white",
+    )
+    return go.Figure(pie, layout={"title": {"text": TITLE}, "legend": {"tracegroupgap": 0}})
+
+
+def build_figure(contributions, max_light_slices=None):
+    if max_light_slices is None:
+        max_light_slices = LIGHT_CHART_MAX_SLICES
+    if len(contributions) <= max_light_slices:
+        return light_figure(contributions)
+    return express_figure(contributions)
+
+
+class FigureCache:
+    """Per-process LRU holding each project's latest figure and the digest of its data.
+
+    Cached figures are shared between sessions and must not be modified.
+    """
+
+    def __init__(self, max_size=FIGURE_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def figure(self, project_id, contributions, build=build_figure):
+        digest = data_digest(contributions)
+        with self._lock:
+            entry = self._entries.get(project_id)
+            if entry is not None and entry[0] == digest:
+                self._entries.move_to_end(project_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        # Build outside the lock; two sessions racing on new counts build the same figure
+        fig = build(contributions)
+        with self._lock:
+            self._entries[project_id] = (digest, fig)
+            self._entries.move_to_end(project_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return fig
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+_figures = FigureCache()
+
+
+# Function to get the OneDash contribution pie for a project, rebuilt only when its counts change
+def contribution_figure(project_id, contributions):
+    return _figures.figure(project_id, contributions)
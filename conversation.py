@@ -0,0 +1,102 @@
+"""Chat history with running token counts and a per-model context budget.
+
+``Conversation`` is a plain list of ``{"role", "content"}`` dicts, so the
+Streamlit pages keep appending to and iterating over it as before. Each
+message's token estimate is computed once, the first time it is needed,
+and cached alongside the list. ``window`` picks what is actually sent: the
+system prompt, a short summary of the turns that no longer fit, and as
+many of the newest turns as the model's budget allows. The cost of a turn
+then depends on the budget, not on how long the conversation has run.
+"""
+import os
+import re
+
+# Prompt tokens allowed per model; others get DEFAULT_CONTEXT_BUDGET
+CONTEXT_BUDGETS = {
+    "snowflake/snowflake-arctic-instruct": 3072,
+}
+DEFAULT_CONTEXT_BUDGET = int(os.getenv("WORKPOD_CONTEXT_BUDGET", "4096"))
+# Per-message allowance for role markers and separators
+MESSAGE_OVERHEAD = 4
+SUMMARY_TOKENS = 256
+SUMMARY_SNIPPET_CHARS = 120
+SUMMARY_HEADER = "Earlier in this conversation the user asked about:"
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_num_tokens(text):
+    """Approximate token count without requiring heavyweight tokenizer dependencies."""
+    return max(1, len(_TOKEN_PATTERN.findall(text)))
+
+
+def context_budget(model):
+    return CONTEXT_BUDGETS.get(model, DEFAULT_CONTEXT_BUDGET)
+
+
+def message_tokens(message):
+    return estimate_num_tokens(message["content"]) + MESSAGE_OVERHEAD
+
+
+class Conversation(list):
+    """Chat messages plus cached token counts; messages are only ever appended."""
+
+    def __init__(self, messages=()):
+        super().__init__(messages)
+        self._tokens = []
+        self._total = 0
+        self._snippets = []
+        self._summarised = 0
+
+    def token_counts(self):
+        """Per-message token estimates, counting only messages added since the last call."""
+        for message in self[len(self._tokens):]:
+            count = message_tokens(message)
+            self._tokens.append(count)
+            self._total += count
+        return self._tokens
+
+    @property
+    def total_tokens(self):
+        self.token_counts()
+        return self._total
+
+    def window(self, budget, system=None):
+        """Messages to send under ``budget`` tokens, always including ``system`` and the newest message.
+
+        Older turns that do not fit are replaced by one system message
+        listing the user's earlier requests, newest first, within
+        ``SUMMARY_TOKENS``. The result stays within ``budget`` unless the
+        system prompt and the newest message alone exceed it.
+        """
+        counts = self.token_counts()
+        used = message_tokens(system) if system else 0
+        start = len(self)
+        while start > 0 and (start == len(self) or used + counts[start - 1] <= budget - SUMMARY_TOKENS):
+            start -= 1
+            used += counts[start]
+
+        head = [system] if system else []
+        summary = self._summary(start, min(SUMMARY_TOKENS, budget - used))
+        if summary:
+            head.append({"role": "system", "content": summary})
+        return head + self[start:]
+
+    def _summary(self, dropped, limit):
+        # Snippets are built once per message, the first time it falls out of a window
+        for index in range(self._summarised, dropped):
+            if self[index]["role"] == "user":
+                self._snippets.append((index, self[index]["content"].strip()[:SUMMARY_SNIPPET_CHARS]))
+        self._summarised = max(self._summarised, dropped)
+        # ``limit`` covers the whole message: header, role overhead and snippet lines
+        lines, used = [], estimate_num_tokens(SUMMARY_HEADER) + MESSAGE_OVERHEAD
+        for index, snippet in reversed(self._snippets):
+            if index >= dropped:
+                continue
+            used += estimate_num_tokens(snippet) + 1
+            if used > limit:
+                break
+            lines.append(f"- {snippet}")
+        if not lines:
+            return ""
+        return SUMMARY_HEADER + "\n" + "\n".join(lines)
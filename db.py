@@ -0,0 +1,863 @@
+"""SQLite data-access layer for WorkPod.
+
+All reads and writes go through a process-wide ``ConnectionPool``. A thread
+checks out one long-lived connection for as long as it needs it, then hands
+it back for the next Streamlit script run to reuse. Connections are opened
+in WAL mode, so readers never block the single writer. Each one keeps its
+own prepared-statement cache, keyed by the SQL text, which is why every
+query in this module is a module-level constant. With ``WORKPOD_METRICS=1``
+the pool opens ``metrics.TimedConnection`` objects instead, which count and
+time every statement.
+
+Every task or member write also bumps the project's row in
+``project_revisions``, in the same transaction. Readers compare revisions to
+decide whether cached project data is still current. They only re-read a
+revision after ``PRAGMA data_version`` shows that some other connection has
+committed, so checking an unchanged project costs one pragma.
+
+Triggers on ``tasks`` append to the ``task_activity`` log and keep
+``project_stats``, ``project_contributions`` and the hourly activity rollup
+current in the writing transaction. Dashboard counters and burndown series
+are read from those tables instead of aggregating task rows.
+"""
+import csv
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from functools import lru_cache
+
+import metrics
+
+DB_PATH = os.getenv("WORKPOD_DB_PATH", "user_data.db")
+BUSY_TIMEOUT_MS = 5000
+STATEMENT_CACHE_SIZE = 256
+MAX_IDLE_CONNECTIONS = 16
+SNAPSHOT_CACHE_SIZE = 256
+# Granularity of the task_activity_hourly rollup; burndown buckets are multiples of it
+ACTIVITY_HOUR_SECONDS = 3600
+
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -8000",
+)
+
+
+class ConnectionPool:
+    """Hand out one SQLite connection per thread and recycle it afterwards."""
+
+    def __init__(self, path, max_idle=MAX_IDLE_CONNECTIONS):
+        self.path = path
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # id(connection) -> PRAGMA data_version it last reported
+        self._data_versions = {}
+
+    def _connect(self):
+        # isolation_level=None leaves transaction control to ``transaction()``
+        conn = sqlite3.connect(
+            self.path,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            factory=metrics.connection_factory(),
+        )
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Yield this thread's connection, checking one out of the pool if needed."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            # Nested use on the same thread shares the outer checkout
+            yield conn
+            return
+
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self._connect()
+        self._local.conn = conn
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            if conn.in_transaction:
+                conn.rollback()
+            with self._lock:
+                if len(self._idle) < self.max_idle:
+                    self._idle.append(conn)
+                    conn = None
+                else:
+                    self._data_versions.pop(id(conn), None)
+            if conn is not None:
+                conn.close()
+
+    @contextmanager
+    def transaction(self, write=False):
+        """Run the block inside one transaction and commit on success.
+
+        Writes take the lock up front with ``BEGIN IMMEDIATE``. That way a
+        busy writer waits on ``busy_timeout`` at BEGIN instead of failing
+        with "database is locked" when a read transaction tries to upgrade.
+        """
+        with self.connection() as conn:
+            if conn.in_transaction:
+                yield conn
+                return
+            conn.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+
+    def changed_elsewhere(self, conn):
+        """Whether another connection has committed since ``conn`` last asked.
+
+        Reads ``PRAGMA data_version``, which only moves when some other
+        connection, in this process or another one, commits to the file.
+        The first call for a connection always answers True.
+        """
+        version = conn.execute(DATA_VERSION_SQL).fetchone()[0]
+        with self._lock:
+            changed = self._data_versions.get(id(conn)) != version
+            self._data_versions[id(conn)] = version
+        return changed
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+            for conn in idle:
+                self._data_versions.pop(id(conn), None)
+        for conn in idle:
+            conn.close()
+
+
+_pool = ConnectionPool(DB_PATH)
+
+
+def get_pool():
+    return _pool
+
+
+def configure(path):
+    """Point the data layer at another database file (used by benchmarks)."""
+    global _pool
+    _pool.close()
+    _pool = ConnectionPool(path)
+    _revisions.clear()
+    _snapshots.clear()
+    return _pool
+
+
+def _fetchone(sql, params=()):
+    with _pool.connection() as conn:
+        return conn.execute(sql, params).fetchone()
+
+
+def _fetchall(sql, params=()):
+    with _pool.connection() as conn:
+        return conn.execute(sql, params).fetchall()
+
+
+@lru_cache(maxsize=None)
+def _projection(table, columns, clause):
+    """SQL text and row type for ``SELECT columns FROM table WHERE clause``.
+
+    Rows come back as namedtuples (tuple subclasses with ``__slots__ = ()``),
+    so positional access keeps working and each row costs no more than a
+    plain tuple. Memoising the SQL text keeps it identical between calls,
+    which is what the statement cache keys on.
+    """
+    unknown = set(columns) - _PROJECTABLE[table]
+    if unknown:
+        raise ValueError(f"Unknown {table} column(s): {', '.join(sorted(unknown))}")
+    row_type = namedtuple(f"{table.title()}Row", columns)
+    return f"SELECT {', '.join(columns)} FROM {table} WHERE {clause}", row_type
+
+
+def _select(conn, table, columns, clause, params):
+    sql, row_type = _projection(table, tuple(columns), clause)
+    cursor = conn.cursor()
+    cursor.row_factory = lambda _, row: row_type._make(row)
+    return cursor.execute(sql, params)
+
+
+def _read_blob(conn, table, column, rowid, select_sql):
+    """Read one BLOB cell through the incremental blob API, without a SELECT.
+
+    ``select_sql`` reads the same cell by id, for Pythons without ``blobopen``.
+    """
+    if hasattr(conn, "blobopen"):
+        try:
+            with conn.blobopen(table, column, rowid, readonly=True) as blob:
+                return blob.read()
+        except sqlite3.OperationalError:
+            # NULL cells cannot be opened as blobs
+            return None
+    # Python < 3.11 has no blobopen
+    row = conn.execute(select_sql, (rowid,)).fetchone()
+    return row[0] if row else None
+
+
+CREATE_USERS_SQL = '''CREATE TABLE IF NOT EXISTS users
+                     (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                     username TEXT NOT NULL,
+                     email TEXT NOT NULL,
+                     project_id TEXT NOT NULL,
+                     image BLOB)'''
+CREATE_TASKS_SQL = '''CREATE TABLE IF NOT EXISTS tasks
+                     (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                     project_id TEXT NOT NULL,
+                     task_description TEXT NOT NULL,
+                     completed BOOLEAN NOT NULL DEFAULT 0,
+                     completed_by TEXT)'''
+
+INSERT_TASK_SQL = '''INSERT INTO tasks (project_id, task_description) VALUES (?, ?)'''
+INSERT_TASK_ONCE_SQL = '''INSERT OR IGNORE INTO tasks (project_id, task_description, idempotency_key) VALUES (?, ?, ?)'''
+COMPLETE_TASK_SQL = '''UPDATE tasks SET completed = 1, completed_by = ? WHERE id = ?'''
+DELETE_TASK_SQL = '''DELETE FROM tasks WHERE id = ?'''
+DELETE_PROJECT_TASKS_SQL = '''DELETE FROM tasks WHERE project_id = ?'''
+DELETE_PROJECT_USERS_SQL = '''DELETE FROM users WHERE project_id = ?'''
+INSERT_USER_SQL = '''INSERT OR IGNORE INTO users (username, email, project_id, avatar_hash) VALUES (?, ?, ?, ?)'''
+DELETE_USER_SQL = '''DELETE FROM users WHERE project_id = ? AND username = ?'''
+TASK_PROJECT_SQL = '''SELECT project_id FROM tasks WHERE id = ?'''
+PROJECT_STATS_SQL = '''SELECT completed, total FROM project_stats WHERE project_id = ?'''
+PROJECT_CONTRIBUTIONS_SQL = '''SELECT username, completed FROM project_contributions WHERE project_id = ? ORDER BY username'''
+ACTIVITY_SERIES_SQL = '''SELECT hour / ? AS bucket, SUM(created), SUM(completed), SUM(deleted), SUM(open_change)
+                         FROM task_activity_hourly WHERE project_id = ? GROUP BY bucket ORDER BY bucket'''
+DELETE_PROJECT_ACTIVITY_SQL = '''DELETE FROM task_activity WHERE project_id = ?'''
+DELETE_PROJECT_HOURLY_SQL = '''DELETE FROM task_activity_hourly WHERE project_id = ?'''
+DELETE_PROJECT_STATS_SQL = '''DELETE FROM project_stats WHERE project_id = ?'''
+DELETE_PROJECT_CONTRIBUTIONS_SQL = '''DELETE FROM project_contributions WHERE project_id = ?'''
+DATA_VERSION_SQL = '''PRAGMA data_version'''
+PROJECT_REVISION_SQL = '''SELECT revision FROM project_revisions WHERE project_id = ?'''
+BUMP_REVISION_SQL = '''INSERT INTO project_revisions (project_id, revision) VALUES (?, 1)
+                       ON CONFLICT (project_id) DO UPDATE SET revision = revision + 1'''
+INSERT_AVATAR_SQL = '''INSERT OR IGNORE INTO avatars (hash, size, mime, data) VALUES (?, ?, ?, ?)'''
+AVATAR_EXISTS_SQL = '''SELECT 1 FROM avatars WHERE hash = ? LIMIT 1'''
+AVATAR_ROWID_SQL = '''SELECT id FROM avatars WHERE hash = ? AND size = ?'''
+AVATAR_SQL = '''SELECT data FROM avatars WHERE id = ?'''
+LEGACY_IMAGE_IDS_SQL = '''SELECT id FROM users WHERE image IS NOT NULL AND avatar_hash IS NULL AND id > ? ORDER BY id LIMIT ?'''
+LEGACY_IMAGE_SQL = '''SELECT image FROM users WHERE id = ?'''
+USER_PROJECT_SQL = '''SELECT project_id FROM users WHERE id = ?'''
+SET_USER_AVATAR_SQL = '''UPDATE users SET avatar_hash = ?, image = NULL WHERE id = ?'''
+DELETE_ORPHAN_AVATARS_SQL = '''DELETE FROM avatars WHERE hash NOT IN
+                               (SELECT avatar_hash FROM users WHERE avatar_hash IS NOT NULL)'''
+DELETE_AVATAR_IF_UNUSED_SQL = '''DELETE FROM avatars WHERE hash = ?
+                                 AND NOT EXISTS (SELECT 1 FROM users WHERE avatar_hash = ?)'''
+LLM_CACHE_GET_SQL = '''SELECT response FROM llm_cache WHERE key = ? AND created_at >= ?'''
+LLM_CACHE_TOUCH_SQL = '''UPDATE llm_cache SET last_used = ? WHERE key = ?'''
+LLM_CACHE_PUT_SQL = '''INSERT OR REPLACE INTO llm_cache (key, response, size, created_at, last_used) VALUES (?, ?, ?, ?, ?)'''
+LLM_CACHE_EXPIRE_SQL = '''DELETE FROM llm_cache WHERE created_at < ?'''
+LLM_CACHE_TOTALS_SQL = '''SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache'''
+LLM_CACHE_LRU_SQL = '''SELECT key, size FROM llm_cache ORDER BY last_used'''
+LLM_CACHE_DELETE_SQL = '''DELETE FROM llm_cache WHERE key = ?'''
+
+# Columns callers may project; ``users.image`` is legacy and only read as a blob
+USER_COLUMNS = ("id", "username", "email", "project_id", "avatar_hash")
+TASK_COLUMNS = ("id", "project_id", "task_description", "completed", "completed_by")
+_PROJECTABLE = {"users": frozenset(USER_COLUMNS), "tasks": frozenset(TASK_COLUMNS)}
+
+# Unix time with fractions of a second, for trigger bodies
+_NOW = "(julianday('now') - 2440587.5) * 86400.0"
+# Trigger step: count a completed task row for its user; '' stands for no username
+_CONTRIBUTE = '''INSERT INTO project_contributions (project_id, username, completed)
+               SELECT {row}.project_id, COALESCE({row}.completed_by, ''), 1 WHERE {row}.completed = 1
+               ON CONFLICT (project_id, username) DO UPDATE SET completed = completed + 1;'''
+# Trigger step: take a completed OLD task row off its user's count
+_UNCONTRIBUTE = '''UPDATE project_contributions SET completed = completed - 1
+               WHERE OLD.completed = 1 AND project_id = OLD.project_id AND username = COALESCE(OLD.completed_by, '');
+               DELETE FROM project_contributions
+               WHERE OLD.completed = 1 AND project_id = OLD.project_id AND username = COALESCE(OLD.completed_by, '')
+               AND completed <= 0;'''
+_LOG_ACTIVITY = '''INSERT INTO task_activity (project_id, task_id, event, username, open_change, at)'''
+
+# Schema migrations, applied in order. ``PRAGMA user_version`` records how
+# many have run, so existing user_data.db files are upgraded in place.
+MIGRATIONS = [
+    # 1: base tables (no-op for databases created before migrations existed)
+    (CREATE_USERS_SQL, CREATE_TASKS_SQL),
+    # 2: covering index for the OneDash task queries, one member per username
+    (
+        '''DELETE FROM users WHERE id NOT IN
+           (SELECT MIN(id) FROM users GROUP BY project_id, username)''',
+        '''CREATE UNIQUE INDEX IF NOT EXISTS idx_users_project_username
+           ON users (project_id, username)''',
+        '''CREATE INDEX IF NOT EXISTS idx_tasks_project_completed
+           ON tasks (project_id, completed, completed_by)''',
+    ),
+    # 3: idempotency keys so replayed bulk inserts are no-ops
+    (
+        '''ALTER TABLE tasks ADD COLUMN idempotency_key TEXT''',
+        '''CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_idempotency
+           ON tasks (project_id, idempotency_key)''',
+    ),
+    # 4: content-addressed avatar thumbnails; users.image is no longer written
+    (
+        '''CREATE TABLE IF NOT EXISTS avatars
+           (id INTEGER PRIMARY KEY,
+           hash TEXT NOT NULL,
+           size INTEGER NOT NULL,
+           mime TEXT NOT NULL,
+           data BLOB NOT NULL,
+           UNIQUE (hash, size))''',
+        '''ALTER TABLE users ADD COLUMN avatar_hash TEXT''',
+    ),
+    # 5: lets member removal find a shared thumbnail without scanning users
+    (
+        '''CREATE INDEX IF NOT EXISTS idx_users_avatar_hash ON users (avatar_hash)''',
+    ),
+    # 6: completed LLM responses, reused for identical requests
+    (
+        '''CREATE TABLE IF NOT EXISTS llm_cache
+           (key TEXT PRIMARY KEY,
+           response TEXT NOT NULL,
+           size INTEGER NOT NULL,
+           created_at REAL NOT NULL,
+           last_used REAL NOT NULL)''',
+        '''CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache (last_used)''',
+    ),
+    # 7: per-project revision counters, bumped by every task and member write
+    (
+        '''CREATE TABLE IF NOT EXISTS project_revisions
+           (project_id TEXT PRIMARY KEY,
+           revision INTEGER NOT NULL) WITHOUT ROWID''',
+    ),
+    # 8: append-only task activity and per-project counters, kept current by triggers
+    (
+        '''CREATE TABLE IF NOT EXISTS task_activity
+           (id INTEGER PRIMARY KEY,
+           project_id TEXT NOT NULL,
+           task_id INTEGER NOT NULL,
+           event TEXT NOT NULL CHECK (event IN ('created', 'completed', 'reopened', 'deleted')),
+           username TEXT,
+           open_change INTEGER NOT NULL,
+           at REAL NOT NULL)''',
+        '''CREATE INDEX IF NOT EXISTS idx_task_activity_project_at ON task_activity (project_id, at)''',
+        # Hourly totals of the activity log, which is what burndown charts read
+        '''CREATE TABLE IF NOT EXISTS task_activity_hourly
+           (project_id TEXT NOT NULL,
+           hour INTEGER NOT NULL,
+           created INTEGER NOT NULL,
+           completed INTEGER NOT NULL,
+           deleted INTEGER NOT NULL,
+           open_change INTEGER NOT NULL,
+           PRIMARY KEY (project_id, hour)) WITHOUT ROWID''',
+        '''CREATE TABLE IF NOT EXISTS project_stats
+           (project_id TEXT PRIMARY KEY,
+           total INTEGER NOT NULL,
+           completed INTEGER NOT NULL) WITHOUT ROWID''',
+        # username '' stands for a completion with no username
+        '''CREATE TABLE IF NOT EXISTS project_contributions
+           (project_id TEXT NOT NULL,
+           username TEXT NOT NULL,
+           completed INTEGER NOT NULL,
+           PRIMARY KEY (project_id, username)) WITHOUT ROWID''',
+        '''INSERT INTO project_stats (project_id, total, completed)
+           SELECT project_id, COUNT(*), COALESCE(SUM(completed), 0) FROM tasks GROUP BY project_id''',
+        '''INSERT INTO project_contributions (project_id, username, completed)
+           SELECT project_id, COALESCE(completed_by, ''), COUNT(*) FROM tasks WHERE completed = 1
+           GROUP BY project_id, COALESCE(completed_by, '')''',
+        # Existing tasks have no timestamps; their history starts at the upgrade
+        f'''{_LOG_ACTIVITY} SELECT project_id, id, 'created', NULL, 1, {_NOW} FROM tasks''',
+        f'''{_LOG_ACTIVITY} SELECT project_id, id, 'completed', completed_by, -1, {_NOW} FROM tasks WHERE completed = 1''',
+        f'''INSERT INTO task_activity_hourly (project_id, hour, created, completed, deleted, open_change)
+           SELECT project_id, CAST(at / {ACTIVITY_HOUR_SECONDS} AS INTEGER) AS hour,
+                  SUM(event = 'created'), SUM(event = 'completed'), SUM(event = 'deleted'), SUM(open_change)
+           FROM task_activity GROUP BY project_id, hour''',
+        f'''CREATE TRIGGER IF NOT EXISTS task_activity_rollup AFTER INSERT ON task_activity
+           BEGIN
+               INSERT INTO task_activity_hourly (project_id, hour, created, completed, deleted, open_change)
+               VALUES (NEW.project_id, CAST(NEW.at / {ACTIVITY_HOUR_SECONDS} AS INTEGER),
+                       NEW.event = 'created', NEW.event = 'completed', NEW.event = 'deleted', NEW.open_change)
+               ON CONFLICT (project_id, hour) DO UPDATE SET
+                   created = created + excluded.created, completed = completed + excluded.completed,
+                   deleted = deleted + excluded.deleted, open_change = open_change + excluded.open_change;
+           END''',
+        f'''CREATE TRIGGER IF NOT EXISTS tasks_activity_insert AFTER INSERT ON tasks
+           BEGIN
+               INSERT INTO project_stats (project_id, total, completed) VALUES (NEW.project_id, 1, NEW.completed = 1)
+               ON CONFLICT (project_id) DO UPDATE SET total = total + 1, completed = completed + (NEW.completed = 1);
+               {_CONTRIBUTE.format(row="NEW")}
+               {_LOG_ACTIVITY} VALUES (NEW.project_id, NEW.id, 'created', NULL, 1, {_NOW});
+               {_LOG_ACTIVITY} SELECT NEW.project_id, NEW.id, 'completed', NEW.completed_by, -1, {_NOW}
+               WHERE NEW.completed = 1;
+           END''',
+        f'''CREATE TRIGGER IF NOT EXISTS tasks_activity_update AFTER UPDATE OF completed, completed_by ON tasks
+           WHEN OLD.completed IS NOT NEW.completed OR OLD.completed_by IS NOT NEW.completed_by
+           BEGIN
+               UPDATE project_stats SET completed = completed - (OLD.completed = 1) + (NEW.completed = 1)
+               WHERE project_id = NEW.project_id;
+               {_UNCONTRIBUTE}
+               {_CONTRIBUTE.format(row="NEW")}
+               {_LOG_ACTIVITY} SELECT NEW.project_id, NEW.id, 'completed', NEW.completed_by, -1, {_NOW}
+               WHERE NEW.completed = 1 AND OLD.completed IS NOT 1;
+               {_LOG_ACTIVITY} SELECT NEW.project_id, NEW.id, 'reopened', NULL, 1, {_NOW}
+               WHERE OLD.completed = 1 AND NEW.completed IS NOT 1;
+           END''',
+        f'''CREATE TRIGGER IF NOT EXISTS tasks_activity_delete AFTER DELETE ON tasks
+           BEGIN
+               UPDATE project_stats SET total = total - 1, completed = completed - (OLD.completed = 1)
+               WHERE project_id = OLD.project_id;
+               {_UNCONTRIBUTE}
+               {_LOG_ACTIVITY} VALUES (OLD.project_id, OLD.id, 'deleted', NULL, -(OLD.completed IS NOT 1), {_NOW});
+           END''',
+    ),
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+_migrated_paths = set()
+_migrate_lock = threading.Lock()
+
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn, target=SCHEMA_VERSION):
+    """Apply pending migrations up to ``target``, one transaction per step."""
+    while True:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-read under the write lock so concurrent processes never double-apply
+            version = get_schema_version(conn)
+            if version >= target:
+                conn.rollback()
+                return version
+            for statement in MIGRATIONS[version]:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {version + 1}")
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+
+# Function to create SQLite database and bring its schema up to date
+def create_database():
+    with _migrate_lock:
+        if _pool.path in _migrated_paths:
+            return
+        with _pool.connection() as conn:
+            migrate(conn)
+        _migrated_paths.add(_pool.path)
+
+
+class RevisionCache:
+    """Per-process copy of the ``project_revisions`` counters.
+
+    A project's revision is read from the database once and then served
+    from memory. Every entry is dropped when ``PRAGMA data_version`` shows
+    that another connection has committed, and a project's entry is dropped
+    when this process writes to it. Each forget starts a new epoch. A read
+    that began in an earlier epoch is not stored, so a write landing
+    mid-read cannot leave an old revision behind.
+    """
+
+    def __init__(self):
+        self._revisions = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def revision(self, pool, conn, project_id):
+        changed = pool.changed_elsewhere(conn)
+        with self._lock:
+            if changed:
+                self._revisions.clear()
+                self._epoch += 1
+            revision = self._revisions.get(project_id)
+            epoch = self._epoch
+        if revision is not None:
+            return revision
+        revision = _read_revision(conn, project_id)
+        with self._lock:
+            if self._epoch == epoch:
+                self._revisions[project_id] = revision
+        return revision
+
+    def forget(self, project_id):
+        with self._lock:
+            self._revisions.pop(project_id, None)
+            self._epoch += 1
+
+    def clear(self):
+        with self._lock:
+            self._revisions.clear()
+            self._epoch += 1
+
+
+class SnapshotCache:
+    """Per-process LRU of project snapshots, each valid for the revision it was read at."""
+
+    def __init__(self, max_size=SNAPSHOT_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, project_id, revision):
+        with self._lock:
+            snapshot = self._entries.get(project_id)
+            if snapshot is None or snapshot.revision != revision:
+                return None
+            self._entries.move_to_end(project_id)
+            return snapshot
+
+    def put(self, project_id, snapshot):
+        with self._lock:
+            current = self._entries.get(project_id)
+            # Two readers may race; keep the newer snapshot
+            if current is not None and current.revision > snapshot.revision:
+                return
+            self._entries[project_id] = snapshot
+            self._entries.move_to_end(project_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+ProjectSnapshot = namedtuple("ProjectSnapshot", ["members", "tasks", "completed", "total", "contributions", "revision"])
+ActivityBucket = namedtuple("ActivityBucket", ["start", "created", "completed", "deleted", "remaining"])
+
+_revisions = RevisionCache()
+_snapshots = SnapshotCache()
+
+
+def _read_revision(conn, project_id):
+    row = conn.execute(PROJECT_REVISION_SQL, (project_id,)).fetchone()
+    return row[0] if row else 0
+
+
+def _bump_revision(conn, project_id):
+    """Move ``project_id`` to a new revision, inside the caller's write transaction."""
+    if project_id is not None:
+        conn.execute(BUMP_REVISION_SQL, (project_id,))
+
+
+def _read_counts(conn, project_id):
+    row = conn.execute(PROJECT_STATS_SQL, (project_id,)).fetchone()
+    # Same shape as SUM/COUNT over a project with no tasks
+    if row is None or row[1] == 0:
+        return None, 0
+    return tuple(row)
+
+
+def _read_contributions(conn, project_id):
+    return [(username or None, count) for username, count in conn.execute(PROJECT_CONTRIBUTIONS_SQL, (project_id,))]
+
+
+def _task_project_id(conn, task_id):
+    row = conn.execute(TASK_PROJECT_SQL, (task_id,)).fetchone()
+    return row[0] if row else None
+
+
+# Function to insert task into the database
+def insert_task(project_id, task_description):
+    with _pool.transaction(write=True) as conn:
+        conn.execute(INSERT_TASK_SQL, (project_id, task_description))
+        _bump_revision(conn, project_id)
+    _revisions.forget(project_id)
+
+# Function to insert a batch of tasks in one transaction; returns how many were new
+def insert_tasks(project_id, descriptions, batch_key=None, start=0):
+    """Insert ``descriptions`` with a single ``executemany`` and one commit.
+
+    With a ``batch_key`` every row gets an idempotency key derived from the
+    batch key, its position and its text. Inserting the same batch again
+    (for example a rerun replaying the same assistant message) is then a
+    no-op. Without one, rows are always inserted, like ``insert_task``.
+    ``start`` is the position of the first description, so a batch can be
+    inserted in pieces as it streams in.
+    """
+    rows = [
+        (project_id, description, _idempotency_key(batch_key, index, description) if batch_key is not None else None)
+        for index, description in enumerate(descriptions, start=start)
+    ]
+    if not rows:
+        return 0
+    with _pool.transaction(write=True) as conn:
+        # rowcount leaves out the rows written by the activity and counter triggers
+        inserted = conn.executemany(INSERT_TASK_ONCE_SQL, rows).rowcount
+        if inserted:
+            _bump_revision(conn, project_id)
+    _revisions.forget(project_id)
+    return inserted
+
+
+def _idempotency_key(batch_key, index, description):
+    return hashlib.sha256(f"{batch_key}\x1f{index}\x1f{description}".encode("utf-8")).hexdigest()[:32]
+
+
+# Function to bulk-load tasks from a CSV or JSON file; re-importing the same file adds nothing
+def import_tasks(project_id, data, fmt):
+    """Import tasks from CSV or JSON bytes.
+
+    CSV files use a ``task_description`` (or ``description``) column, or
+    their first column if neither exists. JSON files hold a list of strings
+    or of objects with one of those keys as a string; ``null`` entries are
+    skipped. The file's hash is the batch key.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    descriptions = [
+        description.strip()
+        for description in _read_task_descriptions(data, fmt.lower().lstrip("."))
+        if description and description.strip()
+    ]
+    return insert_tasks(project_id, descriptions, batch_key=hashlib.sha256(data).hexdigest())
+
+
+def _read_task_descriptions(data, fmt):
+    if fmt == "json":
+        items = json.loads(data)
+        if not isinstance(items, list):
+            raise ValueError(f"Task JSON must be a list, not {type(items).__name__}")
+        for item in items:
+            if isinstance(item, dict):
+                description = item.get("task_description")
+                if description is None or description == "":
+                    description = item.get("description")
+                item = description
+            # null entries and objects without a description are skipped
+            if item is None:
+                continue
+            if not isinstance(item, str):
+                raise ValueError(f"Task JSON items must be strings or objects with a string description, not {type(item).__name__}")
+            yield item
+    elif fmt == "csv":
+        reader = csv.reader(io.StringIO(data.decode("utf-8-sig")))
+        header = next(reader, [])
+        lowered = [name.strip().lower() for name in header]
+        for column in ("task_description", "description"):
+            if column in lowered:
+                index = lowered.index(column)
+                break
+        else:
+            # No recognised header: the first row is a task too
+            index = 0
+            if header:
+                yield header[0]
+        for row in reader:
+            if len(row) > index:
+                yield row[index]
+    else:
+        raise ValueError(f"Unsupported task file format: {fmt!r}")
+
+# Function to mark task as completed
+def mark_task_as_completed(task_id, username):
+    with _pool.transaction(write=True) as conn:
+        project_id = _task_project_id(conn, task_id)
+        conn.execute(COMPLETE_TASK_SQL, (username, task_id))
+        _bump_revision(conn, project_id)
+    _revisions.forget(project_id)
+
+# Function to delete task from the database
+def delete_task(task_id):
+    with _pool.transaction(write=True) as conn:
+        project_id = _task_project_id(conn, task_id)
+        conn.execute(DELETE_TASK_SQL, (task_id,))
+        _bump_revision(conn, project_id)
+    _revisions.forget(project_id)
+
+# Function to delete project records from both tables
+def delete_project(project_id):
+    with _pool.transaction(write=True) as conn:
+        conn.execute(DELETE_PROJECT_TASKS_SQL, (project_id,))
+        conn.execute(DELETE_PROJECT_USERS_SQL, (project_id,))
+        conn.execute(DELETE_ORPHAN_AVATARS_SQL)
+        conn.execute(DELETE_PROJECT_ACTIVITY_SQL, (project_id,))
+        conn.execute(DELETE_PROJECT_HOURLY_SQL, (project_id,))
+        conn.execute(DELETE_PROJECT_STATS_SQL, (project_id,))
+        conn.execute(DELETE_PROJECT_CONTRIBUTIONS_SQL, (project_id,))
+        _bump_revision(conn, project_id)
+    _revisions.forget(project_id)
+
+# Function to retrieve tasks from the database
+def get_tasks_by_project_id(project_id, columns=TASK_COLUMNS):
+    with _pool.connection() as conn:
+        return _select(conn, "tasks", columns, "project_id = ? ORDER BY id", (project_id,)).fetchall()
+
+# Function to retrieve completed and total tasks from the project's counters
+def get_completed_and_total_tasks(project_id):
+    with _pool.connection() as conn:
+        return _read_counts(conn, project_id)
+
+# Function to retrieve user contributions from the project's counters
+def get_user_contributions(project_id):
+    with _pool.connection() as conn:
+        return _read_contributions(conn, project_id)
+
+# Function to retrieve a project's task activity per time bucket, for burndown and velocity charts
+def get_burndown(project_id, bucket_seconds=86400):
+    """Return ``ActivityBucket`` rows, oldest first, for each bucket with activity.
+
+    ``start`` is the bucket's Unix time and ``remaining`` the number of open
+    tasks at its end. ``bucket_seconds`` must be a whole number of hours:
+    the series is summed from ``task_activity_hourly``, never from the tasks
+    table or the full activity log.
+    """
+    hours, rest = divmod(int(bucket_seconds), ACTIVITY_HOUR_SECONDS)
+    if rest or hours < 1:
+        raise ValueError(f"bucket_seconds must be a positive multiple of {ACTIVITY_HOUR_SECONDS}, got {bucket_seconds!r}")
+    remaining = 0
+    series = []
+    for bucket, created, completed, deleted, open_change in _fetchall(ACTIVITY_SERIES_SQL, (hours, project_id)):
+        remaining += open_change
+        series.append(ActivityBucket(bucket * hours * ACTIVITY_HOUR_SECONDS, created, completed, deleted, remaining))
+    return series
+
+# Function to insert user data into the database; returns False if the username is taken
+def insert_user_data(username, email, project_id, avatar_hash=None):
+    with _pool.transaction(write=True) as conn:
+        inserted = 1 == conn.execute(INSERT_USER_SQL, (username, email, project_id, avatar_hash)).rowcount
+        if inserted:
+            _bump_revision(conn, project_id)
+    _revisions.forget(project_id)
+    return inserted
+
+# Function to retrieve user data based on project ID and username
+def get_user_by_project_id_and_username(project_id, username, columns=USER_COLUMNS):
+    with _pool.connection() as conn:
+        return _select(conn, "users", columns, "project_id = ? AND username = ?", (project_id, username)).fetchone()
+
+# Function to delete user record based on project ID and username
+def delete_user_record(project_id, username):
+    with _pool.transaction(write=True) as conn:
+        user = _select(conn, "users", ("avatar_hash",), "project_id = ? AND username = ?", (project_id, username)).fetchone()
+        conn.execute(DELETE_USER_SQL, (project_id, username))
+        if user is not None and user.avatar_hash is not None:
+            conn.execute(DELETE_AVATAR_IF_UNUSED_SQL, (user.avatar_hash, user.avatar_hash))
+        _bump_revision(conn, project_id)
+    _revisions.forget(project_id)
+
+# Function to retrieve user data based on project ID
+def get_users_by_project_id(project_id, columns=USER_COLUMNS):
+    with _pool.connection() as conn:
+        return _select(conn, "users", columns, "project_id = ?", (project_id,)).fetchall()
+
+# Function to store the thumbnails of one uploaded image under its content hash
+def store_avatar(digest, thumbnails, mime="image/jpeg"):
+    with _pool.transaction(write=True) as conn:
+        conn.executemany(INSERT_AVATAR_SQL, ((digest, size, mime, data) for size, data in thumbnails.items()))
+
+# Function to check whether thumbnails for a content hash are already stored
+def has_avatar(digest):
+    return _fetchone(AVATAR_EXISTS_SQL, (digest,)) is not None
+
+# Function to retrieve one thumbnail's bytes, streamed straight from its blob
+def get_avatar(digest, size):
+    with _pool.connection() as conn:
+        row = conn.execute(AVATAR_ROWID_SQL, (digest, size)).fetchone()
+        return _read_blob(conn, "avatars", "data", row[0], AVATAR_SQL) if row else None
+
+# Function to page through users still holding a full-size legacy image
+def get_legacy_user_images(after_id=0, limit=50):
+    """Yield ``(user_id, image_bytes)``, reading one legacy BLOB at a time."""
+    while True:
+        with _pool.connection() as conn:
+            ids = [row[0] for row in conn.execute(LEGACY_IMAGE_IDS_SQL, (after_id, limit))]
+        if not ids:
+            return
+        for user_id in ids:
+            with _pool.connection() as conn:
+                image = _read_blob(conn, "users", "image", user_id, LEGACY_IMAGE_SQL)
+            after_id = user_id
+            if image is not None:
+                yield user_id, image
+
+# Function to point a user at their thumbnails and drop the legacy image
+def set_user_avatar(user_id, digest):
+    with _pool.transaction(write=True) as conn:
+        row = conn.execute(USER_PROJECT_SQL, (user_id,)).fetchone()
+        conn.execute(SET_USER_AVATAR_SQL, (digest, user_id))
+        if row:
+            _bump_revision(conn, row[0])
+    if row:
+        _revisions.forget(row[0])
+
+# Function to give pages freed by large deletes back to the filesystem
+def vacuum():
+    try:
+        with _pool.connection() as conn:
+            conn.execute("VACUUM")
+    except sqlite3.OperationalError:
+        # Another connection holds a lock; freed pages still get reused by later writes
+        pass
+
+# Function to look up a cached LLM response no older than ``min_created_at``
+def get_cached_response(key, min_created_at):
+    row = _fetchone(LLM_CACHE_GET_SQL, (key, min_created_at))
+    return row[0] if row else None
+
+# Function to cache an LLM response, then expire and evict least-recently-used entries; returns how many went
+def store_cached_response(key, response, now, min_created_at, max_entries, max_bytes, touched=()):
+    """``touched`` holds ``(last_used, key)`` pairs for hits since the last store.
+
+    They are written before anything is evicted, so eviction sees them.
+    """
+    with _pool.transaction(write=True) as conn:
+        conn.executemany(LLM_CACHE_TOUCH_SQL, touched)
+        conn.execute(LLM_CACHE_PUT_SQL, (key, response, len(response.encode("utf-8")), now, now))
+        removed = conn.execute(LLM_CACHE_EXPIRE_SQL, (min_created_at,)).rowcount
+        count, total = conn.execute(LLM_CACHE_TOTALS_SQL).fetchone()
+        victims = []
+        if count > max_entries or total > max_bytes:
+            for victim, size in conn.execute(LLM_CACHE_LRU_SQL):
+                if count <= max_entries and total <= max_bytes:
+                    break
+                victims.append((victim,))
+                count -= 1
+                total -= size
+            conn.executemany(LLM_CACHE_DELETE_SQL, victims)
+    return removed + len(victims)
+
+# Function to retrieve a project's current revision, for polling without re-reading its data
+def get_project_revision(project_id):
+    """Counter that moves on every task or member write to the project, from any process.
+
+    Usually answered from memory after one ``PRAGMA data_version``.
+    """
+    with _pool.connection() as conn:
+        return _revisions.revision(_pool, conn, project_id)
+
+# Function to retrieve everything OneDash renders for a project in one read transaction
+def get_project_snapshot(project_id):
+    """Return members, tasks, completed/total counts and contributions for a project.
+
+    Counts come from the project's counter tables, not from aggregating the
+    task rows. The result is cached per process and reused
+    until the project's revision moves, including for writes made by other
+    processes.
+    """
+    with _pool.connection() as conn:
+        snapshot = _snapshots.get(project_id, _revisions.revision(_pool, conn, project_id))
+        if snapshot is not None:
+            return snapshot
+        with _pool.transaction():
+            # Read in the same transaction as the rows, so the two always match
+            revision = _read_revision(conn, project_id)
+            members = tuple(_select(conn, "users", USER_COLUMNS, "project_id = ?", (project_id,)))
+            tasks = tuple(_select(conn, "tasks", TASK_COLUMNS, "project_id = ? ORDER BY id", (project_id,)))
+            completed, total = _read_counts(conn, project_id)
+            contributions = tuple(_read_contributions(conn, project_id))
+
+    snapshot = ProjectSnapshot(members, tasks, completed, total, contributions, revision)
+    _snapshots.put(project_id, snapshot)
+    return snapshot
@@ -0,0 +1,281 @@
+"""Asyncio streaming providers for the Groq and Replicate LLM paths.
+
+Providers expose completions as async generators. They run on one
+background event loop per process, so the Streamlit script thread only
+waits on a queue. ``iter_sync`` adapts an async generator into the plain
+iterator ``st.write_stream`` expects. When that iterator is closed, the
+upstream request is cancelled and its connection torn down. That happens
+when the stream finishes early, when a rerun or page change unwinds the
+script, or when the iterator is garbage collected. ``submit`` schedules
+any coroutine on the same loop and returns a ``concurrent.futures.Future``,
+so several completions can run side by side with other work.
+"""
+import asyncio
+import email.utils
+import hashlib
+import os
+import queue
+import random
+import threading
+import time
+
+import httpx
+
+from conversation import estimate_num_tokens, message_tokens
+from rate_limit import COMPLETION_TOKENS, get_limiter
+from sse import EventStreamDecoder, chat_delta
+
+ARCTIC_MODEL = "snowflake/snowflake-arctic-instruct"
+GROQ_CHAT_URL = os.getenv("WORKPOD_GROQ_CHAT_URL", "https://api.groq.com/openai/v1/chat/completions")
+# Connections kept open to the Groq API, shared by every session
+POOL_MAXSIZE = int(os.getenv("WORKPOD_HTTP_POOL_MAXSIZE", "16"))
+MAX_RETRIES = int(os.getenv("WORKPOD_HTTP_MAX_RETRIES", "3"))
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 20.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# (connect, read) seconds
+TIMEOUT = (10, 180)
+
+_ITEM, _DONE, _ERROR = range(3)
+
+
+def retry_after_seconds(value):
+    """Seconds requested by a ``Retry-After`` header (delta-seconds or HTTP-date), or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def backoff_delay(attempt, retry_after=None, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """Seconds to wait before retry number ``attempt`` (0-based).
+
+    Full jitter over an exponentially growing window, but never less than
+    what the server asked for in ``Retry-After``.
+    """
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, cap))
+    return delay
+
+
+def chat_payload(messages, model, temperature=0.6, top_p=0.9):
+    return {
+        "model": model,
+        "messages": messages,
+        "stream": True,
+        "temperature": temperature,
+        "top_p": top_p,
+    }
+
+
+class _LoopThread:
+    """An event loop running forever on a daemon thread."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="workpod-llm", daemon=True)
+        self.thread.start()
+
+    def submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+
+_loop_thread = None
+_loop_lock = threading.Lock()
+
+
+def submit(coro):
+    """Run ``coro`` on the shared background loop; returns a ``concurrent.futures.Future``."""
+    global _loop_thread
+    if _loop_thread is None:
+        with _loop_lock:
+            if _loop_thread is None:
+                _loop_thread = _LoopThread()
+    return _loop_thread.submit(coro)
+
+
+async def collect(stream):
+    """Join every chunk of an async stream into one string."""
+    return "".join([chunk async for chunk in stream])
+
+
+def iter_sync(stream, on_idle=None, idle_seconds=0.25):
+    """Iterate the async generator ``stream`` from synchronous code.
+
+    Exceptions raised by the stream are re-raised here. Closing the returned
+    generator cancels the stream on the background loop. ``on_idle`` is
+    called on the calling thread every ``idle_seconds`` without a chunk.
+    """
+    items = queue.SimpleQueue()
+
+    async def pump():
+        try:
+            async for chunk in stream:
+                items.put((_ITEM, chunk))
+        except asyncio.CancelledError:
+            raise
+        except BaseException as exc:
+            items.put((_ERROR, exc))
+        else:
+            items.put((_DONE, None))
+        finally:
+            await stream.aclose()
+
+    future = submit(pump())
+    try:
+        while True:
+            try:
+                kind, value = items.get(timeout=idle_seconds if on_idle else None)
+            except queue.Empty:
+                on_idle()
+                continue
+            if kind == _DONE:
+                return
+            if kind == _ERROR:
+                raise value
+            yield value
+    finally:
+        future.cancel()
+
+
+class AsyncGroqProvider:
+    """Streams Groq chat completions over a shared ``httpx.AsyncClient``.
+
+    Connection errors, 429 and 5xx responses are retried with jittered
+    exponential backoff, waiting at least as long as any ``Retry-After``
+    header asks. Retries only happen before the stream starts.
+    """
+
+    def __init__(self, url=GROQ_CHAT_URL, max_connections=POOL_MAXSIZE, max_retries=MAX_RETRIES, timeout=TIMEOUT):
+        self.url = url
+        self.max_retries = max_retries
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        connect, read = timeout
+        self.timeout = httpx.Timeout(read, connect=connect)
+        self._client = None
+
+    def _http(self):
+        # Created on first use so it belongs to the loop that drives it
+        if self._client is None:
+            self._client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+        return self._client
+
+    async def _open(self, payload, api_key, limiter=None):
+        client = self._http()
+        request = client.build_request("POST", self.url, json=payload, headers={"Authorization": f"Bearer {api_key}"})
+        attempt = 0
+        while True:
+            try:
+                response = await client.send(request, stream=True)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.ReadTimeout, httpx.RemoteProtocolError):
+                if attempt >= self.max_retries:
+                    raise
+                delay = backoff_delay(attempt)
+            else:
+                if response.status_code < 400:
+                    return response
+                await response.aread()
+                await response.aclose()
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    response.raise_for_status()
+                delay = backoff_delay(attempt, retry_after_seconds(response.headers.get("Retry-After")))
+                if limiter is not None and response.status_code == 429:
+                    limiter.pause(delay)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def stream_chat(self, messages, api_key, model, temperature=0.6, top_p=0.9, ticket=None):
+        """Yield content deltas of a streamed chat completion.
+
+        With a ``rate_limit.Ticket`` the request first waits for its turn
+        under the key's shared limits.
+        """
+        limiter = None
+        if ticket is not None:
+            limiter = get_limiter(api_key)
+            prompt_tokens = sum(message_tokens(message) for message in messages)
+            ticket.tokens = prompt_tokens + COMPLETION_TOKENS
+            await limiter.acquire(ticket)
+        parts = []
+        try:
+            response = await self._open(chat_payload(messages, model, temperature, top_p), api_key, limiter)
+            try:
+                decoder = EventStreamDecoder()
+                body = response.aiter_bytes()
+                async for data in body:
+                    for payload in decoder.feed(data):
+                        chunk = chat_delta(payload)
+                        if chunk is None:
+                            # Finish the body so the connection is kept alive
+                            async for _ in body:
+                                pass
+                            return
+                        if chunk:
+                            parts.append(chunk)
+                            yield chunk
+                for payload in decoder.close():
+                    chunk = chat_delta(payload)
+                    if chunk:
+                        parts.append(chunk)
+                        yield chunk
+            finally:
+                await response.aclose()
+        finally:
+            if limiter is not None:
+                limiter.settle(ticket, prompt_tokens + estimate_num_tokens("".join(parts)))
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class AsyncReplicateProvider:
+    """Streams Snowflake Arctic output through ``replicate.async_stream``."""
+
+    def __init__(self, model=ARCTIC_MODEL):
+        self.model = model
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def client(self, api_key):
+        """One ``replicate.Client`` per token, reused across requests and sessions."""
+        # Imported on first use; most sessions never pick this provider
+        import replicate
+
+        if not api_key:
+            return replicate
+        key = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = replicate.Client(api_token=api_key)
+            return self._clients[key]
+
+    async def stream(self, prompt, temperature, top_p=0.9, api_key=None, model=None):
+        client = self.client(api_key)
+        events = await client.async_stream(
+            model or self.model,
+            input={"prompt": prompt, "prompt_template": r"{prompt}", "temperature": temperature, "top_p": top_p},
+        )
+        async for event in events:
+            yield str(event)
+
+    async def stream_chat(self, messages, api_key, model, temperature=0.6, top_p=0.9, ticket=None):
+        """Yield the completion of ``messages`` in Arctic's chat template."""
+        async for chunk in self.stream(arctic_prompt(messages), temperature, top_p, api_key, model):
+            yield chunk
+
+
+def arctic_prompt(messages):
+    """``messages`` in Snowflake Arctic's ``<|im_start|>`` chat template, ready for the assistant's turn."""
+    prompt = [f"<|im_start|>{message['role']}\n{message['content']}<|im_end|>" for message in messages]
+    prompt.append("<|im_start|>assistant")
+    return "\n".join(prompt)
@@ -0,0 +1,204 @@
+"""Persistent cache of completed LLM responses.
+
+Identical requests are common: the same project idea submitted again, and
+the six fixed Oasis mood prompts. A response is stored in the ``llm_cache``
+table of user_data.db once its stream finishes. The key is the provider,
+the model, the temperature and the message list with whitespace
+normalised. A cached response is replayed as a stream, so callers cannot
+tell a hit from a fresh completion. Entries expire after ``LLM_CACHE_TTL``
+seconds. The least recently used are evicted past ``LLM_CACHE_MAX_ENTRIES``
+entries or ``LLM_CACHE_MAX_BYTES`` bytes of text. Streams that fail or are
+cancelled part-way are never stored. The SQLite calls run on worker
+threads, off the shared event loop. A lookup is a plain read; the hit's
+new last-use time is written along with the next stored response.
+
+``ResultCache`` sits in front of it for results that are fetched in the
+background, so a page can hand out the same pending future to every
+caller instead of starting a second request.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from db import get_cached_response, store_cached_response
+
+LLM_CACHE_TTL = float(os.getenv("WORKPOD_LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("WORKPOD_LLM_CACHE_MAX_ENTRIES", "1000"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("WORKPOD_LLM_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+
+_WHITESPACE = re.compile(r"\s+")
+# Replayed hits are streamed word by word, like a live completion
+_REPLAY_CHUNK = re.compile(r"\s*\S+\s*|\s+")
+
+
+class CacheStats:
+    """Process-wide hit/miss counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.bypassed = 0
+            self.stores = 0
+            self.evictions = 0
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "stores": self.stores,
+                "evictions": self.evictions,
+            }
+
+
+stats = CacheStats()
+
+
+class PendingTouches:
+    """Last-use times of cache hits not yet written to ``llm_cache``.
+
+    A hit is a plain read. Its new ``last_used`` only matters to eviction,
+    which only happens when a response is stored, so the times are kept
+    here and written in that same transaction.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._times = {}
+
+    def add(self, key, now):
+        with self._lock:
+            self._times[key] = now
+
+    def take(self):
+        """``[(last_used, key), ...]`` for every pending hit, clearing them."""
+        with self._lock:
+            times, self._times = self._times, {}
+        return [(now, key) for key, now in times.items()]
+
+    def restore(self, touched):
+        with self._lock:
+            for now, key in touched:
+                self._times[key] = max(now, self._times.get(key, now))
+
+
+_touches = PendingTouches()
+
+
+def normalise_messages(messages):
+    """Messages reduced to what changes the answer: role and whitespace-collapsed content.
+
+    ``messages`` may also be a single prompt string (the Replicate path).
+    """
+    if isinstance(messages, str):
+        return _WHITESPACE.sub(" ", messages).strip()
+    return [[message["role"], _WHITESPACE.sub(" ", message["content"]).strip()] for message in messages]
+
+
+def cache_key(provider, model, temperature, messages):
+    spec = [provider, model, round(float(temperature), 4), normalise_messages(messages)]
+    return hashlib.sha256(json.dumps(spec, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+async def cached_stream(stream, provider, model, temperature, messages, enabled=True):
+    """Wrap the async stream factory ``stream`` with the response cache.
+
+    ``stream`` is called only on a miss, or when ``enabled`` is false. With
+    ``enabled`` false the cache is neither read nor written, for users who
+    want a fresh sample.
+    """
+    if not enabled:
+        stats.add(bypassed=1)
+        async for chunk in stream():
+            yield chunk
+        return
+
+    key = cache_key(provider, model, temperature, messages)
+    # SQLite calls run on worker threads: a busy writer must not stall every stream on the loop
+    cached = await asyncio.to_thread(get_cached_response, key, time.time() - LLM_CACHE_TTL)
+    if cached is not None:
+        stats.add(hits=1)
+        _touches.add(key, time.time())
+        for chunk in _REPLAY_CHUNK.findall(cached):
+            yield chunk
+        return
+
+    stats.add(misses=1)
+    parts = []
+    async for chunk in stream():
+        parts.append(chunk)
+        yield chunk
+    # Only reached when the stream ran to completion
+    if parts:
+        now = time.time()
+        touched = _touches.take()
+        try:
+            evicted = await asyncio.to_thread(
+                store_cached_response,
+                key, "".join(parts), now, now - LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_MAX_BYTES, touched,
+            )
+        except BaseException:
+            _touches.restore(touched)
+            raise
+        stats.add(stores=1, evictions=evicted)
+
+
+class ResultCache:
+    """In-process futures for background completions, shared across sessions.
+
+    ``get_or_submit`` hands out the running or finished future for ``key``
+    and only calls ``submit`` when there is none, it failed, or it is older
+    than ``ttl`` seconds. Concurrent clicks on the same Oasis mood therefore
+    share one request, and repeat clicks resolve immediately. At most
+    ``max_entries`` keys are kept, least recently used first out. Futures
+    handed out again are counted in ``reused``; ``stats`` only counts the
+    SQLite response cache.
+    """
+
+    def __init__(self, ttl=LLM_CACHE_TTL, max_entries=64):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.reused = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get_or_submit(self, key, submit, refresh=False):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not refresh and self._usable(entry, now):
+                self._entries.move_to_end(key)
+                self.reused += 1
+                return entry[1]
+            future = submit()
+            self._entries[key] = (now, future)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return future
+
+    def _usable(self, entry, now):
+        created, future = entry
+        if not future.done():
+            return True
+        return not future.cancelled() and future.exception() is None and now - created < self.ttl
+
+
+# Oasis mood summaries, keyed by (provider, model, mood)
+mood_summaries = ResultCache()
@@ -0,0 +1,186 @@
+"""Registry of the LLM providers the Arctic and Oasis pages can stream from.
+
+Each provider is described once by a ``ProviderSpec``: its sidebar label,
+default model, where its API key comes from and the chat avatar to use.
+Every provider has the same streaming interface,
+``stream_chat(messages, api_key, model, temperature, top_p, ticket)``, an
+async generator of text chunks. The pages therefore never branch on which
+provider is selected.
+
+Besides Groq and Replicate there is ``MockProvider``, a deterministic
+local stand-in for load tests that costs no credits. It answers task
+breakdowns with a numbered task list and Oasis prompts with a six-number
+array, or replays recorded responses from ``WORKPOD_MOCK_REPLAY``. Its
+time to first token, tokens per second and injected failures are set by
+the ``WORKPOD_MOCK_*`` variables. It only appears in the sidebar when
+``WORKPOD_MOCK_PROVIDER=1``. ``WORKPOD_DEFAULT_PROVIDER`` picks the
+preselected provider, e.g. ``mock`` for an offline load test.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+
+import httpx
+
+from llm_async import ARCTIC_MODEL, AsyncGroqProvider, AsyncReplicateProvider
+
+DEFAULT_GROQ_MODEL = os.getenv("WORKPOD_GROQ_MODEL", "llama-3.1-8b-instant")
+DEFAULT_PROVIDER = os.getenv("WORKPOD_DEFAULT_PROVIDER", "groq")
+MOCK_PROVIDER_ENABLED = os.getenv("WORKPOD_MOCK_PROVIDER") == "1"
+MOCK_TTFT = float(os.getenv("WORKPOD_MOCK_TTFT", "0.3"))
+MOCK_TOKENS_PER_SECOND = float(os.getenv("WORKPOD_MOCK_TOKENS_PER_SECOND", "200"))
+# Share of requests failing with MOCK_ERROR_STATUS before the first token
+MOCK_ERROR_RATE = float(os.getenv("WORKPOD_MOCK_ERROR_RATE", "0"))
+MOCK_ERROR_STATUS = int(os.getenv("WORKPOD_MOCK_ERROR_STATUS", "503"))
+# Share of requests whose connection drops halfway through the answer
+MOCK_DROP_RATE = float(os.getenv("WORKPOD_MOCK_DROP_RATE", "0"))
+MOCK_REPLAY = os.getenv("WORKPOD_MOCK_REPLAY")
+MOCK_SEED = int(os.getenv("WORKPOD_MOCK_SEED", "0"))
+
+_TOKEN = re.compile(r"\s*\S+|\s+")
+_TASK_STEPS = (
+    "Define the scope and user stories", "Design the data model", "Set up the project repository and CI",
+    "Build the core API endpoints", "Implement the main user interface", "Add authentication and roles",
+    "Integrate third-party services", "Write automated tests", "Run a usability review",
+    "Deploy to production and monitor",
+)
+
+
+class ProviderSpec:
+    """How the sidebar offers a provider and how to build it."""
+
+    def __init__(
+        self, name, label, factory, default_model, secret=None, icon="./WP.png", model_editable=False,
+        rate_limited=False, check_key=bool, key_help=None, hidden=False,
+    ):
+        self.name = name
+        self.label = label
+        self.factory = factory
+        self.default_model = default_model
+        # Name of the Streamlit secret / environment variable holding the key; None needs no key
+        self.secret = secret
+        self.icon = icon
+        self.model_editable = model_editable
+        # Whether requests share the per-key queue in rate_limit
+        self.rate_limited = rate_limited
+        self.check_key = check_key
+        self.key_help = key_help
+        self.hidden = hidden
+
+
+_specs = {}
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def register_provider(spec):
+    _specs[spec.name] = spec
+
+
+def provider_specs():
+    """Providers to offer in the sidebar, in registration order."""
+    return [spec for spec in _specs.values() if not spec.hidden]
+
+
+def provider_spec(name):
+    return _specs[name]
+
+
+def get_provider(name):
+    """Process-wide instance of the provider registered as ``name``."""
+    provider = _providers.get(name)
+    if provider is None:
+        with _providers_lock:
+            provider = _providers.get(name)
+            if provider is None:
+                provider = _providers[name] = _specs[name].factory()
+    return provider
+
+
+class MockProvider:
+    """Deterministic offline provider with configurable latency and failures.
+
+    The answer depends only on the messages, the model and ``seed``.
+    Whether a request fails depends only on ``seed`` and how many requests
+    this instance has served, so a load test replays identically.
+    """
+
+    def __init__(
+        self, ttft=MOCK_TTFT, tokens_per_second=MOCK_TOKENS_PER_SECOND, error_rate=MOCK_ERROR_RATE,
+        error_status=MOCK_ERROR_STATUS, drop_rate=MOCK_DROP_RATE, replay=MOCK_REPLAY, seed=MOCK_SEED,
+    ):
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.drop_rate = drop_rate
+        self.seed = seed
+        self.responses = load_replay(replay) if replay else []
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def respond(self, messages, model):
+        """The full answer the mock streams for ``messages``."""
+        digest = hashlib.sha256(json.dumps([self.seed, model, messages], sort_keys=True).encode("utf-8")).digest()
+        rng = random.Random(digest)
+        if self.responses:
+            return self.responses[rng.randrange(len(self.responses))]
+        prompt = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "").lower()
+        if "array" in prompt or "music" in prompt:
+            values = ", ".join(f"{rng.random():.2f}" for _ in range(6))
+            return f"Here is a profile that matches your mood: [{values}]"
+        if "task" in prompt:
+            steps = rng.sample(_TASK_STEPS, rng.randint(5, 8))
+            return "\n".join(f"{i}. {step} - expected time: {rng.randint(1, 5)} days" for i, step in enumerate(steps, 1))
+        return " ".join(rng.choice(("Sure", "here", "is", "a", "short", "mock", "answer")) for _ in range(rng.randint(10, 40)))
+
+    async def stream_chat(self, messages, api_key, model, temperature=0.6, top_p=0.9, ticket=None):
+        with self._lock:
+            self.requests += 1
+            fate = random.Random(f"{self.seed}:{self.requests}").random()
+        tokens = _TOKEN.findall(self.respond(messages, model))
+        start = time.monotonic()
+        await asyncio.sleep(self.ttft)
+        if fate < self.error_rate:
+            request = httpx.Request("POST", "http://mock.invalid/v1/chat/completions")
+            response = httpx.Response(self.error_status, request=request, text='{"error": {"message": "injected failure"}}')
+            response.raise_for_status()
+        drop_at = len(tokens) // 2 if fate < self.error_rate + self.drop_rate else None
+        for i, token in enumerate(tokens):
+            if i == drop_at:
+                raise httpx.RemoteProtocolError("mock connection dropped mid-stream")
+            if i and self.tokens_per_second:
+                # Paced against the start time so per-token sleeps do not drift
+                delay = start + self.ttft + i / self.tokens_per_second - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            yield token
+
+
+def load_replay(path):
+    """Recorded answers: a JSON list of strings, or JSON Lines with a "response" field."""
+    with open(path, encoding="utf-8") as handle:
+        text = handle.read()
+    if text.lstrip().startswith("["):
+        return json.loads(text)
+    return [json.loads(line)["response"] for line in text.splitlines() if line.strip()]
+
+
+register_provider(ProviderSpec(
+    "groq", "Groq - Llama 3.1 8B Instant", AsyncGroqProvider, DEFAULT_GROQ_MODEL,
+    secret="GROQ_API_KEY", model_editable=True, rate_limited=True,
+))
+register_provider(ProviderSpec(
+    "replicate", "Snowflake Arctic via Replicate (legacy)", AsyncReplicateProvider, ARCTIC_MODEL,
+    secret="REPLICATE_API_TOKEN", icon="./Snowflake_Logomark_blue.svg",
+    check_key=lambda key: key.startswith("r8_") and len(key) == 40,
+    key_help="**Don't have an API token?** Head over to [Replicate](https://replicate.com) to sign up for one.",
+))
+register_provider(ProviderSpec(
+    "mock", "Local mock (load testing)", MockProvider, "mock", hidden=not MOCK_PROVIDER_ENABLED,
+))
@@ -0,0 +1,418 @@
+"""Opt-in timing and counters for WorkPod script runs.
+
+Set ``WORKPOD_METRICS=1`` to turn it on. Every Streamlit script run then
+records the time spent in its page branch of ``main()`` and in the named
+``span`` blocks inside it. It also counts and times each SQL statement the
+data layer issues. For each LLM completion it records the provider, model,
+cache outcome, time to first token, tokens and tokens per second.
+
+Runs add to a process-wide ``Registry``. ``prometheus_text()`` renders it in
+the Prometheus text format, and after each run it is written to
+``WORKPOD_METRICS_PROM`` (for node_exporter's textfile collector) if that is
+set. ``WORKPOD_METRICS_JSONL`` gets one JSON line per script run. Opening the
+app with ``?debug=1`` shows the current run's breakdown in the sidebar.
+
+Disabled, ``span`` hands back one shared no-op context manager, ``enter_page``
+returns at once, connections are plain ``sqlite3.Connection`` objects and
+LLM streams are passed through unwrapped.
+"""
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache
+
+from conversation import estimate_num_tokens
+
+ENABLED = os.getenv("WORKPOD_METRICS") == "1"
+PROM_PATH = os.getenv("WORKPOD_METRICS_PROM")
+JSONL_PATH = os.getenv("WORKPOD_METRICS_JSONL")
+# Upper bounds of the histogram buckets
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_RATE_BUCKETS = (10, 25, 50, 100, 200, 400, 800, 1600)
+# SQL statements are labelled by their first characters, whitespace collapsed
+SQL_LABEL_LENGTH = 80
+
+HELP = {
+    "workpod_script_run_seconds": "Wall time of a Streamlit script run, by page.",
+    "workpod_page_seconds": "Wall time spent in a page branch of main().",
+    "workpod_span_seconds": "Wall time of a named span inside a page.",
+    "workpod_sql_statements_total": "SQL statements executed, by statement.",
+    "workpod_sql_seconds_total": "Time spent executing and fetching SQL statements, by statement.",
+    "workpod_llm_requests_total": "LLM completions, by provider, model, cache outcome and status.",
+    "workpod_llm_ttft_seconds": "Time from requesting a completion to its first chunk.",
+    "workpod_llm_duration_seconds": "Time from requesting a completion to its last chunk.",
+    "workpod_llm_tokens_per_second": "Estimated completion tokens per second after the first chunk.",
+    "workpod_llm_completion_tokens_total": "Estimated completion tokens streamed.",
+}
+
+_NULL_SPAN = nullcontext()
+_local = threading.local()
+_export_lock = threading.Lock()
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Registry:
+    """Process-wide counters and histograms, keyed by metric name and label values."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        # (name, labels) -> [bounds, per-bucket counts with +Inf last, sum]
+        self._histograms = {}
+
+    def inc(self, name, amount=1.0, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + amount
+
+    def observe(self, name, value, buckets=SECONDS_BUCKETS, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [buckets, [0] * (len(buckets) + 1), 0.0]
+            histogram[1][bisect_left(histogram[0], value)] += 1
+            histogram[2] += value
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def prometheus_text(self):
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, [bounds, list(counts), total]) for key, (bounds, counts, total) in self._histograms.items())
+        lines = []
+        seen = set()
+
+        def header(name, kind):
+            if name not in seen:
+                seen.add(name)
+                if name in HELP:
+                    lines.append(f"# HELP {name} {HELP[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            header(name, "counter")
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        for (name, labels), (bounds, counts, total) in histograms:
+            header(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', f'{bound:g}')])} {cumulative}")
+            cumulative += counts[-1]
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total:g}")
+            lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def prometheus_text():
+    return registry.prometheus_text()
+
+
+class ScriptRun:
+    """What one script run spent its time on."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.page = None
+        self.seconds = None
+        # [name, offset from the start of the run, seconds]
+        self.spans = []
+        # statement -> [executions, seconds]
+        self.sql = {}
+        self.llm = []
+        self._page_start = None
+
+    def elapsed(self):
+        return self.seconds if self.seconds is not None else time.perf_counter() - self.start
+
+    def as_dict(self):
+        return {
+            "started_at": self.started_at,
+            "page": self.page,
+            "seconds": round(self.elapsed(), 6),
+            "spans": [{"name": name, "offset": round(offset, 6), "seconds": round(seconds, 6)} for name, offset, seconds in self.spans],
+            "sql": [{"statement": statement, "count": count, "seconds": round(seconds, 6)} for statement, (count, seconds) in self.sql.items()],
+            "llm": [call.as_dict() for call in self.llm],
+        }
+
+
+def current_run():
+    """The script run being recorded on this thread, or None."""
+    return getattr(_local, "run", None)
+
+
+@contextmanager
+def script_run():
+    """Record the enclosed script run; yields None when metrics are disabled."""
+    if not ENABLED:
+        yield None
+        return
+    run = ScriptRun()
+    _local.run = run
+    try:
+        yield run
+    finally:
+        _local.run = None
+        end = time.perf_counter()
+        run.seconds = end - run.start
+        page = run.page or ""
+        if run._page_start is not None:
+            seconds = end - run._page_start
+            run.spans.append([f"page:{page}", run._page_start - run.start, seconds])
+            registry.observe("workpod_page_seconds", seconds, page=page)
+        registry.observe("workpod_script_run_seconds", run.seconds, page=page)
+        export(run)
+
+
+def enter_page(name):
+    """Mark the start of the page branch ``name``; it lasts until the run ends."""
+    if not ENABLED:
+        return
+    run = current_run()
+    if run is not None and run.page is None:
+        run.page = name
+        run._page_start = time.perf_counter()
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        run = current_run()
+        if run is not None:
+            run.spans.append([self.name, self.start - run.start, seconds])
+        registry.observe("workpod_span_seconds", seconds, span=self.name)
+        return False
+
+
+def span(name):
+    """Context manager timing the block as ``name`` (a shared no-op when disabled)."""
+    if not ENABLED:
+        return _NULL_SPAN
+    return _Span(name)
+
+
+@lru_cache(maxsize=1024)
+def sql_label(sql):
+    return re.sub(r"\s+", " ", sql).strip()[:SQL_LABEL_LENGTH]
+
+
+def record_sql(sql, seconds, executions=1):
+    statement = sql_label(sql)
+    run = current_run()
+    if run is not None:
+        totals = run.sql.setdefault(statement, [0, 0.0])
+        totals[0] += executions
+        totals[1] += seconds
+    if executions:
+        registry.inc("workpod_sql_statements_total", executions, statement=statement)
+    registry.inc("workpod_sql_seconds_total", seconds, statement=statement)
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that times its statement's execution and the fetching of its rows."""
+
+    _sql = None
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._sql = sql
+            record_sql(sql, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._sql = sql
+            record_sql(sql, time.perf_counter() - start)
+
+    def _fetch(self, fetch, *args):
+        start = time.perf_counter()
+        try:
+            return fetch(*args)
+        finally:
+            if self._sql is not None:
+                record_sql(self._sql, time.perf_counter() - start, executions=0)
+
+    def fetchone(self):
+        return self._fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._fetch(super().fetchmany, size if size is not None else self.arraysize)
+
+    def fetchall(self):
+        return self._fetch(super().fetchall)
+
+    def __next__(self):
+        return self._fetch(super().__next__)
+
+
+class TimedConnection(sqlite3.Connection):
+    """``sqlite3.Connection`` whose statements are counted and timed.
+
+    ``Connection.execute`` does not go through an overridden ``cursor()``,
+    so both are replaced here.
+    """
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def connection_factory():
+    """``factory`` argument for ``sqlite3.connect``."""
+    return TimedConnection if ENABLED else sqlite3.Connection
+
+
+class LLMCall:
+    """Timings of one completion, filled in as its stream is consumed."""
+
+    def __init__(self, provider, model, cached):
+        self.provider = provider
+        self.model = model
+        # "bypass" when the cache is off; otherwise "hit" unless the provider was called
+        self.cache = "hit" if cached else "bypass"
+        self.status = "pending"
+        self.ttft = None
+        self.seconds = None
+        self.tokens = 0
+        self.tokens_per_second = None
+
+    def request(self, factory):
+        """Wrap the provider stream factory to note that the cache missed."""
+        def wrapped():
+            if self.cache == "hit":
+                self.cache = "miss"
+            return factory()
+        return wrapped
+
+    async def measure(self, stream):
+        parts = []
+        start = time.perf_counter()
+        first = None
+        self.status = "error"
+        try:
+            async for chunk in stream:
+                if first is None:
+                    first = time.perf_counter()
+                    self.ttft = first - start
+                parts.append(chunk)
+                yield chunk
+            self.status = "ok"
+        except (GeneratorExit, asyncio.CancelledError):
+            # The consumer stopped reading, e.g. the user navigated away and
+            # iter_sync cancelled the task driving the stream
+            self.status = "cancelled"
+            raise
+        finally:
+            self._finish(start, first, "".join(parts))
+
+    def _finish(self, start, first, text):
+        end = time.perf_counter()
+        self.seconds = end - start
+        self.tokens = estimate_num_tokens(text) if text else 0
+        labels = {"provider": self.provider}
+        registry.inc(
+            "workpod_llm_requests_total", provider=self.provider, model=self.model, cache=self.cache, status=self.status
+        )
+        registry.inc("workpod_llm_completion_tokens_total", self.tokens, **labels)
+        registry.observe("workpod_llm_duration_seconds", self.seconds, cache=self.cache, **labels)
+        if self.ttft is not None:
+            registry.observe("workpod_llm_ttft_seconds", self.ttft, cache=self.cache, **labels)
+        if first is not None and end > first and self.tokens > 1:
+            self.tokens_per_second = self.tokens / (end - first)
+            registry.observe(
+                "workpod_llm_tokens_per_second", self.tokens_per_second, buckets=TOKEN_RATE_BUCKETS,
+                cache=self.cache, **labels
+            )
+
+    def as_dict(self):
+        return {
+            "provider": self.provider, "model": self.model, "cache": self.cache, "status": self.status,
+            "ttft": self.ttft, "seconds": self.seconds, "tokens": self.tokens,
+            "tokens_per_second": self.tokens_per_second,
+        }
+
+
+class _NullCall:
+    def request(self, factory):
+        return factory
+
+    def measure(self, stream):
+        return stream
+
+
+_NULL_CALL = _NullCall()
+
+
+def llm_call(provider, model, cached=True):
+    """Timings for a completion about to be requested, attached to the current run."""
+    if not ENABLED:
+        return _NULL_CALL
+    call = LLMCall(provider, model, cached)
+    run = current_run()
+    if run is not None:
+        run.llm.append(call)
+    return call
+
+
+def export(run):
+    """Append ``run`` to the JSON Lines log and rewrite the Prometheus file, where configured."""
+    if not (JSONL_PATH or PROM_PATH):
+        return
+    with _export_lock:
+        if JSONL_PATH:
+            with open(JSONL_PATH, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps(run.as_dict()) + "\n")
+        if PROM_PATH:
+            # Written aside and renamed so a scrape never reads half a file
+            partial = f"{PROM_PATH}.{os.getpid()}.tmp"
+            with open(partial, "w", encoding="utf-8") as handle:
+                handle.write(prometheus_text())
+            os.replace(partial, PROM_PATH)
@@ -0,0 +1,104 @@
+"""Precomputed per-mood candidate pools for Oasis.
+
+A mood click samples its target profile uniformly from a fixed box in
+``MOOD_AUDIO_RANGES``. A track can only be a top-k answer for some point q
+in a box if its smallest possible distance to the box is at most
+d_k(q). For every q in the box, d_k(q) is itself at most R, the k-th
+smallest of the tracks' largest possible distances to the box. So keeping
+the tracks with ``min_dist <= R`` loses nothing. Splitting the box and
+applying the same test to each half, using only the parent's survivors,
+tightens the set quickly. The union over all the cells is the pool. It
+always contains every possible top-k answer for that mood, so re-ranking
+the pool gives exactly what a full scan would.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from staging import staged_directory
+
+POOL_FORMAT_VERSION = 1
+POOL_TOP_K = 10
+POOL_MAX_DEPTH = 12
+# Cells whose pool is already this small are not split further
+POOL_SMALL_ENOUGH = 4 * POOL_TOP_K
+# Slack for float64 rounding in the distance bounds
+_EPSILON = 1e-9
+
+
+def _survivors(features, rows, lo, hi, weights, k):
+    if len(rows) <= k:
+        return rows
+    points = np.asarray(features[rows], dtype=np.float64)
+    nearest = np.maximum(np.maximum(lo - points, points - hi), 0) @ weights
+    farthest = np.maximum(np.abs(points - lo), np.abs(points - hi)) @ weights
+    bound = np.partition(farthest, k - 1)[k - 1]
+    return rows[nearest <= bound + _EPSILON]
+
+
+def reachable_tracks(features, lo, hi, weights, k=POOL_TOP_K, max_depth=POOL_MAX_DEPTH):
+    """Rows that can be a top-``k`` answer for some target inside [lo, hi], ascending.
+
+    Rows stay in catalogue order so that re-ranking the pool breaks
+    distance ties the same way a full scan does.
+    """
+    lo = np.asarray(lo, dtype=np.float64)
+    hi = np.asarray(hi, dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.float64)
+    keep = []
+    stack = [(_survivors(features, np.arange(len(features)), lo, hi, weights, k), lo, hi, 0)]
+    while stack:
+        rows, cell_lo, cell_hi, depth = stack.pop()
+        if depth >= max_depth or len(rows) <= POOL_SMALL_ENOUGH:
+            keep.append(rows)
+            continue
+        # Halve the cell along its widest weighted side
+        dim = int(np.argmax((cell_hi - cell_lo) * weights))
+        middle = (cell_lo[dim] + cell_hi[dim]) / 2
+        lower_hi = cell_hi.copy()
+        lower_hi[dim] = middle
+        upper_lo = cell_lo.copy()
+        upper_lo[dim] = middle
+        stack.append((_survivors(features, rows, cell_lo, lower_hi, weights, k), cell_lo, lower_hi, depth + 1))
+        stack.append((_survivors(features, rows, upper_lo, cell_hi, weights, k), upper_lo, cell_hi, depth + 1))
+
+    if not keep:
+        return np.empty(0, dtype=np.int64)
+    return np.unique(np.concatenate(keep)).astype(np.int64)
+
+
+def pools_key(boxes, weights, k=POOL_TOP_K, max_depth=POOL_MAX_DEPTH):
+    """Directory name that changes whenever the boxes, weights or pool settings do."""
+    spec = {
+        "boxes": {mood: [list(map(float, lo)), list(map(float, hi))] for mood, (lo, hi) in sorted(boxes.items())},
+        "weights": list(map(float, weights)),
+        "k": k,
+        "max_depth": max_depth,
+        "version": POOL_FORMAT_VERSION,
+    }
+    digest = hashlib.sha1(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    return f"mood-pools-{digest}"
+
+
+def build_pools(features, boxes, weights, directory, k=POOL_TOP_K, max_depth=POOL_MAX_DEPTH):
+    """Compute every mood's pool and write them under ``directory`` via a renamed staging directory."""
+    with staged_directory(directory) as staging:
+        sizes = {}
+        for mood, (lo, hi) in boxes.items():
+            pool = reachable_tracks(features, lo, hi, weights, k, max_depth)
+            np.save(os.path.join(staging, f"{mood}.npy"), pool)
+            sizes[mood] = len(pool)
+        with open(os.path.join(staging, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump({"rows": len(features), "k": k, "sizes": sizes}, f)
+
+
+def load_pools(directory):
+    """``{mood: rows}`` from ``directory``, or None if the pools have not been built."""
+    manifest = os.path.join(directory, "manifest.json")
+    if not os.path.exists(manifest):
+        return None
+    with open(manifest, encoding="utf-8") as f:
+        moods = json.load(f)["sizes"]
+    return {mood: np.load(os.path.join(directory, f"{mood}.npy")) for mood in moods}
@@ -0,0 +1,394 @@
+"""Oasis music catalogue, prepared once per process and shared by every session.
+
+The first load parses ``musicdata.csv`` with ``prepare_music_dataset`` and
+writes a compact binary copy under ``CACHE_DIR``. That copy is a float32
+feature matrix (``features.npy``) plus one UTF-8 string table holding
+Song, Performer and spotify_track_id. Later loads, in this or any other
+process, memory-map those files instead of parsing CSV. The cache directory
+is named after the CSV's path, size and mtime, so editing the CSV triggers a
+rebuild on the next request.
+
+Each mood also gets a precomputed candidate pool (see ``mood_pools``), so a
+mood click re-ranks a few thousand rows instead of scanning the catalogue.
+Run ``python music_catalog.py`` to build the catalogue, its pools and (for
+large catalogues) its KD-tree ahead of the first request.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+import mood_pools
+import music_index
+from staging import staged_directory
+
+MUSIC_CSV = "./musicdata.csv"
+CACHE_DIR = os.getenv("WORKPOD_CACHE_DIR", ".workpod_cache")
+CATALOG_FORMAT_VERSION = 1
+STRING_COLUMNS = ("Song", "Performer", "spotify_track_id")
+# Rows scored per block, which bounds scratch memory on very large catalogues
+RECOMMENDATION_CHUNK = 1 << 18
+# Extra float32 candidates kept per block before the exact float64 re-rank
+TOP_K_MARGIN = 32
+# Catalogues at least this large are searched through the persisted KD-tree
+ANN_MIN_TRACKS = int(os.getenv("WORKPOD_MUSIC_INDEX_MIN_TRACKS", "250000"))
+# Leaves a KD-tree query may scan; unset means exact search
+ANN_MAX_LEAVES = int(os.environ["WORKPOD_MUSIC_INDEX_MAX_LEAVES"]) if os.getenv("WORKPOD_MUSIC_INDEX_MAX_LEAVES") else None
+# Largest catalogue whose mood pools are built on demand; bigger ones need the offline step
+POOL_BUILD_MAX_TRACKS = int(os.getenv("WORKPOD_MOOD_POOL_BUILD_MAX_TRACKS", "250000"))
+
+MUSIC_FEATURES = ["danceability", "energy", "speechiness", "acousticness", "valence", "tempo_norm"]
+MUSIC_WEIGHTS = {
+    "danceability": 1.0,
+    "energy": 1.25,
+    "speechiness": 0.55,
+    "acousticness": 1.1,
+    "valence": 1.35,
+    "tempo_norm": 0.8,
+}
+MOOD_AUDIO_RANGES = {
+    "frustrated": {
+        "danceability": (0.40, 0.58),
+        "energy": (0.72, 0.94),
+        "speechiness": (0.06, 0.16),
+        "acousticness": (0.06, 0.28),
+        "valence": (0.20, 0.44),
+        "tempo_norm": (0.52, 0.74),
+    },
+    "motivated": {
+        "danceability": (0.58, 0.78),
+        "energy": (0.76, 0.96),
+        "speechiness": (0.04, 0.13),
+        "acousticness": (0.02, 0.18),
+        "valence": (0.60, 0.84),
+        "tempo_norm": (0.48, 0.68),
+    },
+    "excited": {
+        "danceability": (0.68, 0.88),
+        "energy": (0.80, 0.98),
+        "speechiness": (0.04, 0.15),
+        "acousticness": (0.01, 0.16),
+        "valence": (0.74, 0.94),
+        "tempo_norm": (0.56, 0.80),
+    },
+    "satisfied": {
+        "danceability": (0.48, 0.68),
+        "energy": (0.42, 0.64),
+        "speechiness": (0.02, 0.08),
+        "acousticness": (0.32, 0.58),
+        "valence": (0.60, 0.84),
+        "tempo_norm": (0.32, 0.52),
+    },
+    "tired": {
+        "danceability": (0.24, 0.46),
+        "energy": (0.14, 0.36),
+        "speechiness": (0.02, 0.08),
+        "acousticness": (0.62, 0.90),
+        "valence": (0.28, 0.50),
+        "tempo_norm": (0.22, 0.44),
+    },
+    "gloomy": {
+        "danceability": (0.28, 0.48),
+        "energy": (0.22, 0.46),
+        "speechiness": (0.02, 0.08),
+        "acousticness": (0.54, 0.84),
+        "valence": (0.08, 0.30),
+        "tempo_norm": (0.28, 0.48),
+    },
+}
+
+
+def sample_mood_audio_profile(mood):
+    return {
+        feature: np.random.uniform(low, high)
+        for feature, (low, high) in MOOD_AUDIO_RANGES[mood].items()
+    }
+
+
+def prepare_music_dataset(df):
+    """Coerce audio columns to numeric values and add a normalized tempo feature."""
+    df = df.copy()
+    audio_columns = ["danceability", "energy", "speechiness", "acousticness", "valence", "tempo"]
+    for column in audio_columns:
+        df[column] = pd.to_numeric(df[column], errors="coerce")
+
+    df = df.dropna(subset=audio_columns + ["Song", "Performer", "spotify_track_id"])
+    tempo_min = df["tempo"].min()
+    tempo_max = df["tempo"].max()
+    if tempo_max == tempo_min:
+        df["tempo_norm"] = 0.5
+    else:
+        df["tempo_norm"] = (df["tempo"] - tempo_min) / (tempo_max - tempo_min)
+    return df
+
+
+class StringTable:
+    """Rows of strings packed into one UTF-8 buffer with an offsets array.
+
+    Strings are decoded only for the rows asked for, so a multi-million-row
+    table costs two memory maps rather than millions of Python objects.
+    """
+
+    def __init__(self, data, offsets, columns):
+        self.data = data
+        self.offsets = offsets
+        self.columns = columns
+
+    def __len__(self):
+        return (len(self.offsets) - 1) // len(self.columns)
+
+    def get(self, row, column):
+        cell = row * len(self.columns) + self.columns.index(column)
+        return self.data[self.offsets[cell]:self.offsets[cell + 1]].tobytes().decode("utf-8")
+
+    def column(self, column, rows=None):
+        rows = range(len(self)) if rows is None else rows
+        return [self.get(int(row), column) for row in rows]
+
+    @staticmethod
+    def pack(frame, columns):
+        """Return ``(data, offsets)`` for the given string columns, row-major."""
+        cells = [
+            str(value).encode("utf-8")
+            for row in frame[list(columns)].itertuples(index=False, name=None)
+            for value in row
+        ]
+        offsets = np.zeros(len(cells) + 1, dtype=np.int64)
+        np.cumsum([len(cell) for cell in cells], out=offsets[1:])
+        return np.frombuffer(b"".join(cells), dtype=np.uint8), offsets
+
+
+class MusicCatalog:
+    """Prepared feature matrix plus the strings needed to display a track."""
+
+    def __init__(self, features, strings, fingerprint, directory=None):
+        self.features = features
+        self.strings = strings
+        self.fingerprint = fingerprint
+        self.directory = directory
+        self._index = None
+        self._pools = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.features)
+
+    def index(self):
+        """The KD-tree persisted alongside this catalogue, built on first use."""
+        with self._lock:
+            if self._index is None:
+                weights = _profile_vector(MUSIC_WEIGHTS, np.float32)
+                if self.directory is None:
+                    self._index = music_index.KDTree.build(self.features, weights)
+                else:
+                    self._index = music_index.load_or_build(self.features, weights, self.directory)
+            return self._index
+
+    def mood_pool(self, mood, build=None):
+        """``(rows, features)`` of ``mood``'s candidates, or None if its pools are not available.
+
+        ``features`` is a contiguous copy of those rows, so a click scans a
+        small dense block instead of gathering rows from the memory map.
+
+        Pools are loaded from disk, or built and saved when the catalogue has
+        at most ``POOL_BUILD_MAX_TRACKS`` rows (or ``build`` is true).
+        """
+        with self._lock:
+            if self._pools is None:
+                pools = self._load_pools(len(self) <= POOL_BUILD_MAX_TRACKS if build is None else build)
+                self._pools = {
+                    name: (rows, np.ascontiguousarray(self.features[rows], dtype=np.float32))
+                    for name, rows in pools.items()
+                }
+            return self._pools.get(mood)
+
+    def _load_pools(self, build):
+        boxes = mood_boxes()
+        weights = _profile_vector(MUSIC_WEIGHTS, np.float64)
+        if self.directory is None:
+            if not build:
+                return {}
+            return {
+                mood: mood_pools.reachable_tracks(self.features, lo, hi, weights)
+                for mood, (lo, hi) in boxes.items()
+            }
+        path = os.path.join(self.directory, mood_pools.pools_key(boxes, weights))
+        pools = mood_pools.load_pools(path)
+        if pools is None and build:
+            mood_pools.build_pools(self.features, boxes, weights, path)
+            pools = mood_pools.load_pools(path)
+        return pools or {}
+
+
+def mood_boxes(ranges=MOOD_AUDIO_RANGES):
+    """``{mood: (lo, hi)}`` feature vectors bounding each mood's sampled profiles."""
+    return {
+        mood: (
+            np.array([bounds[feature][0] for feature in MUSIC_FEATURES], dtype=np.float64),
+            np.array([bounds[feature][1] for feature in MUSIC_FEATURES], dtype=np.float64),
+        )
+        for mood, bounds in ranges.items()
+    }
+
+
+def make_clickable(val):
+    # target _blank to open new window
+    return '<a target="_blank" href="{}">{}</a>'.format(val, val)
+
+
+def _profile_vector(profile, dtype):
+    return np.array([profile[feature] for feature in MUSIC_FEATURES], dtype=dtype)
+
+
+def top_k(features, profile, k, weights=MUSIC_WEIGHTS):
+    """Row indices of the ``k`` tracks closest to ``profile``, nearest first.
+
+    Distance is the weighted L1 distance over ``MUSIC_FEATURES``. Candidates
+    are scored in float32 block by block and cut down with
+    ``np.argpartition``. The survivors are then re-scored in float64 and
+    ordered by (distance, row). So the ranking matches a full sort of the
+    float64 distances, with ties going to the earlier row.
+    """
+    n = len(features)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    target32 = _profile_vector(profile, np.float32)
+    weights32 = _profile_vector(weights, np.float32)
+    keep = k + TOP_K_MARGIN
+    scratch = np.empty((min(RECOMMENDATION_CHUNK, n), len(MUSIC_FEATURES)), dtype=np.float32)
+    candidates = []
+    for start in range(0, n, RECOMMENDATION_CHUNK):
+        block = features[start:start + RECOMMENDATION_CHUNK]
+        diff = scratch[:len(block)]
+        np.subtract(block, target32, out=diff)
+        np.abs(diff, out=diff)
+        distances = diff @ weights32
+        if len(distances) > keep:
+            candidates.append(np.argpartition(distances, keep - 1)[:keep] + start)
+        else:
+            candidates.append(np.arange(start, start + len(distances)))
+    candidates = np.concatenate(candidates)
+    return rerank(features, candidates, profile, k, weights)
+
+
+def rerank(features, candidates, profile, k, weights=MUSIC_WEIGHTS):
+    """Exact float64 top-``k`` among ``candidates``, ordered by (distance, row)."""
+    candidates = np.asarray(candidates, dtype=np.int64)
+    exact = np.abs(np.asarray(features[candidates], dtype=np.float64) - _profile_vector(profile, np.float64))
+    exact = exact @ _profile_vector(weights, np.float64)
+    return candidates[np.lexsort((candidates, exact))[:k]]
+
+
+def nearest(catalog, profile, k, max_leaves=ANN_MAX_LEAVES, mood=None):
+    """Top-``k`` rows for ``profile``, using the KD-tree on large catalogues.
+
+    When ``mood`` is given and its pool is available, only the pool is
+    re-ranked. The pool holds every possible top-``POOL_TOP_K`` answer for
+    profiles sampled from that mood, so the result is unchanged.
+    """
+    if mood is not None and k <= mood_pools.POOL_TOP_K:
+        pool = catalog.mood_pool(mood)
+        if pool is not None:
+            rows, features = pool
+            return rows[top_k(features, profile, k)]
+    if len(catalog) < ANN_MIN_TRACKS:
+        return top_k(catalog.features, profile, k)
+    target = _profile_vector(profile, np.float32)
+    candidates = catalog.index().query(target, k + TOP_K_MARGIN, max_leaves=max_leaves)
+    return rerank(catalog.features, candidates, profile, k)
+
+
+def recommend(catalog, profile, amount, mood=None):
+    """Song, Performer and a clickable track link for the ``amount`` best matches."""
+    rows = nearest(catalog, profile, amount, mood=mood)
+    return pd.DataFrame({
+        "Song": catalog.strings.column("Song", rows),
+        "Performer": catalog.strings.column("Performer", rows),
+        "spotify_track_id": [make_clickable(value) for value in catalog.strings.column("spotify_track_id", rows)],
+    })
+
+
+def source_fingerprint(csv_path):
+    """Identify a CSV by path, size and mtime, plus the on-disk format version."""
+    stat = os.stat(csv_path)
+    key = f"{os.path.abspath(csv_path)}|{stat.st_size}|{stat.st_mtime_ns}|{CATALOG_FORMAT_VERSION}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def build_catalog(csv_path, target_dir):
+    """Parse and prepare ``csv_path`` and write the binary catalogue into ``target_dir``.
+
+    Files are written to a temporary sibling directory that is renamed into
+    place, so concurrent readers never see a half-written catalogue.
+    """
+    df = prepare_music_dataset(pd.read_csv(csv_path))
+    features = np.ascontiguousarray(df[MUSIC_FEATURES].to_numpy(dtype=np.float32))
+    data, offsets = StringTable.pack(df, STRING_COLUMNS)
+
+    with staged_directory(target_dir) as staging:
+        np.save(os.path.join(staging, "features.npy"), features)
+        np.save(os.path.join(staging, "strings.npy"), data)
+        np.save(os.path.join(staging, "offsets.npy"), offsets)
+        with open(os.path.join(staging, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump({"source": os.path.abspath(csv_path), "rows": len(features), "columns": STRING_COLUMNS}, f)
+
+
+def load_catalog(csv_path=MUSIC_CSV, cache_dir=CACHE_DIR):
+    """Memory-map the catalogue for ``csv_path``, building it first if it is missing or stale."""
+    fingerprint = source_fingerprint(csv_path)
+    target_dir = os.path.join(cache_dir, f"music-{fingerprint}")
+    if not os.path.exists(os.path.join(target_dir, "manifest.json")):
+        build_catalog(csv_path, target_dir)
+        _remove_stale_catalogs(cache_dir, keep=target_dir)
+
+    features = np.load(os.path.join(target_dir, "features.npy"), mmap_mode="r")
+    strings = StringTable(
+        np.load(os.path.join(target_dir, "strings.npy"), mmap_mode="r"),
+        np.load(os.path.join(target_dir, "offsets.npy"), mmap_mode="r"),
+        STRING_COLUMNS,
+    )
+    return MusicCatalog(features, strings, fingerprint, target_dir)
+
+
+def _remove_stale_catalogs(cache_dir, keep):
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name.startswith("music-") and path != keep:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(csv_path=MUSIC_CSV, cache_dir=CACHE_DIR):
+    """Process-wide catalogue for ``csv_path``, reloaded when the file changes.
+
+    A warm call costs one ``os.stat`` of the CSV.
+    """
+    fingerprint = source_fingerprint(csv_path)
+    key = (os.path.abspath(csv_path), cache_dir)
+    catalog = _catalogs.get(key)
+    if catalog is not None and catalog.fingerprint == fingerprint:
+        return catalog
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None or catalog.fingerprint != source_fingerprint(csv_path):
+            catalog = load_catalog(csv_path, cache_dir)
+            _catalogs[key] = catalog
+        return catalog
+
+
+if __name__ == "__main__":
+    catalog = get_catalog()
+    for mood in MOOD_AUDIO_RANGES:
+        catalog.mood_pool(mood, build=True)
+    if len(catalog) >= ANN_MIN_TRACKS:
+        catalog.index()
+    print(f"{len(catalog)} tracks prepared under {catalog.directory}")
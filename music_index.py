@@ -0,0 +1,152 @@
+"""KD-tree for weighted-L1 nearest-neighbour search over the music features.
+
+Points are multiplied by the feature weights up front, so the weighted L1
+distance becomes a plain L1 distance in the scaled space. The tree keeps a
+bounding box per node. A query visits leaves best-first, ordered by the L1
+distance from the target to each box. It stops once the next box cannot
+beat the current k-th candidate, which makes it exact, or after
+``max_leaves`` leaves, which makes it approximate and faster.
+
+A built tree is a handful of flat arrays saved as ``.npy`` files next to the
+catalogue it indexes and memory-mapped on load.
+"""
+import heapq
+import json
+import os
+
+import numpy as np
+
+from staging import staged_directory
+
+INDEX_FORMAT_VERSION = 1
+DEFAULT_LEAF_SIZE = 256
+_ARRAYS = ("points", "rows", "lo", "hi", "left", "right", "start", "end")
+
+
+class KDTree:
+    def __init__(self, arrays, weights):
+        self.weights = np.asarray(weights, dtype=np.float32)
+        for name in _ARRAYS:
+            setattr(self, name, arrays[name])
+
+    @classmethod
+    def build(cls, features, weights, leaf_size=DEFAULT_LEAF_SIZE):
+        weights = np.asarray(weights, dtype=np.float32)
+        points = np.ascontiguousarray(np.asarray(features, dtype=np.float32) * weights)
+        rows = np.arange(len(points), dtype=np.int64)
+        nodes = {"lo": [], "hi": [], "left": [], "right": [], "start": [], "end": []}
+
+        def add_node(start, end):
+            block = points[start:end]
+            nodes["lo"].append(block.min(axis=0))
+            nodes["hi"].append(block.max(axis=0))
+            nodes["left"].append(-1)
+            nodes["right"].append(-1)
+            nodes["start"].append(start)
+            nodes["end"].append(end)
+            return len(nodes["start"]) - 1
+
+        if len(points):
+            stack = [add_node(0, len(points))]
+            while stack:
+                node = stack.pop()
+                start, end = nodes["start"][node], nodes["end"][node]
+                if end - start <= leaf_size:
+                    continue
+                # Split the widest dimension at its median
+                dim = int(np.argmax(nodes["hi"][node] - nodes["lo"][node]))
+                mid = (end - start) // 2
+                order = np.argpartition(points[start:end, dim], mid)
+                points[start:end] = points[start:end][order]
+                rows[start:end] = rows[start:end][order]
+                nodes["left"][node] = add_node(start, start + mid)
+                nodes["right"][node] = add_node(start + mid, end)
+                stack.extend((nodes["left"][node], nodes["right"][node]))
+
+        width = points.shape[1] if points.ndim == 2 else len(weights)
+        arrays = {
+            "points": points,
+            "rows": rows,
+            "lo": np.array(nodes["lo"], dtype=np.float32).reshape(-1, width),
+            "hi": np.array(nodes["hi"], dtype=np.float32).reshape(-1, width),
+            "left": np.array(nodes["left"], dtype=np.int32),
+            "right": np.array(nodes["right"], dtype=np.int32),
+            "start": np.array(nodes["start"], dtype=np.int64),
+            "end": np.array(nodes["end"], dtype=np.int64),
+        }
+        return cls(arrays, weights)
+
+    def __len__(self):
+        return len(self.points)
+
+    def _box_distance(self, node, target):
+        below = self.lo[node] - target
+        above = target - self.hi[node]
+        return float(np.maximum(np.maximum(below, above), 0).sum())
+
+    def query(self, target, k, max_leaves=None):
+        """Rows of (at least) the ``k`` nearest points to ``target``, unordered.
+
+        ``target`` is in unscaled feature space. Exact unless ``max_leaves``
+        is set, in which case at most that many leaves are scanned.
+        """
+        if not len(self.points) or k <= 0:
+            return np.empty(0, dtype=np.int64)
+        target = np.asarray(target, dtype=np.float32) * self.weights
+        best_rows = np.empty(0, dtype=np.int64)
+        best_dist = np.empty(0, dtype=np.float32)
+        kth = np.inf
+        leaves = 0
+        heap = [(self._box_distance(0, target), 0)]
+        while heap:
+            bound, node = heapq.heappop(heap)
+            if bound > kth:
+                break
+            left = self.left[node]
+            if left >= 0:
+                right = self.right[node]
+                heapq.heappush(heap, (self._box_distance(left, target), int(left)))
+                heapq.heappush(heap, (self._box_distance(right, target), int(right)))
+                continue
+
+            start, end = self.start[node], self.end[node]
+            dist = np.abs(self.points[start:end] - target).sum(axis=1)
+            best_rows = np.concatenate((best_rows, self.rows[start:end]))
+            best_dist = np.concatenate((best_dist, dist))
+            if len(best_dist) > k:
+                keep = np.argpartition(best_dist, k - 1)[:k]
+                best_rows, best_dist = best_rows[keep], best_dist[keep]
+            if len(best_dist) == k:
+                kth = float(best_dist.max())
+            leaves += 1
+            if max_leaves is not None and leaves >= max_leaves:
+                break
+        return best_rows
+
+    def save(self, directory, meta):
+        """Write the tree into ``directory`` via a renamed staging directory."""
+        with staged_directory(directory) as staging:
+            for name in _ARRAYS:
+                np.save(os.path.join(staging, f"{name}.npy"), getattr(self, name))
+            np.save(os.path.join(staging, "weights.npy"), self.weights)
+            with open(os.path.join(staging, "manifest.json"), "w", encoding="utf-8") as f:
+                json.dump(dict(meta, version=INDEX_FORMAT_VERSION), f)
+
+    @classmethod
+    def load(cls, directory):
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in _ARRAYS}
+        return cls(arrays, np.load(os.path.join(directory, "weights.npy")))
+
+
+def index_key(weights, leaf_size):
+    """Directory name for a tree over the given weights and leaf size."""
+    values = "-".join(f"{float(w):.6g}" for w in weights)
+    return f"kdtree-v{INDEX_FORMAT_VERSION}-{leaf_size}-{values}"
+
+
+def load_or_build(features, weights, directory, leaf_size=DEFAULT_LEAF_SIZE):
+    """Load the tree persisted under ``directory``, building and saving it if missing."""
+    path = os.path.join(directory, index_key(weights, leaf_size))
+    if not os.path.exists(os.path.join(path, "manifest.json")):
+        KDTree.build(features, weights, leaf_size).save(path, {"rows": len(features), "leaf_size": leaf_size})
+    return KDTree.load(path)
@@ -0,0 +1,217 @@
+"""Process-wide request and token budgets for a shared Groq API key.
+
+When ``GROQ_API_KEY`` comes from Streamlit secrets, every visitor's
+completions count against the same Groq quota. ``RateLimiter`` holds two
+token buckets for that key: requests per minute and tokens per minute.
+Requests that do not fit wait in a queue instead of being sent to collect
+a 429. The queue serves lower ``priority`` values first, so interactive
+Arctic chats go ahead of Oasis summaries. Within a priority, sessions take
+turns, so one busy tab cannot starve the others. A request is only turned
+away (``QueueFull``) when the queue is already ``max_queue`` long or it has
+waited ``max_wait`` seconds.
+
+Waiting happens on the background event loop (``llm_async``). The
+Streamlit thread only reads ``Ticket.position`` to show where the user is
+in the queue.
+"""
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+GROQ_RPM = float(os.getenv("WORKPOD_GROQ_RPM", "30"))
+GROQ_TPM = float(os.getenv("WORKPOD_GROQ_TPM", "6000"))
+MAX_QUEUE = int(os.getenv("WORKPOD_GROQ_MAX_QUEUE", "100"))
+MAX_WAIT = float(os.getenv("WORKPOD_GROQ_MAX_WAIT", "120"))
+# Reserved for the answer until the stream ends and the real size is known
+COMPLETION_TOKENS = int(os.getenv("WORKPOD_GROQ_COMPLETION_TOKENS", "400"))
+# Share of a minute's quota that may be spent at once
+BURST = float(os.getenv("WORKPOD_GROQ_BURST", "1.0"))
+# Interactive chat is served before background summaries
+PRIORITY_CHAT = 0
+PRIORITY_SUMMARY = 1
+# Waiters re-check at least this often, to notice grants made by others
+_POLL_SECONDS = 0.1
+_WAIT_SAMPLES = 1000
+
+
+class QueueFull(Exception):
+    """The limiter turned a request away rather than queue it any longer."""
+
+
+class TokenBucket:
+    """``per_minute`` units that refill continuously, holding at most ``burst`` of a minute's worth."""
+
+    def __init__(self, per_minute, burst=1.0, clock=time.monotonic):
+        self.capacity = max(1.0, per_minute * burst)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = clock()
+
+    def refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount):
+        """Seconds until ``amount`` units are available (0 if they are now)."""
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount):
+        # May go negative when a settled request used more than it reserved
+        self.level -= amount
+
+
+class Ticket:
+    """One request's place in the queue."""
+
+    def __init__(self, session, priority, tokens):
+        self.session = session
+        self.priority = priority
+        self.tokens = tokens
+        self.position = None
+        self.granted = False
+        self.enqueued_at = None
+        self._event = None
+
+
+class RateLimiter:
+    def __init__(
+        self, rpm=GROQ_RPM, tpm=GROQ_TPM, burst=BURST, max_queue=MAX_QUEUE, max_wait=MAX_WAIT, clock=time.monotonic
+    ):
+        self.requests = TokenBucket(rpm, burst, clock)
+        self.tokens = TokenBucket(tpm, burst, clock)
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.clock = clock
+        self._lock = threading.Lock()
+        # priority -> session -> waiting tickets; sessions rotate to the back once served
+        self._queues = {}
+        self._waiting = 0
+        self._paused_until = 0.0
+        self._waits = deque(maxlen=_WAIT_SAMPLES)
+        self._counts = {"granted": 0, "rejected": 0, "throttled": 0}
+
+    def ticket(self, session, priority=PRIORITY_CHAT, tokens=1):
+        return Ticket(session, priority, tokens)
+
+    async def acquire(self, ticket):
+        """Wait until ``ticket`` fits both budgets, then reserve them for it."""
+        with self._lock:
+            if self._waiting >= self.max_queue:
+                self._counts["rejected"] += 1
+                raise QueueFull(f"{self._waiting} requests are already waiting")
+            ticket.enqueued_at = self.clock()
+            ticket._event = asyncio.Event()
+            self._queues.setdefault(ticket.priority, OrderedDict()).setdefault(ticket.session, deque()).append(ticket)
+            self._waiting += 1
+        try:
+            while True:
+                with self._lock:
+                    delay = self._dispatch()
+                if ticket.granted:
+                    return
+                if self.clock() - ticket.enqueued_at >= self.max_wait:
+                    with self._lock:
+                        self._counts["rejected"] += 1
+                    raise QueueFull(f"waited {self.max_wait:.0f} s for the shared Groq quota")
+                try:
+                    await asyncio.wait_for(ticket._event.wait(), min(max(delay, 0.01), _POLL_SECONDS))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if not ticket.granted:
+                with self._lock:
+                    self._remove(ticket)
+                    self._positions()
+
+    def settle(self, ticket, used_tokens):
+        """Correct the token reservation once the request's real size is known."""
+        with self._lock:
+            self.tokens.take(used_tokens - ticket.tokens)
+            ticket.tokens = used_tokens
+
+    def pause(self, seconds):
+        """Hold every queued request for ``seconds``, e.g. after the API answered 429."""
+        with self._lock:
+            self._counts["throttled"] += 1
+            self._paused_until = max(self._paused_until, self.clock() + seconds)
+
+    def snapshot(self):
+        with self._lock:
+            waits = sorted(self._waits)
+            return {
+                **self._counts,
+                "waiting": self._waiting,
+                "wait_p50": waits[len(waits) // 2] if waits else 0.0,
+                "wait_p95": waits[max(0, int(len(waits) * 0.95) - 1)] if waits else 0.0,
+                "wait_max": waits[-1] if waits else 0.0,
+            }
+
+    def _order(self):
+        """Waiting tickets in the order they will be served."""
+        for priority in sorted(self._queues):
+            sessions = list(self._queues[priority].values())
+            depth = max((len(tickets) for tickets in sessions), default=0)
+            for turn in range(depth):
+                for tickets in sessions:
+                    if turn < len(tickets):
+                        yield tickets[turn]
+
+    def _dispatch(self):
+        # Grants strictly in queue order, so a large request is not overtaken forever
+        now = self.clock()
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        delay = self._paused_until - now
+        if delay <= 0:
+            for ticket in list(self._order()):
+                delay = max(self.requests.delay(1), self.tokens.delay(ticket.tokens))
+                if delay > 0:
+                    break
+                self.requests.take(1)
+                self.tokens.take(ticket.tokens)
+                self._remove(ticket)
+                ticket.granted = True
+                ticket.position = None
+                ticket._event.set()
+                self._counts["granted"] += 1
+                self._waits.append(now - ticket.enqueued_at)
+        self._positions()
+        return max(delay, 0.0)
+
+    def _remove(self, ticket):
+        sessions = self._queues.get(ticket.priority, {})
+        tickets = sessions.get(ticket.session)
+        if tickets is None or ticket not in tickets:
+            return
+        tickets.remove(ticket)
+        self._waiting -= 1
+        # The session that was just served goes to the back of the rotation
+        sessions.pop(ticket.session)
+        if tickets:
+            sessions[ticket.session] = tickets
+        if not sessions:
+            del self._queues[ticket.priority]
+
+    def _positions(self):
+        for position, ticket in enumerate(self._order(), start=1):
+            ticket.position = position
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(api_key, **limits):
+    """The limiter shared by every request made with ``api_key``.
+
+    ``limits`` override the ``RateLimiter`` defaults when it is first created.
+    """
+    key = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = RateLimiter(**limits)
+        return _limiters[key]
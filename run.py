@@ -1,333 +1,401 @@
 import streamlit as st
-from streamlit_extras.stylable_container import stylable_container
-import sqlite3
-import requests
-from PIL import Image
-import io
-import replicate
 import os
 import re
-import json
-import plotly.express as px
-import pandas as pd
-import numpy as np
-
-DEFAULT_GROQ_MODEL = os.getenv("WORKPOD_GROQ_MODEL", "llama-3.1-8b-instant")
-GROQ_CHAT_URL = "https://api.groq.com/openai/v1/chat/completions"
+import uuid
+from db import (
+    create_database,
+    insert_tasks,
+    import_tasks,
+    mark_task_as_completed,
+    delete_task,
+    delete_project,
+    insert_user_data,
+    get_user_by_project_id_and_username,
+    delete_user_record,
+    get_project_snapshot,
+    get_project_revision,
+    get_burndown,
+)
+from avatars import save_avatar, load_avatar, backfill_legacy_images
+from task_parser import TaskStreamParser
+from rate_limit import PRIORITY_CHAT, PRIORITY_SUMMARY, QueueFull, get_limiter
+from conversation import Conversation, context_budget, message_tokens
+from charts import contribution_figure
+import metrics
+# pandas, plotly, numpy, httpx, replicate and streamlit_extras are imported by the
+# pages that use them, so Registration and Login render without loading them
+
+# How often the Oasis page checks whether the background mood summary has arrived
+SUMMARY_POLL_SECONDS = float(os.getenv("WORKPOD_SUMMARY_POLL_SECONDS", "0.5"))
+# OneDash shows this many tasks at a time
+TASKS_PER_PAGE = int(os.getenv("WORKPOD_TASKS_PER_PAGE", "50"))
+# How often OneDash checks for collaborators' changes when auto-refresh is on
+ONEDASH_REFRESH_SECONDS = float(os.getenv("WORKPOD_ONEDASH_REFRESH_SECONDS", "5"))
+# Time buckets offered for the OneDash burndown chart
+BURNDOWN_BUCKETS = {"Day": 86400, "Hour": 3600}
 
 # Set assistant icon to WorkPod logo for the default Groq LLM path
 icons = {"assistant": "./WP.png", "user": "🐬"}
+RASTER_EXTENSIONS = (".png", ".jpg", ".jpeg")
 
 
-def stream_groq_chat(messages, api_key, model=DEFAULT_GROQ_MODEL, temperature=0.6):
-    """Stream a chat response from Groq's OpenAI-compatible API."""
-    payload = {
-        "model": model,
-        "messages": messages,
-        "stream": True,
-        "temperature": temperature,
-        "top_p": 0.9,
-    }
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
-    try:
-        response = requests.post(GROQ_CHAT_URL, headers=headers, json=payload, stream=True, timeout=(10, 180))
-        response.raise_for_status()
-    except requests.exceptions.HTTPError as exc:
-        detail = exc.response.text if exc.response is not None else str(exc)
-        st.error(
-            f"Groq returned an error for `{model}`: {detail}. "
-            "Check your GROQ_API_KEY and model name."
-        )
-        st.stop()
-    except requests.exceptions.RequestException as exc:
-        st.error(f"Groq request failed: {exc}")
-        st.stop()
-
-    for line in response.iter_lines():
-        if not line:
-            continue
-        decoded_line = line.decode("utf-8")
-        if not decoded_line.startswith("data: "):
-            continue
-        data = decoded_line.removeprefix("data: ").strip()
-        if data == "[DONE]":
-            break
-        try:
-            event = json.loads(data)
-        except json.JSONDecodeError:
-            continue
+@st.cache_resource(show_spinner=False)
+def static_image(path):
+    """Bytes of a bundled image, read from disk once per process."""
+    with open(path, "rb") as handle:
+        return handle.read()
 
-        chunk = event.get("choices", [{}])[0].get("delta", {}).get("content", "")
-        if chunk:
-            yield chunk
 
+def chat_avatar(icon):
+    """Chat avatar for ``icon``: cached bytes for bundled raster images, anything else as given."""
+    return static_image(icon) if icon.lower().endswith(RASTER_EXTENSIONS) else icon
 
-def estimate_num_tokens(text):
-    """Approximate token count without requiring heavyweight tokenizer dependencies."""
-    return max(1, len(re.findall(r"\w+|[^\w\s]", text)))
-
-
-MUSIC_FEATURES = ["danceability", "energy", "speechiness", "acousticness", "valence", "tempo_norm"]
-MOOD_AUDIO_RANGES = {
-    "frustrated": {
-        "danceability": (0.40, 0.58),
-        "energy": (0.72, 0.94),
-        "speechiness": (0.06, 0.16),
-        "acousticness": (0.06, 0.28),
-        "valence": (0.20, 0.44),
-        "tempo_norm": (0.52, 0.74),
-    },
-    "motivated": {
-        "danceability": (0.58, 0.78),
-        "energy": (0.76, 0.96),
-        "speechiness": (0.04, 0.13),
-        "acousticness": (0.02, 0.18),
-        "valence": (0.60, 0.84),
-        "tempo_norm": (0.48, 0.68),
-    },
-    "excited": {
-        "danceability": (0.68, 0.88),
-        "energy": (0.80, 0.98),
-        "speechiness": (0.04, 0.15),
-        "acousticness": (0.01, 0.16),
-        "valence": (0.74, 0.94),
-        "tempo_norm": (0.56, 0.80),
-    },
-    "satisfied": {
-        "danceability": (0.48, 0.68),
-        "energy": (0.42, 0.64),
-        "speechiness": (0.02, 0.08),
-        "acousticness": (0.32, 0.58),
-        "valence": (0.60, 0.84),
-        "tempo_norm": (0.32, 0.52),
-    },
-    "tired": {
-        "danceability": (0.24, 0.46),
-        "energy": (0.14, 0.36),
-        "speechiness": (0.02, 0.08),
-        "acousticness": (0.62, 0.90),
-        "valence": (0.28, 0.50),
-        "tempo_norm": (0.22, 0.44),
-    },
-    "gloomy": {
-        "danceability": (0.28, 0.48),
-        "energy": (0.22, 0.46),
-        "speechiness": (0.02, 0.08),
-        "acousticness": (0.54, 0.84),
-        "valence": (0.08, 0.30),
-        "tempo_norm": (0.28, 0.48),
-    },
-}
-
-
-def sample_mood_audio_profile(mood):
-    return {
-        feature: np.random.uniform(low, high)
-        for feature, (low, high) in MOOD_AUDIO_RANGES[mood].items()
-    }
-
-
-def prepare_music_dataset(df):
-    """Coerce audio columns to numeric values and add a normalized tempo feature."""
-    df = df.copy()
-    audio_columns = ["danceability", "energy", "speechiness", "acousticness", "valence", "tempo"]
-    for column in audio_columns:
-        df[column] = pd.to_numeric(df[column], errors="coerce")
-
-    df = df.dropna(subset=audio_columns + ["Song", "Performer", "spotify_track_id"])
-    tempo_min = df["tempo"].min()
-    tempo_max = df["tempo"].max()
-    if tempo_max == tempo_min:
-        df["tempo_norm"] = 0.5
+
+def show_llm_error(exc, spec, model):
+    """Report a failed completion request and end the script run."""
+    import httpx
+
+    if isinstance(exc, httpx.HTTPStatusError):
+        hint = f" Check your {spec.secret} and model name." if spec.secret else ""
+        st.error(f"{spec.label} returned an error for `{model}`: {exc.response.text}.{hint}")
     else:
-        df["tempo_norm"] = (df["tempo"] - tempo_min) / (tempo_max - tempo_min)
-    return df
+        st.error(f"{spec.label} request failed: {exc}")
+    st.stop()
+
+
+def show_queue_full():
+    """Tell the user the shared Groq key is saturated and end the script run."""
+    st.warning("WorkPod is very busy right now. Please try again in a minute.", icon="⏳")
+    st.stop()
+
+
+def show_cache_stats():
+    from llm_cache import stats as cache_stats
+
+    counts = cache_stats.snapshot()
+    st.caption(f"Response cache: {counts['hits']} hits, {counts['misses']} misses")
+
+
+def show_queue_stats(spec, api_key):
+    if not (spec.rate_limited and api_key):
+        return
+    counts = get_limiter(api_key).snapshot()
+    st.caption(
+        f"Groq queue: {counts['waiting']} waiting, p95 wait {counts['wait_p95']:.1f} s, "
+        f"{counts['rejected']} turned away, {counts['throttled']} throttled"
+    )
+
+
+def queue_ticket(api_key, priority):
+    """A place in the shared Groq queue for this browser session."""
+    if "queue_session" not in st.session_state:
+        st.session_state.queue_session = uuid.uuid4().hex
+    return get_limiter(api_key).ticket(st.session_state.queue_session, priority)
 
-# Function to create SQLite database and table if not exists
-def create_database():
-    conn = sqlite3.connect('user_data.db')
-    c = conn.cursor()
-    
-    # Check if the users table exists
-    c.execute('''SELECT count(name) FROM sqlite_master WHERE type='table' AND name='users' ''')
-    if c.fetchone()[0] == 0:
-        # Create the new users table
-        c.execute('''CREATE TABLE users
-                     (id INTEGER PRIMARY KEY AUTOINCREMENT, 
-                     username TEXT NOT NULL, 
-                     email TEXT NOT NULL, 
-                     project_id TEXT NOT NULL,
-                     image BLOB)''')
-    
-    # Check if the tasks table exists
-    c.execute('''SELECT count(name) FROM sqlite_master WHERE type='table' AND name='tasks' ''')
-    if c.fetchone()[0] == 0:
-        # Create the new tasks table
-        c.execute('''CREATE TABLE tasks
-                     (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                     project_id TEXT NOT NULL,
-                     task_description TEXT NOT NULL,
-                     completed BOOLEAN NOT NULL DEFAULT 0,
-                     completed_by TEXT)''')
-    
-    conn.commit()
-    conn.close()
-
-# Function to insert task into the database
-def insert_task(project_id, task_description):
-    conn = sqlite3.connect('user_data.db')
-    c = conn.cursor()
-    c.execute('''INSERT INTO tasks (project_id, task_description) VALUES (?, ?)''',
-              (project_id, task_description))
-    conn.commit()
-    conn.close()
-
-# Function to mark task as completed
-def mark_task_as_completed(task_id, username):
-    conn = sqlite3.connect('user_data.db')
-    c = conn.cursor()
-    c.execute('''UPDATE tasks SET completed = 1, completed_by = ? WHERE id = ?''',
-              (username, task_id))
-    conn.commit()
-    conn.close()
-
-# Function to delete task from the database
-def delete_task(task_id):
-    conn = sqlite3.connect('user_data.db')
-    c = conn.cursor()
-    c.execute('''DELETE FROM tasks WHERE id = ?''', (task_id,))
-    conn.commit()
-    conn.close()
-
-# Function to delete project records from both tables
-def delete_project(project_id):
-    conn = sqlite3.connect('user_data.db')
-    c = conn.cursor()
-    c.execute('''DELETE FROM tasks WHERE project_id = ?''', (project_id,))
-    c.execute('''DELETE FROM users WHERE project_id = ?''', (project_id,))
-    conn.commit()
-    conn.close()
-
-# Function to retrieve tasks from the database
-def get_tasks_by_project_id(project_id):
-    conn = sqlite3.connect('user_data.db')
-    c = conn.cursor()
-    c.execute('''SELECT * FROM tasks WHERE project_id = ?''', (project_id,))
-    tasks = c.fetchall()
-    conn.close()
-    return tasks
-
-# Function to retrieve completed and total tasks
-def get_completed_and_total_tasks(project_id):
-    conn = sqlite3.connect('user_data.db')
-    c = conn.cursor()
-    c.execute('''SELECT SUM(completed), COUNT(*) FROM tasks WHERE project_id = ?''', (project_id,))
-    completed, total = c.fetchone()
-    conn.close()
-    return completed, total
-
-# Function to retrieve user contributions
-def get_user_contributions(project_id):
-    conn = sqlite3.connect('user_data.db')
-    c = conn.cursor()
-    c.execute('''SELECT completed_by, COUNT(*) FROM tasks WHERE project_id = ? AND completed = 1 GROUP BY completed_by''', (project_id,))
-    user_contributions = c.fetchall()
-    conn.close()
-    return user_contributions
-
-# Function to insert user data into the database
-def insert_user_data(username, email, project_id, image):
-    conn = sqlite3.connect('user_data.db')
-    c = conn.cursor()
-    c.execute('''INSERT INTO users (username, email, project_id, image) VALUES (?, ?, ?, ?)''',
-              (username, email, project_id, image))
-    conn.commit()
-    conn.close()
-
-# Function to retrieve user data based on project ID and username
-def get_user_by_project_id_and_username(project_id, username):
-    conn = sqlite3.connect('user_data.db')
-    c = conn.cursor()
-    c.execute('''SELECT * FROM users WHERE project_id = ? AND username = ?''', (project_id, username))
-    data = c.fetchone()
-    conn.close()
-    return data
-
-# Function to delete user record based on project ID and username
-def delete_user_record(project_id, username):
-    conn = sqlite3.connect('user_data.db')
-    c = conn.cursor()
-    c.execute('''DELETE FROM users WHERE project_id = ? AND username = ?''', (project_id, username))
-    conn.commit()
-    conn.close()
-
-# Function to retrieve user data based on project ID
-def get_users_by_project_id(project_id):
-    conn = sqlite3.connect('user_data.db')
-    c = conn.cursor()
-    c.execute('''SELECT * FROM users WHERE project_id = ?''', (project_id,))
-    data = c.fetchall()
-    conn.close()
-    return data
-
-def parse_task_lines(response_content):
-    """Extract clean task rows from a model-generated project breakdown."""
-    task_lines = []
-    fallback_lines = []
-    task_pattern = re.compile(r"^\s*(?:[-*]\s*)?(?:\d+[\).\:-]\s*|Step\s+\d+[\).\:-]\s*)(.+)$", re.IGNORECASE)
-    bullet_pattern = re.compile(r"^\s*[-*]\s+(.+)$")
-
-    for raw_line in str(response_content).splitlines():
-        line = raw_line.strip()
-        if not line or line.startswith("```") or line.lower() in {"tasks:", "task list:", "output:"}:
-            continue
-
-        numbered_match = task_pattern.match(line)
-        bullet_match = bullet_pattern.match(line)
-
-        if numbered_match:
-            task_text = numbered_match.group(1).strip()
-            task_number = len(task_lines) + 1
-            task_lines.append(f"{task_number}. {task_text}")
-        elif bullet_match:
-            task_text = bullet_match.group(1).strip()
-            task_number = len(task_lines) + 1
-            task_lines.append(f"{task_number}. {task_text}")
-        else:
-            fallback_lines.append(line)
 
-    if not task_lines:
-        task_lines = [
-            f"{index}. {line}"
-            for index, line in enumerate(fallback_lines, start=1)
-            if len(line) > 2
-        ]
+def queue_position_text(ticket):
+    if ticket is not None and ticket.position:
+        return f"Groq is busy, your request is number {ticket.position} in the queue..."
+    return None
 
-    cleaned_tasks = []
-    seen = set()
-    for task in task_lines:
-        task = re.sub(r"\s+", " ", task).strip()
-        if task and task not in seen:
-            cleaned_tasks.append(task)
-            seen.add(task)
 
-    return cleaned_tasks
+def provider_sidebar(page_key):
+    """Provider, model and API key pickers shared by the Arctic and Oasis sidebars.
+
+    Returns ``(spec, model, api_key, ready)``; ``ready`` is false until a usable key is set.
+    """
+    from llm_providers import DEFAULT_PROVIDER, provider_specs
+
+    specs = provider_specs()
+    names = [spec.name for spec in specs]
+    spec = st.selectbox(
+        "Model Provider", specs, format_func=lambda spec: spec.label,
+        index=names.index(DEFAULT_PROVIDER) if DEFAULT_PROVIDER in names else 0,
+        key=f"{page_key}_model_provider",
+    )
+    model = spec.default_model
+    if spec.model_editable:
+        model = st.text_input("Model", value=spec.default_model, key=f"{page_key}_{spec.name}_model")
+    if spec.secret is None:
+        return spec, model, "", True
+    if spec.secret in st.secrets:
+        api_key = st.secrets[spec.secret]
+        st.caption(f"Using {spec.secret} from Streamlit secrets.")
+    else:
+        api_key = st.text_input(f"Enter {spec.secret}:", type="password", key=f"{page_key}_{spec.name}_key")
+    ready = bool(api_key) and spec.check_key(api_key)
+    if not ready:
+        st.warning(f"Please enter your {spec.secret}.", icon="⚠️")
+        if spec.key_help:
+            st.markdown(spec.key_help)
+    os.environ[spec.secret] = api_key
+    return spec, model, api_key, ready
+
+
+def llm_stream(spec, messages, api_key, model, temperature, use_cache=True, ticket=None):
+    """Async completion from ``spec``'s provider, served from the response cache when possible."""
+    from llm_cache import cached_stream
+    from llm_providers import get_provider
+
+    call = metrics.llm_call(spec.name, model, cached=use_cache)
+    request = call.request(
+        lambda: get_provider(spec.name).stream_chat(messages, api_key, model, temperature, ticket=ticket)
+    )
+    return call.measure(cached_stream(request, spec.name, model, temperature, messages, enabled=use_cache))
+
+
+def stream_chat(spec, messages, api_key, model, temperature=0.6, use_cache=True, status=None):
+    """Stream a chat response for the script thread.
+
+    While the request waits in a shared rate-limit queue, ``status`` shows its position.
+    """
+    import httpx
+    from llm_async import iter_sync
+
+    ticket = queue_ticket(api_key, PRIORITY_CHAT) if spec.rate_limited else None
+
+    def show_position():
+        text = queue_position_text(ticket)
+        if status is not None and text:
+            status.caption(text)
+
+    stream = iter_sync(llm_stream(spec, messages, api_key, model, temperature, use_cache, ticket), on_idle=show_position)
+    try:
+        for i, chunk in enumerate(stream):
+            if i == 0 and status is not None:
+                status.empty()
+            yield chunk
+    except httpx.HTTPError as exc:
+        show_llm_error(exc, spec, model)
+    except QueueFull:
+        show_queue_full()
+    finally:
+        # Cancels the upstream request if the script stopped reading early
+        stream.close()
+
+
+def mood_vector(response):
+    """The first six feature values in the bracketed list of an Oasis summary, or None."""
+    match = re.search(r'\[(.*?)\]', response)
+    if match:
+        extracted_array = re.findall(r'0?\.\d+|1(?:\.0+)?|0(?:\.0+)?', match.group(1))
+        if len(extracted_array) >= 6:
+            return extracted_array[:6]
+    return None
+
+
+@st.fragment(run_every=SUMMARY_POLL_SECONDS)
+def wait_for_mood_summary(summary, ticket=None):
+    """Poll the background ``summary`` future, then rerun the page once to show it.
+
+    The polling stops with that rerun: the page then draws the result
+    without this fragment.
+    """
+    if not summary.done():
+        st.caption(queue_position_text(ticket) or "Summarising your mood...")
+        return
+    st.rerun()
+
+
+def show_mood_summary(oasis, spec, model):
+    """The reply, recommendations and mood vector for the Oasis request in ``oasis``."""
+    import httpx
+
+    st.write("")
+    st.write(oasis["reply"])
+    st.subheader("Recommended Songs")
+    st.write(oasis["table"], unsafe_allow_html=True)
+    summary = oasis["summary"]
+    if not summary.done():
+        wait_for_mood_summary(summary, oasis["ticket"])
+        return
+    try:
+        full_response = summary.result()
+    except httpx.HTTPError as exc:
+        show_llm_error(exc, spec, model)
+    except QueueFull:
+        show_queue_full()
+    oasis["message"]["content"] = full_response
+    vector = mood_vector(full_response)
+    if vector:
+        st.caption(f"LLM mood vector: [{', '.join(vector)}]")
+
+
+def stream_tasks(chunks, parser, project_id, batch_key, status, messages):
+    """Pass ``chunks`` through, saving each task to OneDash as soon as its line is complete.
+
+    The answer is appended to ``messages`` with its first chunk and kept up
+    to date, so a rerun that interrupts the stream keeps the partial answer
+    instead of generating a new one whose tasks would duplicate those
+    already saved.
+    """
+    def save(tasks):
+        if tasks and project_id:
+            insert_tasks(project_id, tasks, batch_key=batch_key, start=len(parser.tasks) - len(tasks))
+            status.caption(f"{len(parser.tasks)} task(s) added to OneDash so far")
+
+    message = None
+    for chunk in chunks:
+        if message is None:
+            message = {"role": "assistant", "content": ""}
+            messages.append(message)
+        save(parser.feed(chunk))
+        message["content"] += chunk
+        yield chunk
+    save(parser.close())
+
+
+def complete_task(task_id, username):
+    # Checkbox callback: runs before the board reruns, so its counts include the tick
+    if st.session_state.get(f"completed_{task_id}"):
+        mark_task_as_completed(task_id, username)
+
+
+def remove_task(task_id):
+    delete_task(task_id)
+    st.session_state.onedash_notice = "Task deleted!"
+
+
+def show_progress(project_id, snapshot):
+    """Progress report and contribution chart for the tasks in ``snapshot``."""
+    completed, total = snapshot.completed, snapshot.total
+    if completed == total:
+        st.subheader("Congratulations! You've successfully completed your project!")
+        if st.button("Delete Project", key="delete_project_button"):
+            delete_project(project_id)
+            st.success(f"Project '{project_id}' has been successfully deleted. Hope to see you again!")
+    completed_percentage = int((completed / total) * 100)
+    st.subheader("Progress Report")
+    st.write(f"Completed Tasks: {completed} / {total}")
+    st.progress(completed_percentage, "Progress of Project Completion")
+
+    with metrics.span("onedash.chart"):
+        st.plotly_chart(contribution_figure(project_id, snapshot.contributions))
+
+    # Charts are only built when asked for, to keep task ticks cheap
+    if st.toggle("Burndown and velocity", key=f"burndown_{project_id}"):
+        show_burndown(project_id)
+
+
+def show_burndown(project_id):
+    """Open tasks over time and tasks completed per bucket, from the project's activity log."""
+    bucket = st.radio("Per", list(BURNDOWN_BUCKETS), horizontal=True, key=f"burndown_bucket_{project_id}")
+    with metrics.span("onedash.burndown"):
+        series = get_burndown(project_id, BURNDOWN_BUCKETS[bucket])
+        if not series:
+            st.caption("No task activity yet.")
+            return
+        import pandas as pd
+
+        df = pd.DataFrame(series).set_index("start")
+        df.index = pd.to_datetime(df.index, unit="s")
+        st.caption("Open tasks")
+        st.line_chart(df["remaining"])
+        st.caption("Tasks created and completed")
+        st.bar_chart(df[["created", "completed"]], stack=False)
+
+
+def show_task_row(task, username):
+    task_id, _, task_description, completed, completed_by = task
+    task_description = task_description.strip()
+    if task_description[:1].isdigit():
+        st.write(f":blue[{task_description}]")
+    else:
+        st.write(f"- {task_description}")
+    # Checkbox for marking task as completed
+    if not completed:
+        st.checkbox("Completed", key=f"completed_{task_id}", on_change=complete_task, args=(task_id, username))
+    else:
+        st.markdown(f":green[Task completed by:] {completed_by}")
+    # Button to delete task
+    st.button("Delete", key=f"delete_{task_id}", on_click=remove_task, args=(task_id,))
+
+
+@st.fragment
+def task_board(project_id, username):
+    """OneDash progress, contributions and one page of tasks.
+
+    Ticking or deleting a task reruns only this fragment: the member list,
+    avatars and import form around it are left as they are. The widget
+    callbacks write before the rerun, so the counts drawn here include the
+    change. Only ``TASKS_PER_PAGE`` rows are rendered, however many the
+    project has.
+    """
+    with metrics.span("onedash.snapshot"):
+        snapshot = get_project_snapshot(project_id)
+    st.session_state[f"onedash_revision_{project_id}"] = snapshot.revision
+    if not snapshot.tasks:
+        st.info("No tasks available.")
+        return
+    show_progress(project_id, snapshot)
+
+    st.subheader("Tasks from WorkPod AI as To-Dos:")
+    notice = st.session_state.pop("onedash_notice", None)
+    if notice:
+        st.success(notice)
+    rows = [task for task in snapshot.tasks if (task.task_description or "").strip()]
+    pages = max(1, -(-len(rows) // TASKS_PER_PAGE))
+    page_key = f"task_page_{project_id}"
+    if st.session_state.get(page_key, 1) > pages:
+        # Deletions emptied the last page
+        st.session_state[page_key] = pages
+    page = st.number_input("Page", min_value=1, max_value=pages, key=page_key) if pages > 1 else 1
+    start = (page - 1) * TASKS_PER_PAGE
+    if pages > 1:
+        st.caption(f"Showing tasks {start + 1}-{min(start + TASKS_PER_PAGE, len(rows))} of {len(rows)}")
+    for task in rows[start:start + TASKS_PER_PAGE]:
+        show_task_row(task, username)
+
+
+@st.fragment(run_every=ONEDASH_REFRESH_SECONDS)
+def watch_project(project_id):
+    """Rerun the page once someone else changes the project.
+
+    Each poll reads only the project's revision, usually from memory after
+    one ``PRAGMA data_version``, never the tasks themselves.
+    """
+    if get_project_revision(project_id) != st.session_state.get(f"onedash_revision_{project_id}"):
+        st.rerun()
+
+
+def show_debug_panel(run):
+    """Breakdown of the current script run, only shown with ``?debug=1`` and WORKPOD_METRICS=1."""
+    if run is None or st.query_params.get("debug") != "1":
+        return
+    import pandas as pd
+
+    with st.sidebar.expander("Performance (this run)", expanded=True):
+        st.caption(f"{run.page or 'no page'}: {run.elapsed() * 1000:.1f} ms so far")
+        if run.spans:
+            st.dataframe(pd.DataFrame(
+                [(name, offset * 1000, seconds * 1000) for name, offset, seconds in run.spans],
+                columns=["Span", "Start ms", "Duration ms"],
+            ), hide_index=True)
+        if run.sql:
+            st.dataframe(pd.DataFrame(
+                [(statement, count, seconds * 1000) for statement, (count, seconds) in run.sql.items()],
+                columns=["SQL", "Count", "Total ms"],
+            ).sort_values("Total ms", ascending=False), hide_index=True)
+        if run.llm:
+            st.dataframe(pd.DataFrame([call.as_dict() for call in run.llm]), hide_index=True)
+        st.download_button("Prometheus metrics", metrics.prometheus_text(), file_name="workpod.prom")
+
 
 # Main Streamlit app
 def main():
     # Create SQLite database if it doesn't exist
-    create_database()
+    with metrics.span("startup.database"):
+        create_database()
+        backfill_legacy_images()
     # Set page title and navigation
-    st.set_page_config(page_title="WorkPod", layout="wide", initial_sidebar_state="expanded", page_icon = "./WP.png")
+    st.set_page_config(page_title="WorkPod", layout="wide", initial_sidebar_state="expanded", page_icon = static_image("./WP.png"))
     # Page navigation
     with st.sidebar:
 
-        st.image("./workpodtitle.png", width="stretch")
-        st.image("./dolphinwordcloud.png", width="stretch")
+        st.image(static_image("./workpodtitle.png"), width="stretch")
+        st.image(static_image("./dolphinwordcloud.png"), width="stretch")
         page = st.radio("", ["Registration", "Login", "Arctic", "OneDash", "Oasis"])
+    metrics.enter_page(page)
 
 
     if page == "Registration":
@@ -354,12 +422,18 @@ def main():
         # Save user data to database upon form submission
         if st.button("Submit"):
             if project_id and username and email:
-                existing_user = get_user_by_project_id_and_username(project_id, username)
+                existing_user = get_user_by_project_id_and_username(project_id, username, columns=("id",))
                 if existing_user is None:
                     if uploaded_image is not None:
-                        image_bytes = uploaded_image.read()
-                        insert_user_data(username, email, project_id, image_bytes)
-                        st.success("You have successfully registered! Please head to Login.")
+                        try:
+                            avatar_hash = save_avatar(uploaded_image.read())
+                        except ValueError:
+                            st.error("Could not read that image. Please upload a JPG or PNG file.")
+                        else:
+                            if insert_user_data(username, email, project_id, avatar_hash):
+                                st.success("You have successfully registered! Please head to Login.")
+                            else:
+                                st.success("You are already registered!")
                     else:
                         st.error("Please upload a profile image.")
                 else:
@@ -389,7 +463,7 @@ def main():
         # Login button
         if st.button("Login"):
             if project_id and username:
-                existing_user = get_user_by_project_id_and_username(project_id, username)
+                existing_user = get_user_by_project_id_and_username(project_id, username, columns=("id",))
                 if existing_user is not None:
                     st.session_state.project_id = project_id
                     st.session_state.username = username
@@ -404,118 +478,80 @@ def main():
         st.title("Let's Break The Ice!")
         username = st.session_state.get("username")
         with st.sidebar:
-            model_provider = st.selectbox(
-                "Model Provider",
-                ["Groq - Llama 3.1 8B Instant", "Snowflake Arctic via Replicate (legacy)"],
-            )
-            use_groq = model_provider.startswith("Groq")
-            replicate_api = ""
-            groq_api = ""
-            groq_model = DEFAULT_GROQ_MODEL
-            if use_groq:
-                groq_model = st.text_input("Groq model", value=DEFAULT_GROQ_MODEL)
-                if 'GROQ_API_KEY' in st.secrets:
-                    groq_api = st.secrets['GROQ_API_KEY']
-                    st.caption("Using Groq API key from Streamlit secrets.")
-                else:
-                    groq_api = st.text_input('Enter Groq API key:', type='password')
-                    if not groq_api:
-                        st.warning('Please enter your Groq API key.', icon='⚠️')
-                os.environ['GROQ_API_KEY'] = groq_api
-            else:
-                if 'REPLICATE_API_TOKEN' in st.secrets:
-                    replicate_api = st.secrets['REPLICATE_API_TOKEN']
-                else:
-                    replicate_api = st.text_input('Enter Replicate API token:', type='password')
-                    if not (replicate_api.startswith('r8_') and len(replicate_api)==40):
-                        st.warning('Please enter your Replicate API token.', icon='⚠️')
-                        st.markdown("**Don't have an API token?** Head over to [Replicate](https://replicate.com) to sign up for one.")
-        
-                os.environ['REPLICATE_API_TOKEN'] = replicate_api
+            spec, model, api_key, ready = provider_sidebar("arctic")
             st.subheader("Model Creativity Control")
             temperature = st.sidebar.slider('temperature', min_value=0.2, max_value=1.5, value=0.6, step=0.1)
+            use_cache = not st.checkbox("Fresh response (skip cache)", key="arctic_skip_cache")
+            show_cache_stats()
+            show_queue_stats(spec, api_key)
     
         # Store LLM-generated responses
         if "messages" not in st.session_state.keys():
             if username:
-                st.session_state.messages = [{"role": "assistant", "content": f"Hi {username}! I'm WorkPod AI, now running on Llama 3.1 through Groq. I heard you are working on a special project, and I can help break it down into clear steps."}]
+                st.session_state.messages = Conversation([{"role": "assistant", "content": f"Hi {username}! I'm WorkPod AI, now running on Llama 3.1 through Groq. I heard you are working on a special project, and I can help break it down into clear steps."}])
             else:
-                st.session_state.messages = [{"role": "assistant", "content": f"Hi! I'm WorkPod AI, now running on Llama 3.1 through Groq. I heard you are working on a special project, and I can help break it down into clear steps."}]
+                st.session_state.messages = Conversation([{"role": "assistant", "content": f"Hi! I'm WorkPod AI, now running on Llama 3.1 through Groq. I heard you are working on a special project, and I can help break it down into clear steps."}])
     
         # Display or clear chat messages
         for message in st.session_state.messages:
-            with st.chat_message(message["role"], avatar=icons[message["role"]]):
+            with st.chat_message(message["role"], avatar=chat_avatar(icons[message["role"]])):
                 st.write(message["content"])
     
         def clear_chat_history():
             if username:
-                st.session_state.messages = [{"role": "assistant", "content": f"Hi {username}! I'm WorkPod AI, now running on Llama 3.1 through Groq. I heard you are working on a special project, and I can help break it down into clear steps."}]
+                st.session_state.messages = Conversation([{"role": "assistant", "content": f"Hi {username}! I'm WorkPod AI, now running on Llama 3.1 through Groq. I heard you are working on a special project, and I can help break it down into clear steps."}])
             else:
-                st.session_state.messages = [{"role": "assistant", "content": f"Hi! I'm WorkPod AI, now running on Llama 3.1 through Groq. I heard you are working on a special project, and I can help break it down into clear steps."}]
+                st.session_state.messages = Conversation([{"role": "assistant", "content": f"Hi! I'm WorkPod AI, now running on Llama 3.1 through Groq. I heard you are working on a special project, and I can help break it down into clear steps."}])
             
         st.sidebar.button('Clear chat history', on_click=clear_chat_history)
     
-        # Function for generating Snowflake Arctic response kept as the legacy path
-        def generate_snowflake_arctic_response():
-            prompt = []
-            for dict_message in st.session_state.messages:
-                if dict_message["role"] == "user":
-                    prompt.append("<|im_start|>user\n" + dict_message["content"] + "<|im_end|>")
-                else:
-                    prompt.append("<|im_start|>assistant\n" + dict_message["content"] + "<|im_end|>")
-            
-            prompt.append("<|im_start|>assistant")
-            prompt.append("Cool! ")
-            prompt_str = "\n".join(prompt)
-            
-            if estimate_num_tokens(prompt_str) >= 3072:
-                st.error("Conversation length too long. Please keep it under 3072 tokens.")
+        def generate_project_response(status):
+            system_prompt = {
+                "role": "system",
+                "content": (
+                    "Purpose: Convert a project idea into dashboard-ready tasks for WorkPod. "
+                    "Action: Break the project into 5 to 8 concrete implementation tasks. "
+                    "Output: Return only a numbered list. Each line must follow this exact format: "
+                    "1. Task title - expected time: X days. "
+                    "Do not include greetings, summaries, markdown headings, blank lines, or extra notes."
+                ),
+            }
+            budget = context_budget(model)
+            # Older turns beyond the model's budget are summarised rather than resent
+            chat_messages = st.session_state.messages.window(budget, system=system_prompt)
+            # Only a single oversized message can still exceed the budget
+            if sum(message_tokens(message) for message in chat_messages) > budget:
+                st.error(f"Message too long. Please keep it under {budget} tokens.")
                 st.button('Clear chat history', on_click=clear_chat_history, key="clear_chat_history")
                 st.stop()
-        
-            for event in replicate.stream("snowflake/snowflake-arctic-instruct",
-                                   input={"prompt": prompt_str,
-                                          "prompt_template": r"{prompt}",
-                                          "temperature": temperature,
-                                          "top_p": 0.9,
-                                          }):
-                yield str(event)
-
-        def generate_groq_project_response():
-            groq_messages = [
-                {
-                    "role": "system",
-                    "content": (
-                        "Purpose: Convert a project idea into dashboard-ready tasks for WorkPod. "
-                        "Action: Break the project into 5 to 8 concrete implementation tasks. "
-                        "Output: Return only a numbered list. Each line must follow this exact format: "
-                        "1. Task title - expected time: X days. "
-                        "Do not include greetings, summaries, markdown headings, blank lines, or extra notes."
-                    ),
-                },
-            ] + st.session_state.messages
-            return stream_groq_chat(groq_messages, api_key=groq_api, model=groq_model, temperature=temperature)
+            return stream_chat(spec, chat_messages, api_key, model, temperature, use_cache, status)
         
         # User-provided prompt
-        if prompt := st.chat_input(disabled=(not use_groq and not replicate_api) or (use_groq and not groq_api)):
+        if prompt := st.chat_input(disabled=not ready):
             st.session_state.messages.append({"role": "user", "content": prompt + " Break this project into WorkPod dashboard tasks. Return only the numbered task list in the required format."})
             with st.chat_message("user", avatar="🐬"):
                 st.write(prompt)
 
         # Generate a new response if last message is not from assistant
         if st.session_state.messages[-1]["role"] != "assistant":
-            with st.chat_message("assistant", avatar=icons["assistant"] if use_groq else "./Snowflake_Logomark_blue.svg"):
-                response = generate_groq_project_response() if use_groq else generate_snowflake_arctic_response()
-                full_response = st.write_stream(response)
-            message = {"role": "assistant", "content": full_response}
-            filtered_lines = parse_task_lines(full_response)
-            st.session_state.messages.append(message)
-            st.session_state.tasks = filtered_lines
             project_id = st.session_state.get("project_id")
+            # Keyed on the prompt, its position and each task, so a rerun replaying the answer inserts nothing new
+            batch_key = f"{len(st.session_state.messages)}:{st.session_state.messages[-1]['content']}"
+            parser = TaskStreamParser()
+            with st.chat_message("assistant", avatar=chat_avatar(spec.icon)):
+                status = st.empty()
+                with metrics.span("arctic.stream"):
+                    response = generate_project_response(status)
+                    full_response = st.write_stream(
+                        stream_tasks(response, parser, project_id, batch_key, status, st.session_state.messages)
+                    )
+            if st.session_state.messages[-1]["role"] != "assistant":
+                # Nothing was streamed
+                st.session_state.messages.append({"role": "assistant", "content": full_response})
+            filtered_lines = parser.tasks
+            st.session_state.tasks = filtered_lines
             if project_id:
                 if filtered_lines:
-                    for task_description in filtered_lines:
-                        insert_task(project_id, task_description)
                     st.success("Tasks pushed to OneDash!")
                 else:
                     st.warning("I could not find task lines in the model response. Please try again with a little more project detail.")
@@ -529,6 +565,10 @@ def main():
         username = st.session_state.get("username")
         if project_id:
             st.write(f"You are currently working on Project ID: {project_id}")
+            auto_refresh = st.toggle(
+                "Auto-refresh", key="onedash_auto_refresh",
+                help="Show teammates' changes as they happen, checking every few seconds.",
+            )
     
             # Exit project button
             if st.button("Exit Project", key="exit_button"):
@@ -538,96 +578,49 @@ def main():
                 else:
                     st.write("No username. Please log in first.")
     
+            # Bulk import of tasks from a file; re-importing the same file adds nothing
+            with st.expander("Import tasks from CSV/JSON"):
+                task_file = st.file_uploader("Task file", type=["csv", "json"], key="task_import_file")
+                if task_file is not None and st.button("Import", key="task_import_button"):
+                    try:
+                        imported = import_tasks(project_id, task_file.getvalue(), os.path.splitext(task_file.name)[1])
+                        st.success(f"Imported {imported} new task(s).")
+                    except (ValueError, UnicodeDecodeError) as exc:
+                        st.error(f"Could not read {task_file.name}: {exc}")
+
             # Display users with the same project ID
             st.sidebar.header(":grey-background[Project Members]")
-            project_users = get_users_by_project_id(project_id)
-            for user in project_users:
-                st.sidebar.markdown(f"Username: {user[1]}")
-                st.sidebar.markdown(f"Email: {user[2]}")
-                if user[4] is not None:
-                    # Display uploaded image
-                    image = Image.open(io.BytesIO(user[4]))
-                    st.sidebar.image(image, width="stretch", caption=user[1])
-        
-            tasks = get_tasks_by_project_id(project_id)
-            if tasks:
-                completed, total = get_completed_and_total_tasks(project_id)
-                if completed == total:
-                    st.subheader("Congratulations! You've successfully completed your project!")
-                    if st.button("Delete Project", key="delete_project_button"):
-                        delete_project(project_id)
-                        st.success(f"Project '{project_id}' has been successfully deleted. Hope to see you again!")
-                completed_percentage = int((completed / total) * 100)
-                st.subheader("Progress Report")
-                st.write(f"Completed Tasks: {completed} / {total}")
-                st.progress(completed_percentage, "Progress of Project Completion")
-
-                user_contributions = get_user_contributions(project_id)
-                user_contributions_df = pd.DataFrame(user_contributions, columns=["User", "Completed Tasks"])
-                fig = px.pie(user_contributions_df, names="User", values="Completed Tasks", title="User Contributions")
-                fig.update_traces(textposition='inside', textinfo='percent+label', textfont_color='white')
-                st.plotly_chart(fig)
-            
-                st.subheader("Tasks from WorkPod AI as To-Dos:")
-                for task in tasks:
-                    task_id, _, task_description, completed, completed_by = task
-                    task_description = (task_description or "").strip()
-                    if not task_description:
-                        continue
-                    if task_description[:1].isdigit():
-                        st.write(f":blue[{task_description}]")
-                    else:
-                        st.write(f"- {task_description}")
-                    # Checkbox for marking task as completed
-                    if not completed:
-                        completed = st.checkbox("Completed", key=f"completed_{task_id}")
-                        if completed:
-                            mark_task_as_completed(task_id, username)
-                    else:
-                        st.markdown(f":green[Task completed by:] {completed_by}")
-                    # Button to delete task
-                    if st.button("Delete", key=f"delete_{task_id}"):
-                        delete_task(task_id)
-                        st.success("Task deleted!")
-            else:
-                st.info("No tasks available.")
+            with metrics.span("onedash.members"):
+                members = get_project_snapshot(project_id).members
+            for user in members:
+                st.sidebar.markdown(f"Username: {user.username}")
+                st.sidebar.markdown(f"Email: {user.email}")
+                if user.avatar_hash is not None:
+                    # Display the stored thumbnail; the bytes are served as-is
+                    avatar = load_avatar(user.avatar_hash)
+                    if avatar is not None:
+                        st.sidebar.image(avatar, width="stretch", caption=user.username)
+
+            task_board(project_id, username)
+            if auto_refresh:
+                watch_project(project_id)
         else:
             st.info("Please log in first")
 
     elif page == "Oasis":
+        from streamlit_extras.stylable_container import stylable_container
+        from music_catalog import get_catalog, recommend, sample_mood_audio_profile
+        from llm_async import submit, collect
+        from llm_cache import mood_summaries
+
         st.title("Oasis - Music for your Mood :musical_note:")
         st.header("",divider="rainbow")
         username = st.session_state.get("username")
         with st.sidebar:
-            model_provider = st.selectbox(
-                "Model Provider",
-                ["Groq - Llama 3.1 8B Instant", "Snowflake Arctic via Replicate (legacy)"],
-                key="oasis_model_provider",
-            )
-            use_groq = model_provider.startswith("Groq")
-            replicate_api = ""
-            groq_api = ""
-            groq_model = DEFAULT_GROQ_MODEL
-            if use_groq:
-                groq_model = st.text_input("Groq model", value=DEFAULT_GROQ_MODEL, key="oasis_groq_model")
-                if 'GROQ_API_KEY' in st.secrets:
-                    groq_api = st.secrets['GROQ_API_KEY']
-                    st.caption("Using Groq API key from Streamlit secrets.")
-                else:
-                    groq_api = st.text_input('Enter Groq API key:', type='password', key="oasis_groq_api_key")
-                    if not groq_api:
-                        st.warning('Please enter your Groq API key.', icon='⚠️')
-                os.environ['GROQ_API_KEY'] = groq_api
-            else:
-                if 'REPLICATE_API_TOKEN' in st.secrets:
-                    replicate_api = st.secrets['REPLICATE_API_TOKEN']
-                else:
-                    replicate_api = st.text_input('Enter Replicate API token:', type='password')
-                    if not (replicate_api.startswith('r8_') and len(replicate_api)==40):
-                        st.warning('Please enter your Replicate API token.', icon='⚠️')
-                        st.markdown("**Don't have an API token?** Head over to [Replicate](https://replicate.com) to sign up for one.")
-        
-                os.environ['REPLICATE_API_TOKEN'] = replicate_api
+            spec, model, api_key, ready = provider_sidebar("oasis")
+            use_cache = not st.checkbox("Fresh response (skip cache)", key="oasis_skip_cache")
+            show_cache_stats()
+            show_queue_stats(spec, api_key)
 
         if username:
             st.write(f"Hello {username}. How are you feeling today?")
@@ -695,34 +688,10 @@ def main():
 
         def clear_chat_history():
             st.session_state.musicrequest = [{"role": "assistant", "content": "Let's vibe with some music!"}]
+            st.session_state.pop("oasis_summary", None)
         
-        # Function for generating Snowflake Arctic response kept as the legacy path
-        def generate_snowflake_arctic_response():
-            prompt = []
-            for dict_message in st.session_state.musicrequest:
-                if dict_message["role"] == "user":
-                    prompt.append("<|im_start|>user\n" + dict_message["content"] + "<|im_end|>")
-                else:
-                    prompt.append("<|im_start|>assistant\n" + dict_message["content"] + "<|im_end|>")
-            
-            prompt.append("<|im_start|>assistant")
-            prompt_str = "\n".join(prompt)
-            
-            if estimate_num_tokens(prompt_str) >= 3072:
-                st.error("Conversation length too long. Please keep it under 3072 tokens.")
-                st.button('Clear chat history', on_click=clear_chat_history, key="clear_chat_history")
-                st.stop()
-        
-            for event in replicate.stream("snowflake/snowflake-arctic-instruct",
-                                   input={"prompt": prompt_str,
-                                          "prompt_template": r"{prompt}",
-                                          "temperature": 0.5,
-                                          "top_p": 0.9,
-                                          }):
-                yield str(event)
-
-        def generate_groq_music_response():
-            groq_messages = [
+        def generate_music_response(ticket):
+            music_messages = [
                 {
                     "role": "system",
                     "content": (
@@ -733,31 +702,12 @@ def main():
                     ),
                 },
             ] + st.session_state.musicrequest
-            return stream_groq_chat(groq_messages, api_key=groq_api, model=groq_model, temperature=0.5)
+            return llm_stream(spec, music_messages, api_key, model, 0.5, use_cache, ticket)
 
-        url = "./musicdata.csv"
-        df = prepare_music_dataset(pd.read_csv(url))
+        # Prepared once per process and shared across sessions; rebuilt if musicdata.csv changes
+        with metrics.span("oasis.catalog"):
+            catalog = get_catalog()
 
-        def make_clickable(val):
-            # target _blank to open new window
-            return '<a target="_blank" href="{}">{}</a>'.format(val, val)
-        
-        def get_recommendations(df, profile, amount):
-            target = pd.Series(profile, dtype=float)
-            weights = pd.Series({
-                "danceability": 1.0,
-                "energy": 1.25,
-                "speechiness": 0.55,
-                "acousticness": 1.1,
-                "valence": 1.35,
-                "tempo_norm": 0.8,
-            })
-            distances = ((df[MUSIC_FEATURES] - target[MUSIC_FEATURES]).abs() * weights[MUSIC_FEATURES]).sum(axis=1)
-            res = df.assign(distance=distances).sort_values('distance')
-            res['spotify_track_id'] = res['spotify_track_id'].apply(make_clickable)
-            columns=['Song', 'Performer', 'spotify_track_id']
-            return res[columns][:amount]
-        
         mood = ""
         selected_mood = ""
         reply = ""
@@ -798,28 +748,39 @@ def main():
 
         # Generate a new response if last message is not from assistant
         if st.session_state.musicrequest[-1]["role"] != "assistant":
-            st.write("")
-            st.write(reply)
             selected_mood = st.session_state.get("selected_oasis_mood", selected_mood)
-            recdf = get_recommendations(df, sample_mood_audio_profile(selected_mood), 10)
-            recdf.reset_index(drop=True, inplace=True)
-            st.subheader("Recommended Songs")
-            rec = st.write(recdf.to_html(escape = False), unsafe_allow_html = True)
-            if use_groq and not groq_api:
+            with metrics.span("oasis.recommend"):
+                recdf = recommend(catalog, sample_mood_audio_profile(selected_mood), 10, mood=selected_mood)
+            table = recdf.to_html(escape = False)
+            if not ready:
+                st.write("")
+                st.write(reply)
+                st.subheader("Recommended Songs")
+                st.write(table, unsafe_allow_html = True)
                 st.session_state.musicrequest.append({"role": "assistant", "content": "Recommendations generated from the local music dataset."})
-                st.caption("Add a Groq API key in the sidebar for an LLM-generated mood summary.")
+                st.caption("Add an API key in the sidebar for an LLM-generated mood summary.")
                 st.stop()
-            response = generate_groq_music_response() if use_groq else generate_snowflake_arctic_response()
-            full_response = ''
-            for i in response:
-                full_response += str(i)
-            message = {"role": "assistant", "content": full_response}
-            match = re.search(r'\[(.*?)\]', full_response)
+            # The summary runs on the background loop; the page is done once the table is shown
+            # Summaries queue behind interactive Arctic chats on a shared key
+            ticket = queue_ticket(api_key, PRIORITY_SUMMARY) if spec.rate_limited else None
+            summary = mood_summaries.get_or_submit(
+                (spec.name, model, selected_mood),
+                lambda: submit(collect(generate_music_response(ticket))),
+                refresh=not use_cache,
+            )
+            message = {"role": "assistant", "content": "Summarising your mood..."}
             st.session_state.musicrequest.append(message)
-            if match:
-                extracted_array = re.findall(r'0?\.\d+|1(?:\.0+)?|0(?:\.0+)?', match.group(1))
-                if len(extracted_array) >= 6:
-                    st.caption(f"LLM mood vector: [{', '.join(extracted_array[:6])}]")
-            
+            # Kept for the rerun that shows the finished summary
+            st.session_state.oasis_summary = {
+                "reply": reply, "table": table, "summary": summary, "message": message, "ticket": ticket,
+            }
+            show_mood_summary(st.session_state.oasis_summary, spec, model)
+        elif "oasis_summary" in st.session_state:
+            show_mood_summary(st.session_state.oasis_summary, spec, model)
+
 if __name__ == "__main__":
-    main()
+    with metrics.script_run() as run:
+        try:
+            main()
+        finally:
+            show_debug_panel(run)
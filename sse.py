@@ -0,0 +1,101 @@
+"""Server-sent events decoding for the streaming chat APIs.
+
+``EventStreamDecoder`` takes the response body in whatever byte chunks
+the transport hands over and returns the ``data`` payload of each
+completed event. It follows the event-stream format: lines may end in
+CRLF, LF or CR, including a CRLF split across two chunks; several
+``data:`` lines in one event are joined with newlines; ``:`` comment
+lines (keep-alives) and other fields are skipped. Payloads stay as bytes.
+
+``chat_delta`` reads ``choices[0].delta.content`` from an OpenAI-style
+chunk. It does not build the whole JSON document. When the payload has a
+single ``"content"`` key holding a plain string, the text is sliced out
+and decoded in place. Anything else (escapes, null, unusual layout) goes
+through ``json``.
+"""
+import json
+from json.decoder import scanstring
+
+DONE = b"[DONE]"
+_CONTENT_KEY = b'"content"'
+
+
+class EventStreamDecoder:
+    def __init__(self):
+        self._pending = b""
+        self._data = []
+
+    def feed(self, chunk):
+        """Consume ``chunk`` (bytes) and return the payloads of the events it completed."""
+        buffer = self._pending + chunk if self._pending else chunk
+        if b"\r" in buffer:
+            # A trailing CR may be the first half of a CRLF
+            keep_cr = buffer.endswith(b"\r")
+            if keep_cr:
+                buffer = buffer[:-1]
+            buffer = buffer.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+            if keep_cr:
+                buffer += b"\r"
+        lines = buffer.split(b"\n")
+        self._pending = lines.pop()
+        events = []
+        for line in lines:
+            self._line(line, events)
+        return events
+
+    def close(self):
+        """Payload of an event left unterminated at the end of the body, if any.
+
+        The format says to drop it, but some servers omit the final blank
+        line, so it is returned rather than lost.
+        """
+        events = []
+        if self._pending:
+            self._line(self._pending.rstrip(b"\r"), events)
+            self._pending = b""
+        self._line(b"", events)
+        return events
+
+    def _line(self, line, events):
+        if not line:
+            if self._data:
+                events.append(self._data[0] if len(self._data) == 1 else b"\n".join(self._data))
+                self._data = []
+            return
+        if line.startswith(b"data:"):
+            value = line[5:]
+            self._data.append(value[1:] if value.startswith(b" ") else value)
+        elif line == b"data":
+            self._data.append(b"")
+        # Comments (":...") and the event, id and retry fields carry nothing the chat path uses
+
+
+def chat_delta(payload):
+    """Content delta of one chat-completion event: "" if none, None at ``[DONE]``."""
+    if payload == DONE:
+        return None
+    key = payload.find(_CONTENT_KEY)
+    if key < 0:
+        return ""
+    if payload.find(_CONTENT_KEY, key + len(_CONTENT_KEY)) < 0:
+        start = key + len(_CONTENT_KEY)
+        if payload.startswith(b':"', start):
+            end = payload.find(b'"', start + 2)
+            if end > 0 and payload.find(b"\\", start + 2, end) < 0:
+                return payload[start + 2:end].decode("utf-8")
+            text = payload[start + 2:].decode("utf-8")
+            return scanstring(text, 0)[0]
+        if payload.startswith(b":null", start):
+            return ""
+    return _json_delta(payload)
+
+
+def _json_delta(payload):
+    try:
+        event = json.loads(payload)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return ""
+    try:
+        return event["choices"][0]["delta"].get("content") or ""
+    except (KeyError, IndexError, TypeError, AttributeError):
+        return ""
@@ -0,0 +1,34 @@
+"""Build on-disk caches in a staging directory and rename them into place.
+
+Readers only ever see a cache directory that is complete, because it
+appears in one ``os.rename``. When several processes build the same cache
+at once, the first rename wins and the others discard their copies.
+"""
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+STAGING_PREFIX = ".building-"
+
+
+@contextmanager
+def staged_directory(directory):
+    """Yield a fresh sibling of ``directory`` to write into, then rename it to ``directory``.
+
+    The staging directory is removed if the block raises or if another
+    process has already put ``directory`` in place.
+    """
+    parent = os.path.dirname(directory)
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=parent, prefix=STAGING_PREFIX)
+    try:
+        yield staging
+        try:
+            os.rename(staging, directory)
+        except OSError:
+            # Another process finished the same build first
+            shutil.rmtree(staging, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
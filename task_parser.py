@@ -0,0 +1,75 @@
+"""Task extraction from model-generated project breakdowns.
+
+``TaskStreamParser`` takes a response chunk by chunk and emits each task as
+soon as its line is complete. Numbering and de-duplication match
+``parse_task_lines``. Unnumbered fallback lines are only used when the
+response contains no numbered or bulleted line at all, so they can only be
+emitted by ``close()`` once the stream has ended.
+"""
+import re
+
+TASK_PATTERN = re.compile(r"^\s*(?:[-*]\s*)?(?:\d+[\).\:-]\s*|Step\s+\d+[\).\:-]\s*)(.+)$", re.IGNORECASE)
+BULLET_PATTERN = re.compile(r"^\s*[-*]\s+(.+)$")
+SKIPPED_LINES = {"tasks:", "task list:", "output:"}
+
+
+class TaskStreamParser:
+    def __init__(self):
+        self.tasks = []
+        self._buffer = ""
+        self._numbered = 0
+        self._fallback_lines = []
+        self._seen = set()
+
+    def feed(self, chunk):
+        """Consume ``chunk`` and return the tasks completed by it."""
+        self._buffer += chunk
+        lines = self._buffer.splitlines(keepends=True)
+        # The last piece has no line break yet unless the chunk ended on one
+        if lines and lines[-1].splitlines() == [lines[-1]]:
+            self._buffer = lines.pop()
+        else:
+            self._buffer = ""
+        new = []
+        for line in lines:
+            self._line(line, new)
+        return new
+
+    def close(self):
+        """Flush the final line and, if nothing was numbered, the fallback lines."""
+        new = []
+        if self._buffer:
+            self._line(self._buffer, new)
+            self._buffer = ""
+        if not self._numbered:
+            for index, line in enumerate(self._fallback_lines, start=1):
+                if len(line) > 2:
+                    self._emit(f"{index}. {line}", new)
+            self._fallback_lines = []
+        return new
+
+    def _line(self, raw_line, new):
+        line = raw_line.strip()
+        if not line or line.startswith("```") or line.lower() in SKIPPED_LINES:
+            return
+        match = TASK_PATTERN.match(line) or BULLET_PATTERN.match(line)
+        if match:
+            self._numbered += 1
+            self._emit(f"{self._numbered}. {match.group(1).strip()}", new)
+        else:
+            self._fallback_lines.append(line)
+
+    def _emit(self, task, new):
+        task = re.sub(r"\s+", " ", task).strip()
+        if task and task not in self._seen:
+            self._seen.add(task)
+            self.tasks.append(task)
+            new.append(task)
+
+
+def parse_task_lines(response_content):
+    """Extract clean task rows from a model-generated project breakdown."""
+    parser = TaskStreamParser()
+    parser.feed(str(response_content))
+    parser.close()
+    return parser.tasks